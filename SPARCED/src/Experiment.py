@@ -5,15 +5,26 @@ import os
 import sys
 
 import importlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import replace
+
 import numpy as np
 
 import constants as const
 from Simulation import Simulation as SparcedSimulation
+from simulation.parameters import apply_parameters, load_amici_model
+from simulation.plan import load_sge_plan
+from simulation.population import RunPopulation
 
 from compilation.amici_scripts.creation import amici_create_folder
 from compilation.sbml_scripts.creation import build_sbml_model_path
+from compilation.sbml_scripts.metadata import load_model_metadata
 from utils.data_handling import *
 from utils.files_handling import *
+from utils.population_statistics import PopulationStatistics
+from utils.results_writer import OutputOptions, get_results_writer
 
 
 # CUSTOM ERRORS
@@ -28,6 +39,60 @@ class NegativeNumberOfReplicates(ValueError):
              + f"Number of replicates: {self.nb_replicates}\n"
              + f"Error: {self.message}\n")
 
+class UnknownPerturbationTarget(ValueError):
+    def __init__(self, message: str, target: str):
+        self.message = message
+        self.target = target
+
+    def __str__(self):
+        return("SPARCED ERROR: Unknown perturbation target.\n"
+             + f"Target: {self.target}\n"
+             + f"Error: {self.message}\n")
+
+# POOL WORKERS
+
+_worker = {}
+
+def _initialize_worker(experiment, metadata: dict[str, np.ndarray],
+                       plan: dict[str, np.ndarray]) -> None:
+    """Load the AMICI model module once per worker process
+
+    Note:
+        The metadata and SGE plan are loaded (and compiled if needed)
+        by the parent process, so that workers never write them.
+    """
+
+    model = experiment.load_model_module(experiment.model_name,
+                                         experiment.amici_path,
+                                         experiment.verbose, metadata)
+    model.setTimepoints(np.linspace(0, experiment.exchange, 2))
+    _worker["experiment"] = experiment
+    _worker["model"] = model
+    _worker["species"] = experiment.load_species(metadata)
+    _worker["parameters"] = experiment.load_parameters(model)
+    _worker["plan"] = plan
+
+def _run_worker_cell(cell_number: int, seed: np.random.SeedSequence) -> int:
+    """Run one replicate within a worker process"""
+
+    _worker["experiment"].run_cell(_worker["model"], _worker["species"],
+                                   _worker["parameters"], _worker["plan"],
+                                   cell_number, seed)
+    return(cell_number)
+
+def _run_worker_cells(cell_numbers: list[int],
+                      seeds: list[np.random.SeedSequence]
+                      ) -> dict[str, PopulationStatistics]:
+    """Run a batch of replicates within a worker process, aggregated"""
+
+    experiment = _worker["experiment"]
+    statistics = experiment.build_statistics()
+    for cell_number, seed in zip(cell_numbers, seeds):
+        experiment.run_cell(_worker["model"], _worker["species"],
+                            _worker["parameters"], _worker["plan"],
+                            cell_number, seed, statistics)
+    return(statistics)
+
 # EXPERIMENT
 
 class Experiment:
@@ -48,24 +113,132 @@ class Experiment:
         self.sbml_path = build_sbml_model_path(model_name, model_path)
         self.simulation_files = simulation_files
         # Configuration unpacking
+        self.output = self.load_output_options()
+        self.engine = self.configuration.get(const.YAML_EXPERIMENT_ENGINE,
+                                             const.ENGINE_SERIAL)
         self.exchange = self.configuration[const.YAML_EXPERIMENT_EXCHANGE]
         self.nb_replicates = self.sanitize_nb_replicates(int(
                     self.configuration[const.YAML_EXPERIMENT_NB_REPLICATES]))
+        self.threads = int(self.configuration.get(
+                                    const.YAML_EXPERIMENT_THREADS, 1))
+        self.workers = self.configuration.get(const.YAML_EXPERIMENT_WORKERS)
+        self.seed = self.configuration.get(const.YAML_EXPERIMENT_SEED)
+        self.aggregate = const.YAML_EXPERIMENT_STATISTICS in self.configuration
+        statistics = (self.configuration.get(const.YAML_EXPERIMENT_STATISTICS)
+                      or {})
+        self.quantiles = statistics.get(const.YAML_STATISTICS_QUANTILES,
+                                        const.DEFAULT_STATISTICS_QUANTILES)
+        self.compression = int(statistics.get(
+                                    const.YAML_STATISTICS_COMPRESSION,
+                                    const.DEFAULT_STATISTICS_COMPRESSION))
         # TODO: Add stamp to output_directory name if necessary
         self.output_directory = append_subfolder(self.configuration[
                                     const.YAML_EXPERIMENT_OUTPUT_DIRECTORY],
                                     self.name)
         self.verbose = self.configuration[const.YAML_EXPERIMENT_VERBOSE]
 
-    def apply_perturbations(self,
-                            species,
+    def load_output_options(self) -> OutputOptions:
+        """Unpack the output settings of the experiment's configuration
+
+        Note:
+            Observables are read from a PEtab observables file located
+            in the experiment's directory.
+
+        Returns:
+            The output options.
+        """
+
+        config = self.configuration
+        selection = config.get(const.YAML_EXPERIMENT_OUTPUT_SELECTION) or {}
+        observables = None
+        if selection.get(const.YAML_OUTPUTS_OBSERVABLES):
+            observables = load_petab_observables_file(append_subfolder(
+                                self.path,
+                                selection[const.YAML_OUTPUTS_OBSERVABLES]))
+        output = OutputOptions(
+                    config.get(const.YAML_EXPERIMENT_OUTPUT_FORMAT,
+                               const.OUTPUT_FORMAT_TSV),
+                    config.get(const.YAML_EXPERIMENT_OUTPUT_PRECISION,
+                               const.OUTPUT_PRECISION_DOUBLE),
+                    bool(config.get(const.YAML_EXPERIMENT_OUTPUT_COMPRESSION,
+                                    False)),
+                    int(config.get(const.YAML_EXPERIMENT_CHUNK_SIZE,
+                                   const.DEFAULT_OUTPUT_CHUNK_SIZE)),
+                    int(config.get(const.YAML_EXPERIMENT_OUTPUT_STRIDE, 1)),
+                    config.get(const.YAML_EXPERIMENT_OUTPUT_TIMES),
+                    selection.get(const.YAML_OUTPUTS_SPECIES),
+                    selection.get(const.YAML_OUTPUTS_PATTERNS),
+                    observables)
+        get_results_writer(output.format) # Fail early on unknown formats
+        return(output)
+
+    def load_perturbations(self, protocol: dict,
+                           species: dict[str, float],
+                           parameters: dict[str, float]
+                           ) -> tuple[dict[str, float], dict[str, float]]:
+        """Load the perturbations of a protocol step
+
+        Note:
+            Columns of the conditions file are either species or
+            parameters of the model. Parameters listed in the protocol
+            step override the ones of the conditions file.
+
+        Arguments:
+            protocol: The protocol step settings.
+            species: The species concentrations.
+            parameters: The model's parameters values.
+
+        Returns:
+            A tuple representing:
+                - The perturbed species concentrations.
+                - The perturbed parameters values.
+        """
+
+        perturbations_file = append_subfolder(
+                            self.path,
+                            protocol[const.YAML_PROTOCOL_PERTURBATIONS])
+        perturbations = load_petab_conditions_file(
                             perturbations_file,
-                            perturbations_id) -> dict[str, float]:
-        perturbations = load_petab_conditions_file(perturbations_file,
-                                                   perturbations_id)
+                            protocol[const.YAML_PROTOCOL_PERTURBATIONS_ID])
+        species_values = {}
+        parameters_values = {}
         for p_name, p_value in perturbations.items():
-            species[p_name] = p_value
-        return(species)
+            if p_name in species:
+                species_values[p_name] = p_value
+            elif p_name in parameters:
+                parameters_values[p_name] = float(p_value)
+            else:
+                raise UnknownPerturbationTarget(
+                            "Neither a species nor a parameter of model "
+                            + f"{self.model_name}.", p_name)
+        for p_name, p_value in (protocol.get(const.YAML_PROTOCOL_PARAMETERS)
+                                or {}).items():
+            if p_name not in parameters:
+                raise UnknownPerturbationTarget(
+                            f"Not a parameter of model {self.model_name}.",
+                            p_name)
+            parameters_values[p_name] = float(p_value)
+        return(species_values, parameters_values)
+
+    def apply_step_parameters(self, model, parameters: dict[str, float],
+                              perturbed: dict[str, float]) -> None:
+        """Set the model's parameters for a protocol step
+
+        Note:
+            Every step starts from the compiled parameters values, so
+            that perturbations of a step do not leak into the next
+            steps nor into other replicates sharing the model.
+
+        Arguments:
+            model: The loaded AMICI model.
+            parameters: The compiled parameters values.
+            perturbed: The parameters values perturbed by the step.
+
+        Returns:
+            Nothing.
+        """
+
+        apply_parameters(model, parameters | perturbed)
 
     def extract_species_initial_conditions(self, species: dict[str, float]
                                             ) -> np.ndarray:
@@ -74,49 +247,336 @@ class Experiment:
             initial_conditions.append(value)
         return(initial_conditions)
 
-    def load_model_module(self, model_name, amici_path, verbose):
+    def load_metadata(self) -> dict[str, np.ndarray]:
+        """Load the metadata of the experiment's compiled model
+
+        Returns:
+            The model's metadata (see compilation.sbml_scripts.metadata).
+        """
+
+        return(load_model_metadata(
+                        self.model_name, self.amici_path.parent,
+                        self.sbml_path,
+                        self.simulation_files[const.YAML_GENES_REGULATION]))
+
+    def load_species(self, metadata: dict[str, np.ndarray]
+                     ) -> dict[str, float]:
+        """Load the species default initial concentrations
+
+        Arguments:
+            metadata: The model's metadata.
+
+        Returns:
+            A dictionnary structured as key: name / value: initial
+            concentration.
+        """
+
+        return(dict(zip(metadata["state_ids"].tolist(),
+                        metadata["initial_states"].tolist())))
+
+    def load_plan(self, metadata: dict[str, np.ndarray]
+                  ) -> dict[str, np.ndarray]:
+        """Load the SGE plan of the experiment's model
+
+        Arguments:
+            metadata: The model's metadata.
+
+        Returns:
+            The SGE plan (see simulation.plan).
+        """
+
+        plan = load_sge_plan(self.model_name, self.amici_path.parent,
+                             self.simulation_files, metadata)
+        if self.verbose:
+            print("SPARCED VERBOSE: Success loading SGE plan of model "
+                + f"{self.model_name}.\n")
+        return(plan)
+
+    def load_parameters(self, model) -> dict[str, float]:
+        """Load the parameters values of the loaded AMICI model
+
+        Arguments:
+            model: The loaded AMICI model.
+
+        Returns:
+            A dictionnary structured as key: parameter ID / value: value,
+            fixed parameters included.
+        """
+
+        parameters = dict(zip(model.getFixedParameterIds(),
+                              model.getFixedParameters()))
+        parameters.update(zip(model.getParameterIds(),
+                              model.getParameters()))
+        return(parameters)
+
+    def load_model_module(self, model_name, amici_path, verbose, metadata):
         sys.path.insert(0, os.path.abspath(amici_path))
         # TODO: fix the import on the next line to avoid messing up with paths
         model_module = importlib.import_module(model_name)
-        model = model_module.getModel()
+        model = load_amici_model(model_module, amici_path.parent, metadata)
         if verbose:
             print("SPARCED VERBOSE: Success loading model "
                 + f"{self.model_name}.\n")
         return(model)
 
     def run(self):
+        if self.engine == const.ENGINE_POOL:
+            self.run_pool()
+            return
+        metadata = self.load_metadata()
         model = self.load_model_module(self.model_name,
                                        self.amici_path,
-                                       self.verbose)
+                                       self.verbose, metadata)
         model.setTimepoints(np.linspace(0, self.exchange, 2))
-        species = load_species_from_sbml(self.sbml_path)
-        cell_number = 1
-        while cell_number <= self.nb_replicates:
-            for step in self.configuration[const.YAML_EXPERIMENT_PROTOCOL]:
-                protocol = step[1] # Skip step name
-                simulation = SparcedSimulation(
+        species = self.load_species(metadata)
+        parameters = self.load_parameters(model)
+        plan = self.load_plan(metadata)
+        statistics = self.build_statistics()
+        if self.engine == const.ENGINE_LOCKSTEP:
+            self.run_lockstep(model, species, parameters, plan, statistics)
+        else:
+            seeds = self.spawn_seeds()
+            cell_number = 1
+            while cell_number <= self.nb_replicates:
+                self.run_cell(model, species, parameters, plan, cell_number,
+                              seeds[cell_number - 1], statistics)
+                cell_number += 1
+        self.write_statistics(statistics)
+
+    def build_statistics(self) -> dict[str, PopulationStatistics] | None:
+        """Create empty population statistics for each protocol step
+
+        Returns:
+            The statistics by protocol step name, None if the experiment
+            saves every replicate instead.
+        """
+
+        if not self.aggregate:
+            return(None)
+        return({step[1][const.YAML_PROTOCOL_NAME]: PopulationStatistics(
+                                    quantiles=self.quantiles,
+                                    compression=self.compression)
+                for step in self.configuration[const.YAML_EXPERIMENT_PROTOCOL]})
+
+    def write_statistics(self,
+                         statistics: dict[str, PopulationStatistics] | None
+                         ) -> None:
+        """Write the population statistics of each protocol step
+
+        Arguments:
+            statistics: The statistics by protocol step name.
+
+        Returns:
+            Nothing.
+        """
+
+        if statistics is None:
+            return
+        writer = get_results_writer(self.output.format)
+        Path(self.output_directory).mkdir(parents=True, exist_ok=True)
+        for name, step_statistics in statistics.items():
+            file_path = append_subfolder(self.output_directory,
+                                         name + const.STATISTICS_FILE_SUFFIX
+                                         + writer.extension)
+            step_statistics.write(file_path, self.output)
+            if self.verbose:
+                print(f"SPARCED VERBOSE: {name} statistics of "
+                    + f"{self.nb_replicates} cells are successfully saved.\n")
+
+    def run_cell(self, model, species: dict[str, float],
+                 parameters: dict[str, float],
+                 plan: dict[str, np.ndarray], cell_number: int,
+                 seed: np.random.SeedSequence,
+                 statistics: dict[str, PopulationStatistics] = None) -> None:
+        """Run all the protocol steps of one replicate
+
+        Note:
+            Each replicate starts from the given species and draws its
+            random numbers from its own stream, so that its results do
+            not depend on which process runs it nor on the order in
+            which replicates are run.
+
+        Arguments:
+            model: The loaded AMICI model.
+            species: The species initial concentrations.
+            parameters: The compiled parameters values.
+            plan: The SGE plan.
+            cell_number: The number of the replicate.
+            seed: The seed sequence of the replicate's random stream.
+            statistics: The population statistics by protocol step name,
+                        to add the replicate to instead of saving it.
+
+        Returns:
+            Nothing.
+        """
+
+        rng = np.random.default_rng(seed)
+        species = dict(species)
+        for step in self.configuration[const.YAML_EXPERIMENT_PROTOCOL]:
+            protocol = step[1] # Skip step name
+            simulation = SparcedSimulation(
+                            protocol[const.YAML_PROTOCOL_NAME],
+                            self.output_directory,
+                            protocol[const.YAML_PROTOCOL_DURATION],
+                            protocol[const.YAML_PROTOCOL_IS_DETERMINISTIC],
+                            cell_number,
+                            self.verbose,
+                            self.output,
+                            statistics[protocol[const.YAML_PROTOCOL_NAME]]
+                            if statistics is not None else None)
+            species_values, parameters_values = self.load_perturbations(
+                            protocol, species, parameters)
+            species.update(species_values)
+            self.apply_step_parameters(model, parameters, parameters_values)
+            initial_conditions = self.extract_species_initial_conditions(species)
+            model.setInitialStates(initial_conditions)
+            if self.verbose:
+                print("SPARCED VERBOSE: "
+                    + f"{protocol[const.YAML_PROTOCOL_NAME]} "
+                    + f"n°{cell_number} is now ready to run.\n")
+            species_levels = simulation.run(model, initial_conditions, plan, rng)
+            # Next protocol step starts where this one ended
+            species = dict(zip(species.keys(), species_levels[-1]))
+            del simulation
+
+    def run_pool(self) -> None:
+        """Spread the replicates over a pool of local processes
+
+        Note:
+            The model's metadata and SGE plan are loaded here, then
+            handed to every worker process, which loads the AMICI model
+            module once and runs the replicates it is given with
+            run_cell(). With population statistics, replicates are
+            split into batches of a fixed number of cells, whose
+            statistics are merged here in order: results do not depend
+            on the number of workers. No more batches than workers are
+            in flight, so that memory holds at most twice as many
+            statistics as workers, plus the merged ones.
+
+        Returns:
+            Nothing.
+        """
+
+        seeds = self.spawn_seeds()
+        cell_numbers = list(range(1, self.nb_replicates + 1))
+        statistics = self.build_statistics()
+        metadata = self.load_metadata()
+        plan = self.load_plan(metadata)
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_initialize_worker,
+                                 initargs=(self, metadata, plan)) as executor:
+            if statistics is None:
+                for _ in executor.map(_run_worker_cell, cell_numbers, seeds):
+                    pass
+                return
+            batches = [range(first, min(first + const.STATISTICS_BATCH_SIZE,
+                                        self.nb_replicates))
+                       for first in range(0, self.nb_replicates,
+                                          const.STATISTICS_BATCH_SIZE)]
+            def merge(batch_statistics):
+                for name, step_statistics in batch_statistics.items():
+                    statistics[name].merge(step_statistics)
+            # At most one pending batch per worker, so that finished
+            # batches do not pile up here while an earlier one runs
+            nb_workers = self.workers or os.cpu_count()
+            pending = deque()
+            for batch in batches:
+                if len(pending) == nb_workers:
+                    merge(pending.popleft().result())
+                pending.append(executor.submit(
+                                    _run_worker_cells,
+                                    [cell_numbers[i] for i in batch],
+                                    [seeds[i] for i in batch]))
+            while pending:
+                merge(pending.popleft().result())
+        self.write_statistics(statistics)
+
+    def run_lockstep(self, model, species: dict[str, float],
+                     parameters: dict[str, float],
+                     plan: dict[str, np.ndarray],
+                     statistics: dict[str, PopulationStatistics] = None
+                     ) -> None:
+        """Run all the replicates together, one protocol step at a time
+
+        Note:
+            Every replicate's results are streamed to its own writer
+            while the population is simulated. The writers share the
+            output chunk size, so that the rows buffered for the whole
+            population do not exceed it, but each writer buffers at
+            least LOCKSTEP_MIN_CHUNK_SIZE rows: files are not written
+            one row at a time. Writers only open their file while
+            writing a chunk, whatever the number of replicates.
+
+        Arguments:
+            model: The loaded AMICI model.
+            species: The species initial concentrations.
+            parameters: The compiled parameters values.
+            plan: The SGE plan.
+            statistics: The population statistics by protocol step name,
+                        to add the replicates to instead of saving them.
+
+        Returns:
+            Nothing.
+        """
+
+        species_names = list(species.keys())
+        initial_conditions = np.tile(
+                        self.extract_species_initial_conditions(species),
+                        (self.nb_replicates, 1))
+        chunk_size = max(-(-self.output.chunk_size // self.nb_replicates),
+                         const.LOCKSTEP_MIN_CHUNK_SIZE)
+        output = replace(self.output,
+                         chunk_size=min(chunk_size, self.output.chunk_size))
+        rng = np.random.default_rng(self.seed)
+        for step in self.configuration[const.YAML_EXPERIMENT_PROTOCOL]:
+            protocol = step[1] # Skip step name
+            species_values, parameters_values = self.load_perturbations(
+                                protocol, species, parameters)
+            for p_name, p_value in species_values.items():
+                initial_conditions[:, species_names.index(p_name)] = p_value
+            self.apply_step_parameters(model, parameters, parameters_values)
+            if self.verbose:
+                print("SPARCED VERBOSE: "
+                    + f"{protocol[const.YAML_PROTOCOL_NAME]} of "
+                    + f"{self.nb_replicates} cells is now ready to run.\n")
+            simulations = [SparcedSimulation(
                                 protocol[const.YAML_PROTOCOL_NAME],
                                 self.output_directory,
                                 protocol[const.YAML_PROTOCOL_DURATION],
                                 protocol[const.YAML_PROTOCOL_IS_DETERMINISTIC],
-                                cell_number,
-                                self.verbose)
-                perturbations_file = append_subfolder(
-                                self.path,
-                                protocol[const.YAML_PROTOCOL_PERTURBATIONS])
-                species = self.apply_perturbations(
-                                species,
-                                perturbations_file,
-                                protocol[const.YAML_PROTOCOL_PERTURBATIONS_ID])
-                initial_conditions = self.extract_species_initial_conditions(species)
-                model.setInitialStates(initial_conditions)
-                if self.verbose:
-                    print("SPARCED VERBOSE: "
-                        + f"{protocol[const.YAML_PROTOCOL_NAME]} "
-                        + f"n°{cell_number} is now ready to run.\n")
-                species = simulation.run(model, self.sbml_path, initial_conditions, self.simulation_files)
-                del simulation
-            cell_number += 1
+                                cell + 1,
+                                self.verbose,
+                                output=output,
+                                statistics=statistics[
+                                        protocol[const.YAML_PROTOCOL_NAME]]
+                                if statistics is not None else None)
+                           for cell in range(self.nb_replicates)]
+            with ExitStack() as writers:
+                species_levels, genes_levels, time = RunPopulation(
+                                protocol[const.YAML_PROTOCOL_IS_DETERMINISTIC],
+                                protocol[const.YAML_PROTOCOL_DURATION],
+                                initial_conditions,
+                                model,
+                                plan,
+                                rng,
+                                self.threads,
+                                [writers.enter_context(
+                                        simulation.open_writer(model))
+                                 for simulation in simulations],
+                                self.output.stride,
+                                self.output.times)
+            # Next protocol step starts where this one ended
+            initial_conditions = species_levels
+
+    def spawn_seeds(self) -> list[np.random.SeedSequence]:
+        """Spawn one independent seed sequence per replicate
+
+        Returns:
+            The replicates' seed sequences, all derived from the
+            experiment's seed.
+        """
+
+        return(np.random.SeedSequence(self.seed).spawn(self.nb_replicates))
 
     def sanitize_nb_replicates(self, nb_replicates: int) -> int:
         """Sanitize number of replicates
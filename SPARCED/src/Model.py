@@ -4,11 +4,11 @@
 import os
 import sys
 
-import numpy as np
-
 import constants as const
-from utils.data_handling import load_configuration_file, load_input_data_file
+from utils.data_handling import load_configuration_file
 from utils.files_handling import append_subfolder, check_path_existence
+from utils.input_tables import (COMPARTMENTS_SCHEMA, InputTable,
+                                load_input_table)
 
 # CUSTOM ERRORS
 
@@ -50,8 +50,8 @@ class Model:
                                compilation.
         compilation_files: A dictionnary containing all the input files
                            required for compilation.
-        compartments: An array containing the compartments names,
-                      volumes and annotations.
+        compartments: A typed table containing the compartments
+                      names, volumes and annotations.
 
         Methods:
             load_configuration()
@@ -121,7 +121,7 @@ class Model:
                     const.YAML_EXPERIMENT_NAME
                 ]
 
-    def load_compartments(self, path: str | os.PathLike) -> np.ndarray:
+    def load_compartments(self, path: str | os.PathLike) -> InputTable:
         """Load compartments from a PEtab file
 
         Note:
@@ -136,12 +136,12 @@ class Model:
                   structured as specified in the __Note__.
 
         Returns;
-            An array representing contents of the input compartments
-            file.
+            A typed table with the name, volume and annotation columns
+            (see utils.input_tables).
         """
 
         check_path_existence(path)
-        compartments = load_input_data_file(path)
+        compartments = load_input_table(path, COMPARTMENTS_SCHEMA)
         return compartments
 
     def load_files_path(
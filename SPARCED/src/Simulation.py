@@ -3,15 +3,14 @@
 
 import os
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import numpy as np
-import pandas as pd
-
-import constants as const
 
 from simulation.RunSPARCED import RunSPARCED
-from utils.combine_results import combine_results
 from utils.files_handling import *
+from utils.population_statistics import PopulationStatistics, StatisticsWriter
+from utils.results_writer import (OutputOptions, ResultsWriter,
+                                  build_results_columns, get_results_writer)
 
 
 # SIMULATION
@@ -24,54 +23,69 @@ class Simulation:
     is_deterministic: bool = True
     number: int = 0
     verbose: bool = False
+    output: OutputOptions = field(default_factory=OutputOptions)
+    statistics: PopulationStatistics | None = None
 
-    def run(self, model, sbml_file: str, initial_conditions, simulation_files: dict[str, str]
-            ) -> np.ndarray:
+    def run(self, model, initial_conditions, plan: dict[str, np.ndarray],
+            rng: np.random.Generator) -> np.ndarray:
         """
         Run the simulation
+
+        Arguments:
+            model: The open model file.
+            initial_conditions: The species initial concentrations.
+            plan: The SGE plan, loaded once per experiment (see
+                  simulation.plan).
+            rng: The random number generator of the replicate.
+
+        Returns:
+            The species concentrations at the last timepoint.
         """
 
         # TODO: handle the case when no simulation files are provided
-        # TODO: pass content of those simulation files, we could load this only once
-        genes_file = pd.read_csv(simulation_files[const.YAML_GENES_REGULATION], header=0, index_col=0, sep='\t')
-        omics_file = pd.read_csv(simulation_files[const.YAML_OMICS_DATA], header=0, index_col=0, sep='\t')
-        species_levels, genes_levels, time = RunSPARCED(self.is_deterministic,
-                                                        self.duration,
-                                                        initial_conditions,
-                                                        [],
-                                                        sbml_file,
-                                                        model,
-                                                        genes_file,
-                                                        omics_file)
-        if self.verbose:
-            print(f"SPARCED VERBOSE: {self.name} n°{self.number} " +
-                   "is now over. Saving results, do not exit.\n")
-        self.save(model, species_levels, genes_levels, time)
+        # Results are streamed to the output file while simulating
+        with self.open_writer(model) as writer:
+            species_levels, genes_levels, time = RunSPARCED(
+                                                    self.is_deterministic,
+                                                    self.duration,
+                                                    initial_conditions,
+                                                    [],
+                                                    model,
+                                                    plan,
+                                                    rng,
+                                                    writer,
+                                                    self.output.stride,
+                                                    self.output.times)
+            if self.verbose:
+                print(f"SPARCED VERBOSE: {self.name} n°{self.number} " +
+                       "is now over. Saving results, do not exit.\n")
         if self.verbose:
             print(f"SPARCED VERBOSE: {self.name} n°{self.number} " +
                    "is successfully saved.\n")
         return(species_levels)
 
-    def save(self, model, species_levels: np.ndarray,
-             genes_levels: np.ndarray, time: np.ndarray) -> None:
+    def open_writer(self, model) -> ResultsWriter:
         """
-        Save simulation output to a csv file
+        Open the output file of the simulation
+
+        Note:
+            With population statistics, results are added to them
+            instead of being written to a file.
 
         Arguments:
             model: The open model file.
-            species_levels: The species concentrations to save.
-            genes_levels: The genes concentrations to save.
-            time: The timepoints corresponding to the measures.
 
         Returns:
-            Nothing.
+            The results writer.
         """
 
-        file_name = self.name + '_' + str(self.number) + const.DEFAULT_OUTPUT_FILE_EXTENSION
-        if not Path.exists(self.output_directory):
-            Path(self.output_directory).mkdir(parents=True)
+        columns = build_results_columns(model.getStateIds())
+        selection = self.output.build_selection(columns)
+        if self.statistics is not None:
+            return(StatisticsWriter(self.statistics, columns, self.output,
+                                    selection))
+        writer = get_results_writer(self.output.format)
+        file_name = self.name + '_' + str(self.number) + writer.extension
+        Path(self.output_directory).mkdir(parents=True, exist_ok=True)
         file_path = append_subfolder(self.output_directory, file_name)
-        simulation_results = combine_results(model,
-                                             species_levels, genes_levels, time)
-        simulation_results.to_csv(file_path, sep='\t')
-
+        return(writer(file_path, columns, self.output, selection))
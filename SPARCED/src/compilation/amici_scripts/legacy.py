@@ -13,12 +13,11 @@ def define_observables(f_observables, compartments, species):
     """
 
     obs_mat = pd.read_csv(f_observables, sep='\t', header=0, index_col=0)
-    vol_cytoplasm = float(compartments[compartments[:,0]=='Cytoplasm', 1])
+    volumes = dict(zip(compartments["name"], compartments["volume"]))
+    vol_cytoplasm = volumes['Cytoplasm']
 
-    species_names = np.array([species[i][0] for i in range(1, len(species))])
-    vol_species = np.array([species[i][1] for i in range(1, len(species))])
-    vol_species = [float(compartments[compartments[:,0]==vol_species[i], 1][0] \
-                   for i in range(len(vol_species)))]
+    species_names = species["name"]
+    vol_species = [volumes[compartment] for compartment in species["compartment"]]
     vol_species = pd.Series(vol_species, index=species_names)
 
     formula_obs = []
@@ -6,20 +6,27 @@ from compilation.antimony_scripts.definitions import (
         define_compartments,
         define_species,
         define_units)
+from compilation.antimony_scripts.gene_expression import (
+        read_gene_expression,
+        write_gene_expression)
 from compilation.antimony_scripts.initial_conditions import (
         set_compartments_ic,
         set_reactions_ic,
         set_species_ic)
 from compilation.antimony_scripts.reactions import (
+        read_reactions,
         write_reactions)
 
 __all__ = [
             'define_compartments',
             'define_species',
             'define_units',
+            'read_gene_expression',
+            'read_reactions',
             'set_compartments_ic',
             'set_reactions_ic',
             'set_species_ic',
+            'write_gene_expression',
             'write_reactions'
           ]
 
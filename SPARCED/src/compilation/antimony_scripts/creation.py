@@ -3,16 +3,33 @@
 
 import os
 
-import numpy as np
-
 import compilation.antimony_scripts as antimony_script
 import constants as const
 from Model import Model as SparcedModel
-from utils.data_handling import load_input_data_file
 from utils.files_handling import append_subfolder
+from utils.input_tables import SPECIES_SCHEMA, InputTable, load_input_table
+
 
+def build_antimony_file_path(
+    model_name: str, model_path: str | os.PathLike
+) -> str | os.PathLike:
+    """Build the path of a model's Antimony file
+
+    Arguments:
+        model_name: The name of the model.
+        model_path: The path towards the model's directory.
+
+    Returns:
+        The path of the Antimony file.
+    """
 
-def antimony_create_file(model: SparcedModel) -> (str, np.ndarray):
+    antimony_file_name = (
+        const.ANTIMONY_FILE_PREFIX + model_name + const.ANTIMONY_FILE_SUFFIX
+    )
+    return append_subfolder(model_path, antimony_file_name)
+
+
+def antimony_create_file(model: SparcedModel) -> (str, InputTable):
     """Generate an Antimony file corresponding to a SparcedModel.Model
     object
 
@@ -23,17 +40,14 @@ def antimony_create_file(model: SparcedModel) -> (str, np.ndarray):
         Antimony_file_path & species.
     """
 
-    antimony_file_name = (
-        const.ANTIMONY_FILE_PREFIX + model.name + const.ANTIMONY_FILE_SUFFIX
-    )
-    antimony_file_path = append_subfolder(model.path, antimony_file_name)
+    antimony_file_path = build_antimony_file_path(model.name, model.path)
     species = antimony_write_file(model, antimony_file_path)
     return (antimony_file_path, species)
 
 
 def antimony_write_file(
     model: SparcedModel, antimony_file_path: str | os.PathLike
-) -> np.ndarray:
+) -> InputTable:
     """Generate an Antimony file
 
     Note:
@@ -44,7 +58,7 @@ def antimony_write_file(
         antimony_file_path: The path of the Antimony file to write in.
 
     Returns:
-        The content of the species file.
+        The species input table.
     """
 
     with antimony_file_path.open(mode="w") as file:
@@ -55,8 +69,8 @@ def antimony_write_file(
         # Compartments
         antimony_script.define_compartments(file, model.compartments)
         # Species
-        species = load_input_data_file(
-            model.compilation_files[const.YAML_SPECIES]
+        species = load_input_table(
+            model.compilation_files[const.YAML_SPECIES], SPECIES_SCHEMA
         )
         antimony_script.define_species(file, species)
         # Reactions
@@ -65,6 +79,22 @@ def antimony_write_file(
             model.compilation_files[const.YAML_RATELAWS],
             model.compilation_files[const.YAML_OUTPUT_PARAMETERS],
         )
+        # Gene expression (Optional)
+        if model.compilation_config.get(const.YAML_COMPILATION_GENE_EXPRESSION):
+            if not hasattr(model, "simulation_files"):
+                raise RuntimeError(
+                    "Embedding gene expression requires the genes "
+                    + "regulation and omics data simulation files."
+                )
+            ge_names, ge_values = antimony_script.write_gene_expression(
+                file,
+                model.simulation_files[const.YAML_GENES_REGULATION],
+                model.simulation_files[const.YAML_OMICS_DATA],
+                species,
+                model.compartments,
+            )
+            param_names += ge_names
+            param_values += ge_values
         # Initial conditions
         antimony_script.set_compartments_ic(file, model.compartments)
         antimony_script.set_species_ic(file, species)
@@ -3,57 +3,43 @@
 
 from typing import IO
 
-import numpy as np
-
 import constants as const
+from utils.input_tables import InputTable
 
 
-def define_compartments(file: IO[str], compartments: np.ndarray) -> None:
+def define_compartments(file: IO[str], compartments: InputTable) -> None:
     """Write compartments names in the given Antimony file
 
-    Note:
-        First row is considered as a header, and hence it is skipped.
-        First column of the array should contain the compartments names.
-        Second column of the array should contain the compartments volumes.
-
     Arguments:
         file: The open Antimony file.
-        compartments: Content of the input compartments file structured
-                      as specified in the __Note__ section.
+        compartments: The compartments input table, with a name column.
 
     Returns:
         Nothing.
     """
 
     file.write("# Compartments:\n")
-    for c in range(1, len(compartments)):
-        file.write(f"Compartment {compartments[c][0]}; ")
+    for name in compartments["name"]:
+        file.write(f"Compartment {name}; ")
     file.write("\n")
 
 
-def define_species(file: IO[str], species: np.ndarray) -> None:
+def define_species(file: IO[str], species: InputTable) -> None:
     """Write species names and affiliated compartments in the given
        Antimony file
 
-    Note:
-        First row is considered as a header, and hence it is skipped.
-        First column of the array should contain species names.
-        Second column of the array should contain species compartments.
-
     Argurments:
         file: The open Antimony file.
-        species: Content of the input species file structured as
-                 specified in the __Note__ section.
+        species: The species input table, with name and compartment
+                 columns.
 
     Returns:
         Nothing.
     """
 
     file.write("# Species:\n")
-    for i, value in enumerate(species[1:]):
-        # Name is stored in value[0]
-        # Compartment is stored in value[1]
-        file.write(f"Species {value[0]} in {value[1]};\n")
+    for name, compartment in zip(species["name"], species["compartment"]):
+        file.write(f"Species {name} in {compartment};\n")
     file.write("\n")
 
 
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+from typing import IO
+
+import numpy as np
+import pandas as pd
+
+import constants as const
+from simulation.regulation import COOPERATIVE_GENES
+from utils.input_tables import InputTable
+
+
+def _read_hill_terms(regulation: pd.Series) -> (list[str], list[str]):
+    """Build the activators and repressors Hill terms of a gene
+
+    Note:
+        Each regulation is written under the format "nH; kH", where a
+        positive Hill coefficient nH stands for an activator and a
+        negative one for a repressor. Half-maximal concentrations kH
+        are given in nM, the same unit as the regulators.
+
+    Arguments:
+        regulation: The row of the genes regulation file corresponding
+                    to the gene, indexed by regulators names.
+
+    Returns:
+        A tuple with the activators terms and the repressors terms. An
+        empty string stands for a regulator that does not act upon the
+        gene.
+    """
+
+    activators = []
+    repressors = []
+    for regulator, value in regulation.items():
+        activator = ""
+        repressor = ""
+        value = str(value)
+        separator = value.find(";")
+        if separator > 0:
+            n_hill = np.double(value[:separator])
+            k_hill = np.double(value[separator + 1:])
+            term = f"({regulator}/{k_hill:.6e})^{abs(n_hill):.6e}"
+            if n_hill > 0:
+                activator = term
+            else:
+                repressor = term
+        activators.append(activator)
+        repressors.append(repressor)
+    return (activators, repressors)
+
+
+def _write_hill_function(
+    activators: list[str], repressors: list[str], cooperative: bool
+) -> str:
+    """Write the transcription induction term of a gene
+
+    Arguments:
+        activators: The activators Hill terms of the gene.
+        repressors: The repressors Hill terms of the gene.
+        cooperative: Whether the gene requires both of its first two
+                     activators (AP1*cMYC exception, see
+                     simulation.regulation).
+
+    Returns:
+        The Hill function formula.
+    """
+
+    if cooperative:
+        factors = [
+            f"({term}/(1 + {term}))" for term in activators[:2] if term
+        ]
+        if len(factors) < 2:
+            return "0"
+        return "*".join(factors)
+    active = [term for term in activators if term]
+    inactive = [term for term in repressors if term]
+    if not active:
+        return "0"
+    induction = " + ".join(active)
+    denominator = " + ".join(["1", induction] + inactive)
+    return f"({induction})/({denominator})"
+
+
+def read_gene_expression(
+    f_genes_regulation: str | os.PathLike,
+    f_omics: str | os.PathLike,
+    species: InputTable,
+    compartments: InputTable,
+) -> (list[tuple[str, list[str], list[str], str]], list[str], list[float]):
+    """Build the deterministic gene expression reactions
+
+    Note:
+        Transcription and mRNA degradation are written as reactions
+        based on the deterministic equations of the gene expression
+        module, where the number of active genes is constant. All the
+        reactions are multiplied by a switch parameter, so that they
+        can be turned off at runtime for stochastic simulations.
+        mRNAs are the species whose name starts with the mRNA prefix,
+        in the same order as the genes of the omics data file.
+
+    Arguments:
+        f_genes_regulation: The genes regulation input file.
+        f_omics: The omics data input file.
+        species: The species input table.
+        compartments: The compartments input table.
+
+    Returns:
+        A tuple with the reactions, each structured as (ID, reactants,
+        products, rate formula), the parameters' names list and the
+        parameters' values list.
+    """
+
+    genes_regulation = pd.read_csv(
+        f_genes_regulation, header=0, index_col=0, sep="\t"
+    )
+    omics = pd.read_csv(f_omics, header=0, index_col=0, sep="\t")
+    volumes = dict(zip(compartments["name"], compartments["volume"]))
+    mrnas = [row for row in zip(species["name"], species["compartment"])
+             if row[0].startswith(const.MRNA_PREFIX)]
+    if len(mrnas) != len(omics.index):
+        raise RuntimeError(
+            f"Found {len(mrnas)} mRNA species for {len(omics.index)} "
+            + "genes, cannot embed gene expression."
+        )
+    cooperative_genes = range(len(omics.index))[COOPERATIVE_GENES]
+    reactions = []
+    param_names = [const.GENE_EXPRESSION_SWITCH]
+    param_values = [1.0]
+    for gene_nb, (mrna, gene) in enumerate(zip(mrnas, omics.index)):
+        name = mrna[0]
+        compartment = mrna[1]
+        # Molecules per cell to nM in the mRNA compartment
+        mpc2nm = 1.0e9 / (volumes[compartment] * const.AVOGADRO)
+        omics_row = omics.loc[gene].values
+        genes_nb, k_inactivation, k_activation = omics_row[[0, 2, 3]]
+        active_genes = (k_activation * genes_nb
+                        / (k_inactivation + k_activation))
+        activators, repressors = _read_hill_terms(genes_regulation.loc[gene])
+        hills = _write_hill_function(
+            activators, repressors, gene_nb in cooperative_genes
+        )
+        switch = const.GENE_EXPRESSION_SWITCH
+        reactions.append(
+            (
+                f"vTC_{name}",
+                [],
+                [name],
+                f"{switch}*xgac_{name}"
+                + f"*(kTCleak_{name} + kTCmaxs_{name}*{hills})"
+                + f"*{mpc2nm:.6e}*{compartment}",
+            )
+        )
+        reactions.append(
+            (
+                f"vTCd_{name}",
+                [name],
+                [],
+                f"{switch}*kTCd_{name}*{name}*{compartment}",
+            )
+        )
+        param_names += [f"xgac_{name}", f"kTCleak_{name}",
+                        f"kTCmaxs_{name}", f"kTCd_{name}"]
+        param_values += [active_genes, omics_row[4], omics_row[5],
+                         omics_row[6]]
+    return (reactions, param_names, param_values)
+
+
+def write_gene_expression(
+    file: IO[str],
+    f_genes_regulation: str | os.PathLike,
+    f_omics: str | os.PathLike,
+    species: InputTable,
+    compartments: InputTable,
+) -> (list[str], list[float]):
+    """Write deterministic gene expression reactions into an Antimony
+       file
+
+    Note:
+        See read_gene_expression.
+
+    Arguments:
+        file: The open Antimony file.
+        f_genes_regulation: The genes regulation input file.
+        f_omics: The omics data input file.
+        species: The species input table.
+        compartments: The compartments input table.
+
+    Returns:
+        A tuple with the parameters' names list and the parameters'
+        values list.
+    """
+
+    reactions, param_names, param_values = read_gene_expression(
+        f_genes_regulation, f_omics, species, compartments
+    )
+    file.write("# Gene expression:\n")
+    for reaction_id, reactants, products, rate in reactions:
+        file.write(
+            f"{reaction_id}: {' + '.join(reactants)} => "
+            + f"{' + '.join(products)}; {rate};\n"
+        )
+    file.write("\n")
+    return (param_names, param_values)
@@ -5,28 +5,25 @@ from typing import IO
 
 import numpy as np
 
+from utils.input_tables import InputTable
 
-def set_compartments_ic(file: IO[str], compartments: dict[str, str]) -> None:
-    """Write compartments initial conditions in the given Antimony file
 
-    Note:
-        First row is considered as a header, and hence it is skipped.
-        First column of the array should contain compartments name.
-        Second column of the array should contain compartments concentrations.
+def set_compartments_ic(file: IO[str], compartments: InputTable) -> None:
+    """Write compartments initial conditions in the given Antimony file
 
     Arguments:
         file: The open Antimony file.
-        compartments: Content of the input compartments file structured
-                      as specified in the __Note__ section.
+        compartments: The compartments input table, with name and volume
+                      columns.
 
     Returns:
         Nothing.
     """
 
     file.write("# Compartments initialization:\n")
-    for i, value in enumerate(compartments[1:]):
-        file.write(f"{value[0]} = {np.double(value[1]):.6e};\n")
-        file.write(f"{value[0]} has volume;\n")
+    for name, volume in zip(compartments["name"], compartments["volume"]):
+        file.write(f"{name} = {volume:.6e};\n")
+        file.write(f"{name} has volume;\n")
 
     file.write("\n")
 
@@ -56,23 +53,20 @@ def set_reactions_ic(
     file.write("\n")
 
 
-def set_species_ic(file: IO[str], species: np.ndarray) -> None:
+def set_species_ic(file: IO[str], species: InputTable) -> None:
     """Write species initial concentrations in the given Antimony file
 
-    Note:
-        First row is considered as a header, and hence it is skipped.
-        First column of the array should contain species names.
-        Third column of the array should contain species concentrations.
-
     Arguments:
         file: The open Antimony file.
-        species: Content of the input species file.
+        species: The species input table, with name and
+                 initial_concentration columns.
 
     Returns:
         Nothing.
     """
 
     file.write("# Species initialization:\n")
-    for i, value in enumerate(species[1:]):
-        file.write(f"{value[0]} = {np.double(value[2]):.6e};\n")
+    for name, concentration in zip(species["name"],
+                                   species["initial_concentration"]):
+        file.write(f"{name} = {concentration:.6e};\n")
     file.write("\n")
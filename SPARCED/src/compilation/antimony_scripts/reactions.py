@@ -7,7 +7,16 @@ from typing import IO
 
 import numpy as np
 import pandas as pd
-from utils.data_handling import load_input_data_file
+
+from utils.input_tables import RATELAWS_SCHEMA, InputTable, load_input_table
+
+# Identifiers written k<name><number>_<position> or k<name><number>
+PARAMETER_PATTERN = re.compile(r"(?<!\w)k[A-Za-z_]*?\d*(?:_(\d+))?(?!\w)")
+SINGLE_PARAMETER_PATTERN = re.compile(r"k[A-Za-z_]*\d*")
+# Parameters of the reactions, as exported in the parameters file
+PARAMETERS_DTYPE = np.dtype(
+    [("name", object), ("value", np.float64), ("rxn", object), ("idx", int)]
+)
 
 
 def _read_reactions_species(reaction, formula):
@@ -45,94 +54,191 @@ def _read_reactions_species(reaction, formula):
     return (formula, total_reactants, total_products)
 
 
-def write_reactions(
-    file: IO[str],
-    f_ratelaws: str | os.PathLike,
-    f_output_parameters: str | os.PathLike,
-) -> None:
-    """Write SparcedModel.Model reactions into an Antimony file
+def rewrite_ratelaw(formula: str, reaction_nb: int, nb_params: int) -> str:
+    """Rename the parameters of a ratelaw after its reaction number
+
+    Note:
+        The formula is tokenized in a single pass, and each identifier
+        written as k<name><number>_<j> (or k<name><number> for a single
+        parameter) is renamed k<reaction_nb>_<j>, its position among
+        the reaction's parameters. Other identifiers, such as species,
+        are left as is.
 
     Arguments:
-        f_antimony: The open Antimony file.
-        model: A SpacedModel.Model.
+        formula: The ratelaw formula.
+        reaction_nb: The reaction's number, counted from 1.
+        nb_params: The number of parameters of the reaction.
 
     Returns:
-        A tuple with the parameters' names list and the parameters'
-        values list.
+        The rewritten formula.
+    """
+
+    def rename(match: re.Match) -> str:
+        if nb_params == 1:
+            if SINGLE_PARAMETER_PATTERN.fullmatch(match.group()):
+                return f"k{reaction_nb}_1"
+        elif match.group(1) and 1 <= int(match.group(1)) <= nb_params:
+            return f"k{reaction_nb}_{int(match.group(1))}"
+        return match.group()
+
+    return PARAMETER_PATTERN.sub(rename, formula)
+
+
+def read_reactions(
+    f_ratelaws: str | os.PathLike, f_output_parameters: str | os.PathLike
+) -> (list[tuple[str, list[str], list[str], str]], list[str], list[float]):
+    """Read the reactions of a ratelaws file
+
+    Note:
+        This process also creates a parameters file as an output.
+
+    Arguments:
+        f_ratelaws: The ratelaws input file.
+        f_output_parameters: The parameters output file.
+
+    Returns:
+        A tuple with the reactions, each structured as (ID, reactants,
+        products, rate formula), the parameters' names list and the
+        parameters' values list.
     """
 
-    file.write("# Reactions:\n")
     # Ratelaws
-    ratelaw_sheet = load_input_data_file(f_ratelaws)
-    ratelaws = np.array(
-        [line[1:] for line in ratelaw_sheet[1:]], dtype="object"
-    )
-    ratelaws_ids = np.array(
-        [line[0] for line in ratelaw_sheet[1:]], dtype="object"
-    )
-    # Parameters
-    param_names = []
-    param_values = []
-    param_reaction_ids = []
-    param_nbs = []
-    for row_nb, reaction in enumerate(ratelaws):
+    ratelaws = load_input_table(f_ratelaws, RATELAWS_SCHEMA)
+    has_params = ~np.isnan(ratelaws.extra)
+    nb_params = has_params.sum(axis=1)
+    reactions = []
+    rows = []
+    mass_action = []
+    for row_nb, (reaction_id, compartment, species, ratelaw) in enumerate(
+        zip(
+            ratelaws["name"],
+            ratelaws["compartment"],
+            ratelaws["reaction"],
+            ratelaws["ratelaw"],
+        )
+    ):
         # Read reaction's species (reactants and products)
         formula = f"k{row_nb + 1}*"
         formula, reactants, products = _read_reactions_species(
-            reaction[1], formula
+            species, formula
         )
         # Read reaction's rate
         # Skip if no reactants nor products
         if reactants == [] and products == []:
             continue
+        rows.append(row_nb)
         # Mass-action formula
-        if "k" not in reaction[2]:
+        if "k" not in ratelaw:
             formula = formula[:-1]
-            param_names.append(f"k{row_nb+1}")
-            param_values.append(np.double(reaction[2]))
-            param_reaction_ids.append(ratelaws_ids[row_nb])
-            param_nbs.append(int(0))
+            mass_action.append(True)
         # Specified formula (non mass-action)
         else:
-            formula = reaction[2]
-            params = pd.to_numeric(reaction[3:], errors="coerce")
-            params = params[~np.isnan(params)]
-            j = 1
-            if len(params) == 1:
-                param_names.append(f"k{row_nb + 1}_{j}")
-                param_values.append(float(reaction[j + 2]))
-                param_reaction_ids.append(ratelaws_ids[row_nb])
-                param_nbs.append(int(0))
-                # Search for pattern matches
-                # k - non numerical character - numerical character
-                pattern = "k\D*\d*"
-                compiled = re.compile(pattern)
-                matches = compiled.finditer(formula)
-                for m in matches:
-                    formula = formula.replace(m.group(), param_names[-1])
-            else:
-                for q, p in enumerate(params):
-                    param_names.append(f"k{row_nb + 1}_{j}")
-                    param_values.append(float(reaction[j + 2]))
-                    param_reaction_ids.append(ratelaws_ids[row_nb])
-                    param_nbs.append(q)
-                    pattern = f"k(\D*)\d*_{j}"
-                    compiled = re.compile(pattern)
-                    matches = compiled.finditer(formula)
-                    for m in matches:
-                        formula = formula.replace(m.group(), param_names[-1])
-                    j += 1
-        file.write(
-            f"{ratelaws_ids[row_nb]}: "
-            + f"{' + '.join(reactants)} => {' + '.join(products)}; "
-            + f"({formula})*{reaction[0]};\n"
+            formula = rewrite_ratelaw(ratelaw, row_nb + 1, nb_params[row_nb])
+            mass_action.append(False)
+        reactions.append(
+            (
+                reaction_id,
+                reactants,
+                products,
+                f"({formula})*{compartment}",
+            )
         )
+    parameters = build_parameters(
+        ratelaws, np.array(rows, dtype=int), np.array(mass_action, dtype=bool)
+    )
     # Export parameters for each reaction,
     # with corresponding order within the ratelaw and its value
     params_all = pd.DataFrame(
-        {"value": param_values, "rxn": param_reaction_ids, "idx": param_nbs},
-        index=param_names,
+        {
+            "value": parameters["value"],
+            "rxn": parameters["rxn"],
+            "idx": parameters["idx"],
+        },
+        index=parameters["name"],
     )
     params_all.to_csv(f_output_parameters, sep="\t", header=True, index=True)
+    return (reactions, parameters["name"].tolist(), parameters["value"].tolist())
+
+
+def build_parameters(
+    ratelaws: InputTable, rows: np.ndarray, mass_action: np.ndarray
+) -> np.ndarray:
+    """Gather the parameters of the given reactions
+
+    Note:
+        A mass-action reaction has one parameter k<reaction_nb>, whose
+        value is its ratelaw. The parameters of other reactions are
+        named k<reaction_nb>_<j> and valued from the trailing columns
+        of their row, in order.
+
+    Arguments:
+        ratelaws: The ratelaws input table.
+        rows: The rows of the reactions, in order.
+        mass_action: Whether each reaction follows the mass-action law.
+
+    Returns:
+        A structured array of PARAMETERS_DTYPE, one record per
+        parameter.
+    """
+
+    nb_columns = ratelaws.extra.shape[1]
+    values = np.full((len(rows), max(nb_columns, 1)), np.nan)
+    values[:, :nb_columns] = ratelaws.extra[rows]
+    has_params = ~np.isnan(values)
+    has_params[mass_action] = False
+    has_params[mass_action, 0] = True
+    values[mass_action, 0] = ratelaws["ratelaw"][rows[mass_action]].astype(
+        np.float64
+    )
+    nb_params = has_params.sum(axis=1)
+    parameters = np.empty(nb_params.sum(), dtype=PARAMETERS_DTYPE)
+    reaction_rows = np.repeat(rows, nb_params)
+    # Position of each parameter among its reaction's ones
+    starts = np.repeat(np.cumsum(nb_params) - nb_params, nb_params)
+    parameters["idx"] = np.arange(len(parameters)) - starts
+    parameters["value"] = values[has_params]
+    parameters["rxn"] = ratelaws["name"][reaction_rows]
+    is_mass_action = np.repeat(mass_action, nb_params)
+    parameters["name"] = [
+        f"k{row + 1}" if single else f"k{row + 1}_{idx + 1}"
+        for row, idx, single in zip(
+            reaction_rows.tolist(),
+            parameters["idx"].tolist(),
+            is_mass_action.tolist(),
+        )
+    ]
+    return parameters
+
+
+def write_reactions(
+    file: IO[str],
+    f_ratelaws: str | os.PathLike,
+    f_output_parameters: str | os.PathLike,
+) -> (list[str], list[float]):
+    """Write SparcedModel.Model reactions into an Antimony file
+
+    Note:
+        This process also creates a parameters file as an output.
+
+    Arguments:
+        file: The open Antimony file.
+        f_ratelaws: The ratelaws input file.
+        f_output_parameters: The parameters output file.
+
+    Returns:
+        A tuple with the parameters' names list and the parameters'
+        values list.
+    """
+
+    file.write("# Reactions:\n")
+    reactions, param_names, param_values = read_reactions(
+        f_ratelaws, f_output_parameters
+    )
+    for reaction_id, reactants, products, rate in reactions:
+        file.write(
+            f"{reaction_id}: "
+            + f"{' + '.join(reactants)} => {' + '.join(products)}; "
+            + f"{rate};\n"
+        )
     file.write("\n")
     return (param_names, param_values)
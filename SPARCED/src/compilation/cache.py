@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import importlib.metadata
+import json
+import os
+from pathlib import Path
+
+import libsbml
+
+import constants as const
+from _version import __version__
+from utils.files_handling import append_subfolder, hash_files
+
+# Scripts whose changes alter each stage's artifacts
+COMPILATION_SCRIPTS = Path(__file__).parent
+INPUT_TABLES_SCRIPT = COMPILATION_SCRIPTS.parent / "utils" / "input_tables.py"
+STAGE_SCRIPTS = {
+    const.COMPILATION_STAGE_ANTIMONY: sorted(
+        (COMPILATION_SCRIPTS / "antimony_scripts").glob("*.py")
+    )
+    + [INPUT_TABLES_SCRIPT],
+    const.COMPILATION_STAGE_SBML: [
+        COMPILATION_SCRIPTS / "conversion_scripts" / "antimony_to_sbml.py",
+        COMPILATION_SCRIPTS / "sbml_scripts" / "annotations.py",
+        # libSBML backend, sharing the Antimony backend's input readers
+        COMPILATION_SCRIPTS / "sbml_scripts" / "construction.py",
+        COMPILATION_SCRIPTS / "antimony_scripts" / "gene_expression.py",
+        COMPILATION_SCRIPTS / "antimony_scripts" / "reactions.py",
+        INPUT_TABLES_SCRIPT,
+    ],
+    const.COMPILATION_STAGE_AMICI: [
+        COMPILATION_SCRIPTS / "conversion_scripts" / "sbml_to_amici.py",
+    ],
+}
+# Python packages each stage depends on
+STAGE_TOOLS = {
+    const.COMPILATION_STAGE_ANTIMONY: [],
+    const.COMPILATION_STAGE_SBML: ["antimony", "python-libsbml"],
+    const.COMPILATION_STAGE_AMICI: ["amici"],
+}
+
+
+def build_compilation_cache_path(
+    model_name: str, model_path: str | os.PathLike
+) -> str | os.PathLike:
+    """Build the path of a model's compilation cache file
+
+    Arguments:
+        model_name: The name of the model.
+        model_path: The path towards the model's directory.
+
+    Returns:
+        The path of the compilation cache file.
+    """
+
+    cache_file_name = (
+        const.COMPILATION_CACHE_FILE_PREFIX
+        + model_name
+        + const.COMPILATION_CACHE_FILE_SUFFIX
+    )
+    return append_subfolder(model_path, cache_file_name)
+
+
+def load_compilation_cache(
+    model_name: str, model_path: str | os.PathLike
+) -> dict[str, str]:
+    """Load the keys of a model's last compiled stages
+
+    Arguments:
+        model_name: The name of the model.
+        model_path: The path towards the model's directory.
+
+    Returns:
+        A dictionnary structured as key: stage / value: key of the
+        stage's inputs, empty if the model was never compiled.
+    """
+
+    cache_path = build_compilation_cache_path(model_name, model_path)
+    if not cache_path.exists():
+        return {}
+    with cache_path.open() as cache_file:
+        return json.load(cache_file)
+
+
+def save_compilation_cache(
+    cache: dict[str, str], model_name: str, model_path: str | os.PathLike
+) -> None:
+    """Save the keys of a model's compiled stages
+
+    Arguments:
+        cache: A dictionnary structured as key: stage / value: key of
+               the stage's inputs.
+        model_name: The name of the model.
+        model_path: The path towards the model's directory.
+
+    Returns:
+        Nothing.
+    """
+
+    cache_path = build_compilation_cache_path(model_name, model_path)
+    with cache_path.open(mode="w") as cache_file:
+        json.dump(cache, cache_file, indent=2, sort_keys=True)
+
+
+def get_tool_version(package: str) -> str:
+    """Get the installed version of a Python package
+
+    Arguments:
+        package: The name of the package's distribution.
+
+    Returns:
+        The version, 'unknown' if the package is not installed.
+    """
+
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def compute_stage_key(
+    stage: str, inputs: list[str | os.PathLike], settings: str = ""
+) -> str:
+    """Compute the key of a compilation stage from everything it uses
+
+    Note:
+        The key covers the content of the stage's input files, the
+        SPARCED scripts and tools versions producing its artifacts, and
+        any other setting passed along.
+
+    Arguments:
+        stage: The name of the stage.
+        inputs: The paths of the stage's input files, in order.
+        settings: The other settings the stage depends on.
+
+    Returns:
+        The hexadecimal key of the stage.
+    """
+
+    versions = [f"sparced={__version__}"] + [
+        f"{tool}={get_tool_version(tool)}" for tool in STAGE_TOOLS[stage]
+    ]
+    return hash_files(
+        list(inputs) + STAGE_SCRIPTS[stage],
+        extra="\n".join([stage, settings] + versions),
+    )
+
+
+def hash_sbml_structure(sbml_file_path: str | os.PathLike) -> str:
+    """Compute a hash of an SBML model regardless of its parameters values
+
+    Note:
+        AMICI exposes every SBML parameter at runtime, so that models
+        differing only by their parameters values share the same AMICI
+        build. Their values are then set at runtime from the model's
+        metadata (see simulation.parameters). Antimony lists reactions
+        modifiers in no particular order, hence they are sorted.
+
+    Arguments:
+        sbml_file_path: The path towards the SBML file.
+
+    Returns:
+        The hexadecimal SHA-256 digest.
+    """
+
+    document = libsbml.SBMLReader().readSBML(str(sbml_file_path))
+    sbml_model = document.getModel()
+    for parameter in sbml_model.getListOfParameters():
+        parameter.unsetValue()
+    for reaction in sbml_model.getListOfReactions():
+        modifiers = sorted(
+            modifier.getSpecies() for modifier in reaction.getListOfModifiers()
+        )
+        while reaction.getNumModifiers():
+            reaction.removeModifier(0)
+        for species_id in modifiers:
+            reaction.createModifier().setSpecies(species_id)
+    structure = libsbml.writeSBMLToString(document)
+    return hashlib.sha256(structure.encode()).hexdigest()
+
+
+def is_stage_cached(
+    cache: dict[str, str],
+    stage: str,
+    key: str,
+    artifacts: list[str | os.PathLike],
+) -> bool:
+    """Tell whether a compilation stage can be skipped
+
+    Arguments:
+        cache: The keys of the last compiled stages.
+        stage: The name of the stage.
+        key: The key of the stage's current inputs.
+        artifacts: The paths of the files or folders the stage
+                   generates.
+
+    Returns:
+        True if the stage was last compiled with the same inputs and
+        its artifacts still exist.
+    """
+
+    return cache.get(stage) == key and all(
+        Path(artifact).exists() for artifact in artifacts
+    )
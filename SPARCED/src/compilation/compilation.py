@@ -5,14 +5,31 @@ import os
 import sys
 
 import constants as const
-from compilation.antimony_scripts.creation import antimony_create_file
+from compilation.amici_scripts.creation import amici_create_folder
+from compilation.antimony_scripts.creation import (
+    antimony_create_file,
+    build_antimony_file_path,
+)
+from compilation.cache import (
+    compute_stage_key,
+    hash_sbml_structure,
+    is_stage_cached,
+    load_compilation_cache,
+    save_compilation_cache,
+)
 from compilation.conversion_scripts import (
     convert_antimony_to_sbml,
     convert_sbml_to_amici,
+    select_constant_parameters,
 )
+from compilation.profiling import CompilationProfiler, measure_step
 from compilation.sbml_scripts.annotations import sbml_annotate_model
+from compilation.sbml_scripts.construction import sbml_create_file
+from compilation.sbml_scripts.creation import build_sbml_model_path
+from compilation.sbml_scripts.metadata import write_model_metadata
 from Model import Model as SparcedModel
 from utils.arguments import parse_args
+from utils.input_tables import SPECIES_SCHEMA, load_input_table
 
 
 def create_model(
@@ -68,38 +85,323 @@ def create_and_compile_model(
         config_name = args.yaml
     model = create_model(model_name, models_directory, config_name)
     verbose = args.verbose
-    compiled_model_path = compile_model(model, verbose)
+    compiled_model_path = compile_model(model, verbose, args.force)
     return (model, compiled_model_path)
 
 
-def compile_model(model: SparcedModel, verbose: bool) -> str | os.PathLike:
+def compile_model(
+    model: SparcedModel, verbose: bool, force: bool = False
+) -> str | os.PathLike:
     """Generate Antimony, SBML and AMICI models corresponding to a
     SparcedModel.Model object
 
+    Note:
+        Each stage is keyed by the content of its inputs (see
+        compilation.cache). Stages whose key did not change since the
+        last compilation are skipped and their artifacts reused. The
+        AMICI stage ignores parameters values, which are set at
+        runtime from the model's metadata (see
+        simulation.parameters.load_amici_model): changing rate
+        constants only regenerates the Antimony and SBML files. With
+        the libSBML backend, the SBML file is built directly from the
+        input files, without any Antimony file. The time and memory
+        taken by each step are saved in the model's compilation report
+        (see compilation.profiling).
+
     Arguments:
         model: A SparcedModel.model object.
         verbose: Verbose.
+        force: Compile every stage, even the unchanged ones.
 
     Returns:
-        Nothings.
+        A path towards the compiled model's folder.
     """
 
     if model is None:
         raise ValueError("No model provided.")
+    cache = {} if force else load_compilation_cache(model.name, model.path)
+    # Antimony (or libSBML) and SBML
+    reactions_inputs = [
+        model.compilation_files[const.YAML_COMPARTMENTS],
+        model.compilation_files[const.YAML_SPECIES],
+        model.compilation_files[const.YAML_RATELAWS],
+    ]
+    embed_gene_expression = bool(
+        model.compilation_config.get(const.YAML_COMPILATION_GENE_EXPRESSION)
+    )
+    if embed_gene_expression and hasattr(model, "simulation_files"):
+        reactions_inputs += [
+            model.simulation_files[const.YAML_GENES_REGULATION],
+            model.simulation_files[const.YAML_OMICS_DATA],
+        ]
+    backend = model.compilation_config.get(
+        const.YAML_COMPILATION_BACKEND, const.COMPILATION_BACKEND_ANTIMONY
+    )
+    # Unset, AMICI's default applies
+    conservation_laws = model.compilation_config.get(
+        const.YAML_COMPILATION_CONSERVATION_LAWS
+    )
+    if conservation_laws is not None:
+        conservation_laws = bool(conservation_laws)
+    profiler = CompilationProfiler(
+        model.name,
+        {
+            "backend": backend,
+            "embed_gene_expression": embed_gene_expression,
+            "conservation_laws": conservation_laws,
+            "force": force,
+        },
+    )
+    sbml_file_path = build_sbml_model_path(model.name, model.path)
     try:
-        antimony_file_path, species = antimony_create_file(model)
-        sbml_file_path = convert_antimony_to_sbml(
-            antimony_file_path, model.name, model.path, verbose
-        )
+        if backend == const.COMPILATION_BACKEND_LIBSBML:
+            compile_sbml_directly(
+                model,
+                cache,
+                reactions_inputs,
+                embed_gene_expression,
+                verbose,
+                profiler,
+            )
+        elif backend == const.COMPILATION_BACKEND_ANTIMONY:
+            compile_sbml_through_antimony(
+                model,
+                cache,
+                reactions_inputs,
+                embed_gene_expression,
+                verbose,
+                profiler,
+            )
+        else:
+            raise RuntimeError(
+                f"Unknown compilation backend {backend}, expected "
+                + f"{const.COMPILATION_BACKEND_ANTIMONY} or "
+                + f"{const.COMPILATION_BACKEND_LIBSBML}."
+            )
     except RuntimeError as error:
         print(f"SPARCED ERROR: {error}\n")
         sys.exit(0)
-    sbml_annotate_model(str(sbml_file_path), model.compartments, species)
-    amici_folder_path = convert_sbml_to_amici(
-        sbml_file_path, model.name, model.path, verbose
-    )
+    # AMICI
+    amici_folder_path = amici_create_folder(model.name, model.path)
+    with profiler.measure(const.COMPILATION_STAGE_AMICI, "amici_key"):
+        constant_parameters = select_constant_parameters(
+            sbml_file_path,
+            model.compilation_config.get(
+                const.YAML_COMPILATION_CONSTANT_PARAMETERS
+            ),
+        )
+        amici_key = compute_stage_key(
+            const.COMPILATION_STAGE_AMICI,
+            [],
+            f"{model.name}\n{hash_sbml_structure(sbml_file_path)}\n"
+            + ",".join(constant_parameters)
+            + f"\nconservation_laws={conservation_laws}",
+        )
+    profiler.settings["constant_parameters"] = len(constant_parameters)
+    if is_stage_cached(
+        cache, const.COMPILATION_STAGE_AMICI, amici_key, [amici_folder_path]
+    ):
+        profiler.skip(const.COMPILATION_STAGE_AMICI)
+        print_skipped_stage("AMICI folder", model.name, verbose)
+    else:
+        run_stage(cache, const.COMPILATION_STAGE_AMICI, model)
+        amici_folder_path = convert_sbml_to_amici(
+            sbml_file_path,
+            model.name,
+            model.path,
+            verbose,
+            constant_parameters,
+            conservation_laws,
+            profiler,
+        )
+        cache[const.COMPILATION_STAGE_AMICI] = amici_key
+        save_compilation_cache(cache, model.name, model.path)
+    f_genereg = None
+    if hasattr(model, "simulation_files"):
+        f_genereg = model.simulation_files.get(const.YAML_GENES_REGULATION)
+    with profiler.measure(const.COMPILATION_STAGE_METADATA, "metadata"):
+        write_model_metadata(
+            sbml_file_path, model.name, model.path, f_genereg
+        )
+    if verbose:
+        print(
+            "SPARCED VERBOSE: Finished to write metadata of model "
+            + f"{model.name}.\n"
+        )
+    report_path = profiler.write_report(model.path)
+    if verbose:
+        print(
+            f"SPARCED VERBOSE: Compilation report of model {model.name} "
+            + f"written to {report_path}:\n{profiler.format_report()}\n"
+        )
     return amici_folder_path
 
 
+def compile_sbml_through_antimony(
+    model: SparcedModel,
+    cache: dict[str, str],
+    antimony_inputs: list[str | os.PathLike],
+    embed_gene_expression: bool,
+    verbose: bool,
+    profiler: CompilationProfiler | None = None,
+) -> None:
+    """Generate a model's Antimony file, then convert it to SBML
+
+    Arguments:
+        model: A SparcedModel.Model object.
+        cache: The keys of the last compiled stages, updated in place.
+        antimony_inputs: The input files of the model's reactions.
+        embed_gene_expression: Whether gene expression is embedded.
+        verbose: Verbose.
+        profiler: The compilation profiler, if any.
+
+    Returns:
+        Nothing.
+    """
+
+    antimony_file_path = build_antimony_file_path(model.name, model.path)
+    species_file = model.compilation_files[const.YAML_SPECIES]
+    compartments_file = model.compilation_files[const.YAML_COMPARTMENTS]
+    antimony_key = compute_stage_key(
+        const.COMPILATION_STAGE_ANTIMONY,
+        antimony_inputs,
+        f"{model.name}\n{embed_gene_expression}",
+    )
+    if is_stage_cached(
+        cache,
+        const.COMPILATION_STAGE_ANTIMONY,
+        antimony_key,
+        [
+            antimony_file_path,
+            model.compilation_files[const.YAML_OUTPUT_PARAMETERS],
+        ],
+    ):
+        species = load_input_table(species_file, SPECIES_SCHEMA)
+        skip_stage(profiler, const.COMPILATION_STAGE_ANTIMONY)
+        print_skipped_stage("Antimony file", model.name, verbose)
+    else:
+        run_stage(cache, const.COMPILATION_STAGE_ANTIMONY, model)
+        with measure_step(
+            profiler, const.COMPILATION_STAGE_ANTIMONY, "antimony_write"
+        ):
+            antimony_file_path, species = antimony_create_file(model)
+        cache[const.COMPILATION_STAGE_ANTIMONY] = antimony_key
+        save_compilation_cache(cache, model.name, model.path)
+    # SBML
+    sbml_file_path = build_sbml_model_path(model.name, model.path)
+    sbml_key = compute_stage_key(
+        const.COMPILATION_STAGE_SBML,
+        [antimony_file_path, compartments_file, species_file],
+        model.name,
+    )
+    if is_stage_cached(
+        cache, const.COMPILATION_STAGE_SBML, sbml_key, [sbml_file_path]
+    ):
+        skip_stage(profiler, const.COMPILATION_STAGE_SBML)
+        print_skipped_stage("SBML file", model.name, verbose)
+    else:
+        run_stage(cache, const.COMPILATION_STAGE_SBML, model)
+        sbml_file_path = convert_antimony_to_sbml(
+            antimony_file_path, model.name, model.path, verbose, profiler
+        )
+        with measure_step(
+            profiler, const.COMPILATION_STAGE_SBML, "sbml_annotation"
+        ):
+            sbml_annotate_model(
+                str(sbml_file_path), model.compartments, species
+            )
+        cache[const.COMPILATION_STAGE_SBML] = sbml_key
+        save_compilation_cache(cache, model.name, model.path)
+
+
+def compile_sbml_directly(
+    model: SparcedModel,
+    cache: dict[str, str],
+    inputs: list[str | os.PathLike],
+    embed_gene_expression: bool,
+    verbose: bool,
+    profiler: CompilationProfiler | None = None,
+) -> None:
+    """Build a model's annotated SBML file in memory with libSBML
+
+    Note:
+        No Antimony file is written, the SBML stage reads the input
+        files directly (see compilation.sbml_scripts.construction).
+
+    Arguments:
+        model: A SparcedModel.Model object.
+        cache: The keys of the last compiled stages, updated in place.
+        inputs: The input files of the model's reactions.
+        embed_gene_expression: Whether gene expression is embedded.
+        verbose: Verbose.
+        profiler: The compilation profiler, if any.
+
+    Returns:
+        Nothing.
+    """
+
+    sbml_file_path = build_sbml_model_path(model.name, model.path)
+    sbml_key = compute_stage_key(
+        const.COMPILATION_STAGE_SBML,
+        inputs,
+        f"{model.name}\n{embed_gene_expression}\n"
+        + const.COMPILATION_BACKEND_LIBSBML,
+    )
+    if is_stage_cached(
+        cache,
+        const.COMPILATION_STAGE_SBML,
+        sbml_key,
+        [
+            sbml_file_path,
+            model.compilation_files[const.YAML_OUTPUT_PARAMETERS],
+        ],
+    ):
+        skip_stage(profiler, const.COMPILATION_STAGE_SBML)
+        print_skipped_stage("SBML file", model.name, verbose)
+        return
+    run_stage(cache, const.COMPILATION_STAGE_SBML, model)
+    with measure_step(profiler, const.COMPILATION_STAGE_SBML, "sbml_build"):
+        sbml_create_file(model, verbose)
+    cache[const.COMPILATION_STAGE_SBML] = sbml_key
+    save_compilation_cache(cache, model.name, model.path)
+
+
+def run_stage(cache: dict[str, str], stage: str, model: SparcedModel) -> None:
+    """Forget a stage's key before compiling it
+
+    Note:
+        A stage interrupted halfway must not be considered as compiled
+        on the next run.
+
+    Arguments:
+        cache: The keys of the last compiled stages.
+        stage: The name of the stage.
+        model: A SparcedModel.Model object.
+
+    Returns:
+        Nothing.
+    """
+
+    if cache.pop(stage, None) is not None:
+        save_compilation_cache(cache, model.name, model.path)
+
+
+def skip_stage(profiler: CompilationProfiler | None, stage: str) -> None:
+    """Record a skipped stage in the compilation profiler, if any"""
+
+    if profiler is not None:
+        profiler.skip(stage)
+
+
+def print_skipped_stage(artifact: str, model_name: str, verbose: bool) -> None:
+    """Tell that a stage's artifact is reused, if verbose"""
+
+    if verbose:
+        print(
+            f"SPARCED VERBOSE: {artifact} of model {model_name} is "
+            + "unchanged, skipping its compilation.\n"
+        )
+
+
 if __name__ == "__main__":
     create_and_compile_model()
@@ -5,10 +5,11 @@
 from compilation.conversion_scripts.antimony_to_sbml import (
         convert_antimony_to_sbml)
 from compilation.conversion_scripts.sbml_to_amici import(
-        convert_sbml_to_amici)
+        convert_sbml_to_amici, select_constant_parameters)
 
 __all__ = [
             'convert_antimony_to_sbml',
-            'convert_sbml_to_amici'
+            'convert_sbml_to_amici',
+            'select_constant_parameters'
           ]
 
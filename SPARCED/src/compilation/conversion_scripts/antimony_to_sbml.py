@@ -4,6 +4,9 @@
 import os
 
 import antimony
+
+import constants as const
+from compilation.profiling import CompilationProfiler, measure_step
 from compilation.sbml_scripts.creation import build_sbml_model_path
 
 
@@ -12,6 +15,7 @@ def convert_antimony_to_sbml(
     model_name: str,
     model_path: str | os.PathLike,
     verbose: bool,
+    profiler: CompilationProfiler | None = None,
 ) -> str | os.PathLike:
     """Convert an Antimony file into an SBML file
 
@@ -23,6 +27,7 @@ def convert_antimony_to_sbml(
         model_name: The name of the model.
         model_path: The path towards the model's directory.
         verbose: Verbose.
+        profiler: The compilation profiler, if any.
 
     Returns:
         The path towards the generated SBML model file.
@@ -31,7 +36,9 @@ def convert_antimony_to_sbml(
     # Create the SBML file path
     sbml_file_path = build_sbml_model_path(model_name, model_path)
     # Load the Antimony file
-    if antimony.loadFile(str(antimony_file_path)) == -1:
+    with measure_step(profiler, const.COMPILATION_STAGE_SBML, "antimony_load"):
+        loaded = antimony.loadFile(str(antimony_file_path))
+    if loaded == -1:
         if verbose:
             print(antimony.getLastError())
         raise RuntimeError(
@@ -43,7 +50,9 @@ def convert_antimony_to_sbml(
             + f"model {model_name}.\n"
         )
     # Convert the Antimony file into an SBML model
-    if antimony.writeSBMLFile(str(sbml_file_path), model_name) == 0:
+    with measure_step(profiler, const.COMPILATION_STAGE_SBML, "sbml_write"):
+        written = antimony.writeSBMLFile(str(sbml_file_path), model_name)
+    if written == 0:
         if verbose:
             print(antimony.getLastError())
         raise RuntimeError(
@@ -2,9 +2,60 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
+import subprocess
+import sys
 
 import amici
+import libsbml
+
+import constants as const
 from compilation.amici_scripts.creation import amici_create_folder
+from compilation.profiling import CompilationProfiler, measure_step
+
+
+def select_constant_parameters(
+    sbml_file_path: str | os.PathLike,
+    selection: str | bool | list[str] | None,
+) -> list[str]:
+    """Select the SBML parameters to compile as AMICI constants
+
+    Note:
+        AMICI generates no sensitivity code for constant (fixed)
+        parameters. Their values can still be set at runtime, but they
+        cannot be estimated. The gene expression switch always stays
+        a regular parameter. The effect on compilation and simulation
+        times has not been measured on SPARCED models yet (see
+        benchmarks/performance/amici_builds.py).
+
+    Arguments:
+        sbml_file_path: The path towards the SBML file.
+        selection: Either 'all' (or True) for every parameter, a list
+                   of parameters IDs or regular expressions matching
+                   them, or None (or False) for no parameter.
+
+    Returns:
+        The IDs of the constant parameters, in the SBML order.
+    """
+
+    if not selection or selection == "none":
+        return []
+    document = libsbml.SBMLReader().readSBML(str(sbml_file_path))
+    parameter_ids = [
+        parameter.getId()
+        for parameter in document.getModel().getListOfParameters()
+        if parameter.getId() != const.GENE_EXPRESSION_SWITCH
+    ]
+    if selection is True or selection == const.CONSTANT_PARAMETERS_ALL:
+        return parameter_ids
+    if isinstance(selection, str):
+        selection = [selection]
+    patterns = [re.compile(pattern) for pattern in selection]
+    return [
+        parameter_id
+        for parameter_id in parameter_ids
+        if any(pattern.fullmatch(parameter_id) for pattern in patterns)
+    ]
 
 
 def convert_sbml_to_amici(
@@ -12,39 +63,51 @@ def convert_sbml_to_amici(
     model_name: str,
     model_path: str | os.PathLike,
     verbose: bool,
+    constant_parameters: list[str] | None = None,
+    conservation_laws: bool | None = None,
+    profiler: CompilationProfiler | None = None,
 ) -> str | os.PathLike:
     """Convert an SBML file into an AMICI model
 
     Note:
         The generated AMICI folder is saved into the model's directory.
-
-    Warning:
-        To speed up compilation duration, all the rate parameters are
-        set as constants.
+        The model's code is generated first, then its C++ extension is
+        built, so that both steps can be measured separately.
 
     Arguments:
         sbml_file_path: The path towards the SBML file.
         model_name: The name of the model.
         model_path: THe path towards the model's directory.
         verbose: Verbose.
+        constant_parameters: The IDs of the parameters to compile as
+                             constants (see select_constant_parameters).
+        conservation_laws: Whether to eliminate the moiety conservation
+                           laws, integrating only the independent states.
+                           Initial states and results still hold the
+                           full state vector. None keeps AMICI's default.
+        profiler: The compilation profiler, if any.
 
     Returns:
         The path towards the generated AMICI model folder.
     """
 
     amici_folder_path = amici_create_folder(model_name, model_path)
-    importer = amici.SbmlImporter(sbml_file_path)
-
-    # DISABLED: Speed up compilation by setting all the rate
-    # parameters as constants
-    #
-    # reader = libsbml.SBMLReader()
-    # document = reader.readSBML(sbml_file_path)
-    # sbml_model = document.getModel()
-    # constant_parameters = [parameters.getId() \
-    #                        for parameters in sbml_model.getListOfParameters()]
-
-    importer.sbml2amici(model_name, amici_folder_path, verbose=bool(verbose))
+    options = {}
+    if conservation_laws is not None:
+        options["compute_conservation_laws"] = bool(conservation_laws)
+    stage = const.COMPILATION_STAGE_AMICI
+    with measure_step(profiler, stage, "amici_code_generation"):
+        importer = amici.SbmlImporter(str(sbml_file_path))
+        importer.sbml2amici(
+            model_name,
+            amici_folder_path,
+            constant_parameters=constant_parameters or None,
+            verbose=bool(verbose),
+            compile=False,
+            **options,
+        )
+    with measure_step(profiler, stage, "amici_build"):
+        build_amici_extension(amici_folder_path, verbose)
     if verbose:
         print(
             "SPARCED VERBOSE: Finished to convert SBML file of model "
@@ -52,3 +115,44 @@ def convert_sbml_to_amici(
         )
 
     return amici_folder_path
+
+
+def build_amici_extension(
+    amici_folder_path: str | os.PathLike, verbose: bool
+) -> None:
+    """Build the C++ extension of a generated AMICI model
+
+    Note:
+        The extension is built as AMICI does when compiling upon import,
+        by running the setup script of the generated model package.
+
+    Arguments:
+        amici_folder_path: The path towards the AMICI model folder.
+        verbose: Verbose.
+
+    Returns:
+        Nothing.
+    """
+
+    command = [
+        sys.executable,
+        os.path.join(amici_folder_path, "setup.py"),
+        "--verbose" if verbose else "--quiet",
+        "build_ext",
+        f"--build-lib={amici_folder_path}",
+    ]
+    try:
+        result = subprocess.run(
+            command,
+            cwd=str(amici_folder_path),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            check=True,
+        )
+    except subprocess.CalledProcessError as error:
+        raise RuntimeError(
+            f"Failed to build the AMICI extension in {amici_folder_path}:\n"
+            + error.output.decode("utf-8")
+        )
+    if verbose:
+        print(result.stdout.decode("utf-8"))
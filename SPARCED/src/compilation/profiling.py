@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import contextlib
+import json
+import os
+import resource
+import time
+from pathlib import Path
+
+import constants as const
+from _version import __version__
+from compilation.cache import get_tool_version
+from utils.files_handling import append_subfolder
+
+# Linux exposes the peak resident memory since its last reset
+PEAK_MEMORY_RESET_FILE = Path("/proc/self/clear_refs")
+PEAK_MEMORY_STATUS_FILE = Path("/proc/self/status")
+# Python packages whose versions are recorded in the report
+REPORT_TOOLS = ["antimony", "python-libsbml", "amici"]
+
+
+def build_compilation_report_path(
+    model_name: str, model_path: str | os.PathLike
+) -> str | os.PathLike:
+    """Build the path of a model's compilation report file
+
+    Note:
+        The report file sits next to the AMICI folder, in the model's
+        directory.
+
+    Arguments:
+        model_name: The name of the model.
+        model_path: The path towards the model's directory.
+
+    Returns:
+        The path of the compilation report file.
+    """
+
+    report_file_name = (
+        const.COMPILATION_REPORT_FILE_PREFIX
+        + model_name
+        + const.COMPILATION_REPORT_FILE_SUFFIX
+    )
+    return append_subfolder(model_path, report_file_name)
+
+
+class CompilationProfiler:
+    """Record the wall time, CPU time and peak memory of compilation steps
+
+    Note:
+        CPU times include the child processes, such as the C++ compiler
+        building the AMICI extension. Peak memories are the resident
+        set sizes of the process (reset before each step where the
+        system allows it, the peak since the start of the process
+        otherwise) and of its largest child process so far.
+
+    Attributes:
+        model_name: The name of the compiled model.
+        steps: The measures of the steps, in order.
+        settings: The compilation settings, recorded in the report.
+    """
+
+    def __init__(self, model_name: str, settings: dict | None = None):
+        self.model_name = model_name
+        self.steps = []
+        self.settings = dict(settings or {})
+
+    @contextlib.contextmanager
+    def measure(self, stage: str, step: str):
+        """Measure the enclosed step of a compilation stage
+
+        Arguments:
+            stage: The name of the stage.
+            step: The name of the step.
+
+        Returns:
+            A context manager.
+        """
+
+        can_reset = reset_peak_memory()
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = time.process_time()
+        start = time.perf_counter()
+        yield
+        wall = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+        new_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu += (new_children.ru_utime - children.ru_utime) + (
+            new_children.ru_stime - children.ru_stime
+        )
+        self.steps.append(
+            {
+                "stage": stage,
+                "step": step,
+                "cached": False,
+                "wall_s": wall,
+                "cpu_s": cpu,
+                "peak_rss_mb": read_peak_memory(can_reset) / 2**20,
+                # ru_maxrss is in kilobytes on Linux
+                "children_peak_rss_mb": new_children.ru_maxrss / 2**10,
+            }
+        )
+
+    def skip(self, stage: str) -> None:
+        """Record a stage whose artifacts were reused
+
+        Arguments:
+            stage: The name of the stage.
+
+        Returns:
+            Nothing.
+        """
+
+        self.steps.append({"stage": stage, "step": stage, "cached": True})
+
+    def build_report(self) -> dict:
+        """Gather the measures and the context of the compilation
+
+        Returns:
+            The report, structured as key: entry / value: value.
+        """
+
+        measured = [step for step in self.steps if not step["cached"]]
+        return {
+            "model": self.model_name,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "versions": {"sparced": __version__}
+            | {tool: get_tool_version(tool) for tool in REPORT_TOOLS},
+            "settings": self.settings,
+            "steps": self.steps,
+            "total": {
+                "wall_s": sum(step["wall_s"] for step in measured),
+                "cpu_s": sum(step["cpu_s"] for step in measured),
+                "peak_rss_mb": max(
+                    (step["peak_rss_mb"] for step in measured), default=0.0
+                ),
+            },
+        }
+
+    def write_report(
+        self, model_path: str | os.PathLike
+    ) -> str | os.PathLike:
+        """Save the compilation report into the model's directory
+
+        Arguments:
+            model_path: The path towards the model's directory.
+
+        Returns:
+            The path of the report file.
+        """
+
+        report_path = build_compilation_report_path(
+            self.model_name, model_path
+        )
+        with report_path.open(mode="w") as report_file:
+            json.dump(self.build_report(), report_file, indent=2)
+        return report_path
+
+    def format_report(self) -> str:
+        """Write the measures as a table, one step per line
+
+        Returns:
+            The table.
+        """
+
+        report = self.build_report()
+        lines = [
+            f"{'step':<24}{'wall (s)':>10}{'CPU (s)':>10}{'peak (MB)':>11}"
+        ]
+        for step in report["steps"]:
+            if step["cached"]:
+                lines.append(f"{step['step']:<24}{'cached':>10}")
+                continue
+            lines.append(
+                f"{step['step']:<24}{step['wall_s']:>10.2f}"
+                + f"{step['cpu_s']:>10.2f}{step['peak_rss_mb']:>11.1f}"
+            )
+        total = report["total"]
+        lines.append(
+            f"{'total':<24}{total['wall_s']:>10.2f}"
+            + f"{total['cpu_s']:>10.2f}{total['peak_rss_mb']:>11.1f}"
+        )
+        return "\n".join(lines)
+
+
+def measure_step(
+    profiler: CompilationProfiler | None, stage: str, step: str
+) -> contextlib.AbstractContextManager:
+    """Measure a compilation step if a profiler is given
+
+    Arguments:
+        profiler: The compilation profiler, if any.
+        stage: The name of the stage.
+        step: The name of the step.
+
+    Returns:
+        A context manager.
+    """
+
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.measure(stage, step)
+
+
+def reset_peak_memory() -> bool:
+    """Reset the peak resident memory of the process, if possible
+
+    Returns:
+        True if the peak was reset.
+    """
+
+    try:
+        with PEAK_MEMORY_RESET_FILE.open(mode="w") as reset_file:
+            reset_file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def read_peak_memory(since_reset: bool) -> int:
+    """Read the peak resident memory of the process
+
+    Arguments:
+        since_reset: Whether the peak was reset (see reset_peak_memory).
+
+    Returns:
+        The peak resident memory, in bytes.
+    """
+
+    if since_reset:
+        with PEAK_MEMORY_STATUS_FILE.open() as status_file:
+            for line in status_file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 2**10
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 2**10
@@ -2,18 +2,19 @@
 # -*- coding: utf-8 -*-
 
 import libsbml
-import numpy as np
+
+from utils.input_tables import InputTable
 
 
 def sbml_annotate_model(
-    file_path: str, compartments: np.ndarray, species: np.ndarray
+    file_path: str, compartments: InputTable, species: InputTable
 ) -> None:
     """Annotate species and compartments of the given SBML model
 
     Arguments:
         file_path: The path towards the SBML file.
-        compartments: Content of the compartments input file.
-        species: Content of the species input file.
+        compartments: The compartments input table.
+        species: The species input table.
 
     Returns:
         Nothing.
@@ -31,48 +32,41 @@ def sbml_annotate_model(
     writer.writeSBML(document, file_path)
 
 
-def write_compartments_annotations(file, compartments: np.ndarray) -> None:
+def write_compartments_annotations(file, compartments: InputTable) -> None:
     """Set compartments annotations in the given SBML file
 
-    Note:
-        First row should be the header and will be skipped.
-        First column contains the compartments names.
-        Annotations are expected to be located on the 3rd column of the
-        array.
-
     Arguments:
         file: The loaded SBML file.
-        compartments: Content of the compartments input file as
-                      specified in the __Note__ section.
+        compartments: The compartments input table, with name and
+                      annotation columns.
 
     Returns:
         Nothing.
     """
 
-    for row in compartments[1:]:
-        file.getCompartment(row[0]).setAnnotation(row[2])
+    for name, annotation in zip(
+        compartments["name"], compartments["annotation"]
+    ):
+        file.getCompartment(name).setAnnotation(annotation)
 
 
-def write_species_annotations(file, species: np.ndarray) -> None:
+def write_species_annotations(file, species: InputTable) -> None:
     """Set species annotations in the given SBML file
 
     Note:
-        First row should be the header and will be skipped.
-        Annotations are expected to be located between the 4th and the
-        last column of the array.
+        Annotations are the trailing columns of the species input
+        table, after its identifier column.
 
     Arguments:
         file: The loaded SBML file.
-        species: Content of the species input file.
+        species: The species input table.
 
     Returns:
         Nothing.
     """
 
-    for i, row in enumerate(species[1:]):
-        all_annotations = ""
-        for column in range(4, len(row)):
-            annotation = str(row[column].strip())
-            if annotation:
-                all_annotations += " " + row[column]
-        file.getSpecies(row[0]).setAnnotation(all_annotations)
+    for name, annotations in zip(species["name"], species.extra):
+        all_annotations = "".join(
+            " " + annotation for annotation in annotations if annotation
+        )
+        file.getSpecies(name).setAnnotation(all_annotations)
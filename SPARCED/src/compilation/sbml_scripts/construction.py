@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+
+import libsbml
+import numpy as np
+
+import compilation.antimony_scripts as antimony_script
+import constants as const
+from compilation.sbml_scripts.annotations import (
+    write_compartments_annotations,
+    write_species_annotations,
+)
+from compilation.sbml_scripts.creation import build_sbml_model_path
+from Model import Model as SparcedModel
+from utils.input_tables import SPECIES_SCHEMA, InputTable, load_input_table
+
+# Unit definitions, as written by the Antimony backend (see const.UNIT_*)
+# structured as key: ID / value: list of (kind, exponent, scale)
+UNIT_DEFINITIONS = {
+    "volume": [(libsbml.UNIT_KIND_LITRE, 1, 0)],
+    "time_unit": [(libsbml.UNIT_KIND_SECOND, 1, 0)],
+    "substance": [(libsbml.UNIT_KIND_MOLE, 1, -9)],
+    "nM": [(libsbml.UNIT_KIND_MOLE, 1, -9), (libsbml.UNIT_KIND_LITRE, -1, 0)],
+}
+SBML_LEVEL = 3
+SBML_VERSION = 1
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_]\w*")
+
+
+def sbml_create_file(
+    model: SparcedModel, verbose: bool = False
+) -> (str | os.PathLike, InputTable):
+    """Generate an SBML file corresponding to a SparcedModel.Model
+    object, without going through Antimony
+
+    Note:
+        The SBML document is built in memory from the input files,
+        annotations included, and written once. It holds the same
+        model as the Antimony backend's, so that switching backends
+        does not rebuild the AMICI model. This process also creates a
+        parameters file as an output.
+
+    Arguments:
+        model: A SparcedModel.Model object.
+        verbose: Verbose.
+
+    Returns:
+        SBML_file_path & species.
+    """
+
+    sbml_file_path = build_sbml_model_path(model.name, model.path)
+    species = load_input_table(
+        model.compilation_files[const.YAML_SPECIES], SPECIES_SCHEMA
+    )
+    document = build_sbml_document(model, species)
+    if not libsbml.writeSBMLToFile(document, str(sbml_file_path)):
+        raise RuntimeError(
+            f"Failed to write SBML file of model {model.name}.\n"
+        )
+    if verbose:
+        print(
+            "SPARCED VERBOSE: Successfully built SBML file of model "
+            + f"{model.name} with libSBML.\n"
+        )
+    return (sbml_file_path, species)
+
+
+def build_sbml_document(
+    model: SparcedModel, species: InputTable
+) -> libsbml.SBMLDocument:
+    """Build the SBML document of a SparcedModel.Model object
+
+    Arguments:
+        model: A SparcedModel.Model object.
+        species: The species input table.
+
+    Returns:
+        The SBML document.
+    """
+
+    document = libsbml.SBMLDocument(SBML_LEVEL, SBML_VERSION)
+    sbml_model = document.createModel(model.name)
+    sbml_model.setMetaId(model.name)
+    sbml_model.setSubstanceUnits("substance")
+    sbml_model.setTimeUnits("time_unit")
+    sbml_model.setVolumeUnits("volume")
+    add_unit_definitions(sbml_model)
+    add_compartments(sbml_model, model.compartments)
+    add_species(sbml_model, species)
+    # Reactions
+    reactions, param_names, param_values = antimony_script.read_reactions(
+        model.compilation_files[const.YAML_RATELAWS],
+        model.compilation_files[const.YAML_OUTPUT_PARAMETERS],
+    )
+    # Gene expression (Optional)
+    if model.compilation_config.get(const.YAML_COMPILATION_GENE_EXPRESSION):
+        if not hasattr(model, "simulation_files"):
+            raise RuntimeError(
+                "Embedding gene expression requires the genes "
+                + "regulation and omics data simulation files."
+            )
+        ge_reactions, ge_names, ge_values = (
+            antimony_script.read_gene_expression(
+                model.simulation_files[const.YAML_GENES_REGULATION],
+                model.simulation_files[const.YAML_OMICS_DATA],
+                species,
+                model.compartments,
+            )
+        )
+        reactions += ge_reactions
+        param_names += ge_names
+        param_values += ge_values
+    add_parameters(sbml_model, param_names, param_values)
+    add_reactions(sbml_model, reactions)
+    # Annotations
+    write_compartments_annotations(sbml_model, model.compartments)
+    write_species_annotations(sbml_model, species)
+    return document
+
+
+def add_unit_definitions(sbml_model: libsbml.Model) -> None:
+    """Define the units of the given SBML model
+
+    Arguments:
+        sbml_model: The SBML model.
+
+    Returns:
+        Nothing.
+    """
+
+    for unit_id, units in UNIT_DEFINITIONS.items():
+        unit_definition = sbml_model.createUnitDefinition()
+        unit_definition.setId(unit_id)
+        for kind, exponent, scale in units:
+            unit = unit_definition.createUnit()
+            unit.setKind(kind)
+            unit.setExponent(exponent)
+            unit.setScale(scale)
+            unit.setMultiplier(1)
+
+
+def add_compartments(
+    sbml_model: libsbml.Model, compartments: InputTable
+) -> None:
+    """Add compartments and their volumes to the given SBML model
+
+    Arguments:
+        sbml_model: The SBML model.
+        compartments: The compartments input table, with name and volume
+                      columns.
+
+    Returns:
+        Nothing.
+    """
+
+    for name, volume in zip(compartments["name"], compartments["volume"]):
+        compartment = sbml_model.createCompartment()
+        compartment.setId(name)
+        compartment.setSpatialDimensions(3)
+        compartment.setSize(_round_value(volume))
+        compartment.setUnits("volume")
+        compartment.setConstant(True)
+
+
+def add_species(sbml_model: libsbml.Model, species: InputTable) -> None:
+    """Add species and their initial concentrations to the given SBML
+       model
+
+    Arguments:
+        sbml_model: The SBML model.
+        species: The species input table, with name, compartment and
+                 initial_concentration columns.
+
+    Returns:
+        Nothing.
+    """
+
+    for name, compartment, concentration in zip(
+        species["name"],
+        species["compartment"],
+        species["initial_concentration"],
+    ):
+        specie = sbml_model.createSpecies()
+        specie.setId(name)
+        specie.setCompartment(compartment)
+        specie.setInitialConcentration(_round_value(concentration))
+        specie.setHasOnlySubstanceUnits(False)
+        specie.setBoundaryCondition(False)
+        specie.setConstant(False)
+
+
+def add_parameters(
+    sbml_model: libsbml.Model, p_names: list[str], p_values: list[float]
+) -> None:
+    """Add reactions parameters and their values to the given SBML model
+
+    Arguments:
+        sbml_model: The SBML model.
+        p_names: The parameters names.
+        p_values: The parameters values.
+
+    Returns:
+        Nothing.
+    """
+
+    for name, value in zip(p_names, p_values):
+        parameter = sbml_model.createParameter()
+        parameter.setId(name)
+        parameter.setValue(_round_value(value))
+        parameter.setConstant(True)
+
+
+def add_reactions(
+    sbml_model: libsbml.Model,
+    reactions: list[tuple[str, list[str], list[str], str]],
+) -> None:
+    """Add irreversible reactions to the given SBML model
+
+    Note:
+        As with Antimony, species of the rate formula that are neither
+        reactants nor products are added as modifiers, same-operator
+        sums and products are merged into a single operation and
+        numbers are written as plain reals, or integers when integral.
+
+    Arguments:
+        sbml_model: The SBML model.
+        reactions: The reactions, each structured as (ID, reactants,
+                   products, rate formula).
+
+    Returns:
+        Nothing.
+    """
+
+    species_ids = {specie.getId() for specie in sbml_model.getListOfSpecies()}
+    for reaction_id, reactants, products, rate in reactions:
+        reaction = sbml_model.createReaction()
+        reaction.setId(reaction_id)
+        reaction.setReversible(False)
+        reaction.setFast(False)
+        for specie in reactants:
+            reference = reaction.createReactant()
+            reference.setSpecies(specie)
+            reference.setStoichiometry(1)
+            reference.setConstant(True)
+        for specie in products:
+            reference = reaction.createProduct()
+            reference.setSpecies(specie)
+            reference.setStoichiometry(1)
+            reference.setConstant(True)
+        participants = set(reactants) | set(products)
+        modifiers = dict.fromkeys(
+            name
+            for name in IDENTIFIER_PATTERN.findall(rate)
+            if name in species_ids and name not in participants
+        )
+        for specie in modifiers:
+            reaction.createModifier().setSpecies(specie)
+        math = libsbml.parseL3FormulaWithModel(rate, sbml_model)
+        if math is None:
+            raise RuntimeError(
+                f"Failed to parse the rate of reaction {reaction_id}: "
+                + f"{libsbml.getLastParseL3Error()}\n"
+            )
+        _normalize_math(math)
+        reaction.createKineticLaw().setMath(math)
+
+
+def _normalize_math(node: libsbml.ASTNode) -> None:
+    """Write a formula's math as Antimony does, in place"""
+
+    for child_nb in range(node.getNumChildren()):
+        _normalize_math(node.getChild(child_nb))
+    operation = node.getType()
+    if operation in (libsbml.AST_REAL, libsbml.AST_REAL_E):
+        value = node.getReal()
+        if value.is_integer() and abs(value) < 2**31:
+            node.setValue(int(value))
+        else:
+            node.setValue(value)
+        return
+    if operation not in (libsbml.AST_PLUS, libsbml.AST_TIMES):
+        return
+    children = []
+    for child_nb in range(node.getNumChildren()):
+        child = node.getChild(child_nb)
+        if child.getType() == operation:
+            children += [
+                child.getChild(grandchild_nb).deepCopy()
+                for grandchild_nb in range(child.getNumChildren())
+            ]
+        else:
+            children.append(child.deepCopy())
+    if len(children) == node.getNumChildren():
+        return
+    while node.getNumChildren():
+        node.removeChild(0)
+    for child in children:
+        node.addChild(child)
+
+
+def _round_value(value: float) -> float:
+    """Round a value as the Antimony backend writes it"""
+
+    return float(f"{np.double(value):.6e}")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+import libsbml
+import numpy as np
+import pandas as pd
+
+import constants as const
+from utils.files_handling import append_subfolder, save_arrays
+
+
+def build_model_metadata_path(
+    model_name: str, model_path: str | os.PathLike
+) -> str | os.PathLike:
+    """Build the path of a model's metadata file
+
+    Note:
+        The metadata file sits next to the AMICI folder, in the model's
+        directory.
+
+    Arguments:
+        model_name: The name of the model.
+        model_path: The path towards the model's directory.
+
+    Returns:
+        The path of the metadata file.
+    """
+
+    metadata_file_name = (
+        const.METADATA_FILE_PREFIX + model_name + const.METADATA_FILE_SUFFIX
+    )
+    return append_subfolder(model_path, metadata_file_name)
+
+
+def extract_model_metadata(
+    sbml_file_path: str | os.PathLike,
+    f_genereg: str | os.PathLike | None = None,
+) -> dict[str, np.ndarray]:
+    """Extract from an SBML model what simulations need to know about it
+
+    Note:
+        State IDs follow the SBML species order, which is the order of
+        the AMICI model's states. The first species matching the mRNA
+        prefix (Baxm_Bcl2) is not an mRNA and is skipped. Parameters
+        values are those of the SBML model, which may differ from the
+        ones the AMICI model was built with.
+
+    Arguments:
+        sbml_file_path: The path towards the SBML file.
+        f_genereg: The genes regulation input file, used to locate the
+                   regulators. No regulator is located if omitted.
+
+    Returns:
+        A dictionnary structured as key: metadata name / value: array.
+    """
+
+    sbml_model = libsbml.SBMLReader().readSBML(str(sbml_file_path)).getModel()
+    state_ids = [species.getId() for species in sbml_model.getListOfSpecies()]
+    regulators = []
+    if f_genereg is not None:
+        regulators = pd.read_csv(
+            f_genereg, header=0, index_col=0, sep="\t", nrows=0
+        ).columns
+    mrna_indices = [
+        index
+        for index, state_id in enumerate(state_ids)
+        if const.MRNA_PREFIX in state_id
+    ]
+    parameters = sbml_model.getListOfParameters()
+    metadata = {
+        # Cytoplasm and nucleus volumes
+        "Vc": np.float64(sbml_model.getCompartment(0).getVolume()),
+        "Vn": np.float64(sbml_model.getCompartment(2).getVolume()),
+        "state_ids": np.array(state_ids),
+        "initial_states": np.array(
+            [
+                species.getInitialConcentration()
+                for species in sbml_model.getListOfSpecies()
+            ],
+            dtype=np.float64,
+        ),
+        "mRNAInds": np.array(mrna_indices[1:], dtype=int),
+        "spIDs": np.array(
+            [state_ids.index(regulator) for regulator in regulators],
+            dtype=int,
+        ),
+        # Apoptosis markers, empty if the model does not define them
+        "PARPind": np.flatnonzero(np.array(state_ids) == "PARP"),
+        "cPARPind": np.flatnonzero(np.array(state_ids) == "cPARP"),
+        "parameter_ids": np.array(
+            [parameter.getId() for parameter in parameters], dtype=str
+        ),
+        "parameter_values": np.array(
+            [parameter.getValue() for parameter in parameters],
+            dtype=np.float64,
+        ),
+    }
+    return metadata
+
+
+def write_model_metadata(
+    sbml_file_path: str | os.PathLike,
+    model_name: str,
+    model_path: str | os.PathLike,
+    f_genereg: str | os.PathLike | None = None,
+) -> dict[str, np.ndarray]:
+    """Extract a model's metadata and save them into its directory
+
+    Arguments:
+        sbml_file_path: The path towards the SBML file.
+        model_name: The name of the model.
+        model_path: The path towards the model's directory.
+        f_genereg: The genes regulation input file.
+
+    Returns:
+        A dictionnary structured as key: metadata name / value: array.
+    """
+
+    metadata = extract_model_metadata(sbml_file_path, f_genereg)
+    save_arrays(build_model_metadata_path(model_name, model_path), **metadata)
+    return metadata
+
+
+def load_model_metadata(
+    model_name: str,
+    model_path: str | os.PathLike,
+    sbml_file_path: str | os.PathLike,
+    f_genereg: str | os.PathLike | None = None,
+) -> dict[str, np.ndarray]:
+    """Load a model's metadata, extracting them first if necessary
+
+    Note:
+        Metadata are written upon compilation. They are only extracted
+        here from the SBML file for models compiled without them.
+
+    Arguments:
+        model_name: The name of the model.
+        model_path: The path towards the model's directory.
+        sbml_file_path: The path towards the SBML file.
+        f_genereg: The genes regulation input file.
+
+    Returns:
+        A dictionnary structured as key: metadata name / value: array.
+    """
+
+    metadata = read_model_metadata(model_name, model_path)
+    if not metadata:
+        return write_model_metadata(
+            sbml_file_path, model_name, model_path, f_genereg
+        )
+    return metadata
+
+
+def read_model_metadata(
+    model_name: str, model_path: str | os.PathLike
+) -> dict[str, np.ndarray]:
+    """Read a model's metadata without extracting them
+
+    Arguments:
+        model_name: The name of the model.
+        model_path: The path towards the model's directory.
+
+    Returns:
+        A dictionnary structured as key: metadata name / value: array,
+        empty if the model's metadata were never written.
+    """
+
+    metadata_path = build_model_metadata_path(model_name, model_path)
+    if not metadata_path.exists():
+        return {}
+    with np.load(metadata_path) as metadata_file:
+        return {name: metadata_file[name] for name in metadata_file.files}
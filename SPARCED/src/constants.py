@@ -10,30 +10,94 @@ ANTIMONY_FILE_PREFIX = "ant_"
 ANTIMONY_FILE_SUFFIX = ".txt"
 ANTIMONY_HEADER = "Erdem et al., Nat Commun 2022"  # TODO: Move to YAML
 
+# ENGINES
+ENGINE_LOCKSTEP = "lockstep"
+ENGINE_POOL = "pool"
+ENGINE_SERIAL = "serial"
+
+# GENE EXPRESSION
+GENE_EXPRESSION_SWITCH = "gene_expression_on"
+MRNA_PREFIX = "m_"
+
+# COMPILATION
+COMPILATION_BACKEND_ANTIMONY = "antimony"
+COMPILATION_BACKEND_LIBSBML = "libsbml"
+COMPILATION_CACHE_FILE_PREFIX = "compilation_cache_"
+COMPILATION_CACHE_FILE_SUFFIX = ".json"
+COMPILATION_REPORT_FILE_PREFIX = "compilation_report_"
+COMPILATION_REPORT_FILE_SUFFIX = ".json"
+COMPILATION_STAGE_AMICI = "amici"
+COMPILATION_STAGE_ANTIMONY = "antimony"
+COMPILATION_STAGE_METADATA = "metadata"
+COMPILATION_STAGE_SBML = "sbml"
+CONSTANT_PARAMETERS_ALL = "all"
+
 # DEFAULT GENERAL VALUES
 DEFAULT_CONFIG_FILE = "config.yaml"
 DEFAULT_CONFIG_FILES_EXTENSION = ".yaml"
 DEFAULT_MODEL_NAME = "SPARCED_standard"
 DEFAULT_MODELS_DIRECTORY = "./../models/"
 
+# METADATA
+METADATA_FILE_PREFIX = "metadata_"
+METADATA_FILE_SUFFIX = ".npz"
+
 # OUTPUT
+DEFAULT_OUTPUT_CHUNK_SIZE = 1000
+LOCKSTEP_MIN_CHUNK_SIZE = 16  # Rows per cell and write, whatever the cells
 DEFAULT_OUTPUT_FILE_EXTENSION = ".txt"
+OUTPUT_FILE_EXTENSION_HDF5 = ".h5"
+OUTPUT_FILE_EXTENSION_NPZ = ".npz"
+OUTPUT_FORMAT_HDF5 = "hdf5"
+OUTPUT_FORMAT_NPZ = "npz"
+OUTPUT_FORMAT_TSV = "tsv"
+OUTPUT_PRECISION_DOUBLE = "float64"
+OUTPUT_PRECISION_SINGLE = "float32"
+
+# SGE PLAN
+SGE_PLAN_FILE_PREFIX = "sge_plan_"
+SGE_PLAN_FILE_SUFFIX = ".npz"
+SGE_PLAN_VERSION = "3"
+
+# SOLVER
+SOLVER_MAX_STEPS = int(1e10)
+
+# POPULATION STATISTICS
+DEFAULT_STATISTICS_COMPRESSION = 20
+DEFAULT_STATISTICS_QUANTILES = [0.05, 0.5, 0.95]
+STATISTICS_BATCH_SIZE = 8  # Cells per pool task, whatever the workers
+STATISTICS_BUFFER_SIZE = 4  # Cells buffered before compressing the digests
+STATISTICS_FILE_SUFFIX = "_statistics"
 
 # SBML
 SBML_FILE_PREFIX = "sbml_"
 SBML_FILE_SUFFIX = ".xml"
 
 # UNITS
+AVOGADRO = 6.023e23
 UNIT_DEF_NM = "1e-9 mole / litre"
 UNIT_SUBSTANCE = "1e-9 mole"
 UNIT_TIME = "second"
 UNIT_VOLUME = "litre"
 
+# YAML (experiment population statistics)
+YAML_STATISTICS_COMPRESSION = "compression"
+YAML_STATISTICS_QUANTILES = "quantiles"
+
+# YAML (experiment outputs selection)
+YAML_OUTPUTS_OBSERVABLES = "observables"
+YAML_OUTPUTS_PATTERNS = "patterns"
+YAML_OUTPUTS_SPECIES = "species"
+
 # YAML (main configuration file)
 YAML_DATA_LOCATION = "location"
 # Compilation keywords
+YAML_COMPILATION_BACKEND = "backend"
+YAML_COMPILATION_CONSTANT_PARAMETERS = "constant_parameters"
+YAML_COMPILATION_CONSERVATION_LAWS = "conservation_laws"
 YAML_COMPILATION_DATA_LOCATION = "directory"
 YAML_COMPILATION_FILES = "files"
+YAML_COMPILATION_GENE_EXPRESSION = "embed_gene_expression"
 YAML_COMPILATION_KEYWORD = "compilation"
 # -- Input files keywords
 YAML_COMPARTMENTS = "compartments"
@@ -53,15 +117,28 @@ YAML_GENES_REGULATION = "genes_regulation"
 YAML_OMICS_DATA = "omics"
 
 # YAML (experiment configuration file)
+YAML_EXPERIMENT_CHUNK_SIZE = "chunk_size"
+YAML_EXPERIMENT_ENGINE = "engine"
 YAML_EXPERIMENT_EXCHANGE = "exchange"
 YAML_EXPERIMENT_NB_REPLICATES = "population_size"
+YAML_EXPERIMENT_OUTPUT_COMPRESSION = "output_compression"
 YAML_EXPERIMENT_OUTPUT_DIRECTORY = "output_directory"
+YAML_EXPERIMENT_OUTPUT_FORMAT = "output_format"
+YAML_EXPERIMENT_OUTPUT_PRECISION = "output_precision"
+YAML_EXPERIMENT_OUTPUT_SELECTION = "outputs"
+YAML_EXPERIMENT_OUTPUT_STRIDE = "output_stride"
+YAML_EXPERIMENT_OUTPUT_TIMES = "output_times"
 YAML_EXPERIMENT_PROTOCOL = "protocol"
+YAML_EXPERIMENT_SEED = "seed"
 YAML_EXPERIMENT_STAMP_OUTPUT = "stamp"
+YAML_EXPERIMENT_STATISTICS = "statistics"
+YAML_EXPERIMENT_THREADS = "threads"
 YAML_EXPERIMENT_VERBOSE = "verbose"
+YAML_EXPERIMENT_WORKERS = "workers"
 # -- Protocol settings
 YAML_PROTOCOL_DURATION = "duration"
 YAML_PROTOCOL_IS_DETERMINISTIC = "deterministic"
 YAML_PROTOCOL_NAME = "name"
+YAML_PROTOCOL_PARAMETERS = "parameters"
 YAML_PROTOCOL_PERTURBATIONS = "perturbations"
 YAML_PROTOCOL_PERTURBATIONS_ID = "perturbations_id"
@@ -1,82 +1,77 @@
 import numpy as np
-import pandas as pd
 
-def RunPrep(flagD,Vn,model, f_genereg, f_omics):
-    # Read-in the omics data and assign concentrations of genes
-    gExp_mpc = np.float64(f_omics.values[:,0])
-    mExp_mpc = np.float64(f_omics.values[:,1])
-    kGin = np.float64(f_omics.values[:,2])
-    kGac = np.float64(f_omics.values[:,3])
-    kTCleak = np.float64(f_omics.values[:,4])
-    kTCmaxs = np.float64(f_omics.values[:,5])
-    kTCd = np.float64(f_omics.values[:,6])
+import constants as const
+from simulation.gene_copies import count_active_copies
 
-    # Read-in the activators matrix and assign concentrations of activators
-    TARs0 = (f_genereg.values)
-    numberofTARs = len(f_genereg.columns)
-    spnames = [ele for ele in model.getStateIds()]
-    spIDs = []
-    for qq in range(numberofTARs):
-        sps = spnames.index(f_genereg.columns[qq]) 
-        spIDs.append(sps)
-    f_genereg = None
-    
-    numberofgenes = int(len(gExp_mpc))
-    indsDm = [5,6,7,8,12,13,14,15,16,17,18,19,20,21,22,23,24]
-    mExp_mpc[indsDm] = 17.0 # modify cell cycle gene mRNA numbers to 17
+# Genes and mRNAs which are not allowed to fluctuate (standard model's
+# positions, only those within the model's genes are kept)
+indsD = np.array([5,6,7,8,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,
+                  28,29])
 
-    ss = int(sum(gExp_mpc))
-    GenePositionMatrix = np.zeros((numberofgenes,ss))
-    ind = 0
-    for i in range(numberofgenes):
-        GenePositionMatrix[i, ind:ind+int(gExp_mpc[i])] = 1.0
-        ind = ind + int(gExp_mpc[i])
+def RunPrep(flagD, plan, rng: np.random.Generator):
+    # Read-in the precompiled omics data (see simulation.plan)
+    gExp_mpc = plan["gExp_mpc"]
+    kGin = plan["kGin"]
+    kGac = plan["kGac"]
+    GeneCopiesOffsets = plan["GeneCopiesOffsets"]
+    ss = GeneCopiesOffsets[-1]
 
-    # xg Deterministic
-    xgac_mpc_D = (kGac*gExp_mpc)/(kGin+kGac) #active genes initial condition
-    xgin_mpc_D = gExp_mpc - xgac_mpc_D #inactive genes initial condition
+    AllGenesVec = np.zeros(ss, dtype=bool)
+    if flagD==1:
+        # xg Deterministic
+        xgac_mpc = (kGac*gExp_mpc)/(kGin+kGac) #active genes initial condition
+    else:
+        # xg Stochastic
+        IndsGenesOn = rng.choice(ss, size=int(round(ss*kGac[0]/kGin[0])),
+                                 replace=False)
+        AllGenesVec[IndsGenesOn] = True
+        # Calculate Concentration of Active and Inactive Genes for each gene
+        xgac_mpc = count_active_copies(AllGenesVec, GeneCopiesOffsets)
+    xgin_mpc = gExp_mpc - xgac_mpc #inactive genes initial condition
 
-    # xg Stochastic
-    AllGenesVec = np.zeros(shape = (ss,1))
-    IndsGenesOn = np.random.choice(ss, size=int(round(ss*kGac[0]/kGin[0])), replace=False)
-    AllGenesVec[IndsGenesOn] = 1.0
+    genedata = np.concatenate((xgac_mpc, xgin_mpc), axis=None)
 
-    # Calculate Concentration of Active and Inactive Genes for each gene
-    xgac_mpc = np.dot(GenePositionMatrix,AllGenesVec)
-    xgac_mpc = xgac_mpc.ravel()
-    xgin_mpc = gExp_mpc-xgac_mpc
-    xgin_mpc = xgin_mpc.ravel()
+    return genedata, AllGenesVec
 
-    genedata = []
-    if flagD==1:
-        genedata = np.concatenate((xgac_mpc_D, xgin_mpc_D), axis=None)
-    else:
-        genedata = np.concatenate((xgac_mpc, xgin_mpc), axis=None)
-    
-    # Gene switching constants
-    kGin_1 = kGin[0]
-    kGac_1 = kGac[0]
-    
-    tcnas = np.ones((numberofgenes, numberofTARs))
-    tck50as = np.zeros((numberofgenes, numberofTARs))
-    tcnrs = np.ones((numberofgenes, numberofTARs))
-    tck50rs = np.zeros((numberofgenes, numberofTARs))
-    for qq in range(numberofgenes):
-        for ww in range(numberofTARs):
-            pars = TARs0[qq,ww].find(';')
-            if pars>0:
-                nH = np.float64(TARs0[qq,ww][0:pars])
-                kH = np.float64(TARs0[qq,ww][pars+2::])
-                if nH>0:
-                    tcnas[qq,ww] = nH
-                    tck50as[qq,ww] = kH
-                else:
-                    tcnrs[qq,ww] = abs(nH)
-                    tck50rs[qq,ww] = kH
+def prepare_sge(plan, ts, mRNAInds0):
+    """Precompute the constants of a run's gene expression steps
+
+    Note:
+        The exchange time step, rates and volumes do not change during
+        a run: switching probabilities and unit conversion factors are
+        computed here once, then used by every SGEmodule step. Genes
+        which are not allowed to fluctuate are restricted to the
+        plan's genes, so that models with fewer genes than the
+        standard one can be simulated stochastically.
+
+    Arguments:
+        plan: The SGE plan (see simulation.plan).
+        ts: The exchange time step (in seconds).
+        mRNAInds0: The index of the first mRNA species.
+
+    Returns:
+        A dictionnary structured as key: constant name / value: value.
+    """
 
-    mpc2nmcf_Vn = 1.0E9/(Vn*6.023E+23)
-    # Convert to molecules per cell
-    tck50as = tck50as*(1/mpc2nmcf_Vn)
-    tck50rs = tck50rs*(1/mpc2nmcf_Vn)
-    
-    return genedata, GenePositionMatrix, AllGenesVec, kTCmaxs, kTCleak, kGin_1, kGac_1, kTCd, TARs0, tcnas, tcnrs, tck50as, tck50rs, spIDs 
+    kGin_1 = plan["kGin"][0]
+    kGac_1 = plan["kGac"][0]
+    numberofgenes = len(plan["kTCmaxs"])
+    return {
+        # Unit conversion factors, nM --> molecules per cell
+        "nM2mpc_Vn": plan["Vn"]*const.AVOGADRO/1.0E9,
+        "nM2mpc_Vc": plan["Vc"]*const.AVOGADRO/1.0E9,
+        # Poisson processes: probability of no switching event during ts
+        "poff": np.exp(-kGin_1*ts),
+        "pon": np.exp(-kGac_1*ts),
+        "indsD": indsD[indsD < numberofgenes],
+        "kTCmaxs": plan["kTCmaxs"],
+        "kTCleak": plan["kTCleak"],
+        "kTCd": plan["kTCd"],
+        "GeneCopiesOffsets": plan["GeneCopiesOffsets"],
+        # Sparse genes regulation, K50s already in molecules per cell
+        "regulation": {name: plan[name] for name in plan
+                       if name.startswith(("activators_", "repressors_",
+                                           "cooperative_"))},
+        "spIDs": plan["spIDs"],
+        "mRNAInds0": mRNAInds0,
+    }
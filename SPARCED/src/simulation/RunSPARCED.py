@@ -1,71 +1,118 @@
-import libsbml
-import importlib
 import amici
 import numpy as np
-import pandas as pd
 
+import constants as const
 from simulation.SGEmodule import SGEmodule
-from simulation.RunPrep import RunPrep
+from simulation.RunPrep import RunPrep, prepare_sge
+from simulation.integration import (count_full_states, create_solver,
+                                    find_apoptosis_step,
+                                    has_embedded_gene_expression,
+                                    integrate_full_duration,
+                                    read_final_states)
+from simulation.output_grid import OutputSampler, select_output_times
+from utils.results_writer import ResultsWriter
 
-def RunSPARCED(flagD,th,spdata,genedata,sbml_file,model, f_genereg: pd.DataFrame, f_omics: pd.DataFrame):
+def RunSPARCED(flagD,th,spdata,genedata,model, plan: dict[str, np.ndarray],
+               rng: np.random.Generator, writer: ResultsWriter = None,
+               output_stride: int = 1, output_times: list[float] = None):
+    # With a writer, every output time-point is streamed to it as soon as it
+    # is computed and only the last 30sec time-point is returned, so memory
+    # does not grow with th. Output time-points are every output_stride-th
+    # 30sec time-point, or the explicit output_times (in seconds,
+    # interpolated between 30sec time-points).
     ts = 30 # time-step to update mRNA numbers
     NSteps = int(th*3600/ts)
-    tout_all = np.arange(0,th*3600+1,ts) 
-    
-    # Read-in the model SBML to get compartmental volumes (used to convert nM to mpc and vice versa)
-    sbml_reader = libsbml.SBMLReader()
-    sbml_doc = sbml_reader.readSBML(sbml_file)
-    sbml_model = sbml_doc.getModel()
-    Vc = sbml_model.getCompartment(0).getVolume() # Should be the index for Cytoplasm
-    Vn = sbml_model.getCompartment(2).getVolume() # Should be the index for Nuclues
+    tout_all = np.arange(0,th*3600+1,ts)
+    tout_out = select_output_times(tout_all, output_stride, output_times)
+
+    # Compartmental volume from the SGE plan (used to convert mpc to nM)
+    Vc = plan["Vc"] # Cytoplasm
     mpc2nM_Vc = (1E9/(Vc*6.023E+23))
-    splist = list(model.getStateIds())
-    if len(spdata)==0: # if no initial condition values are supplied, use the input file information
+    # if no initial condition values are supplied, use the input file
+    # information
+    if len(spdata)==0:
         # spdata0 = pd.read_csv('Species.txt',header=0,index_col=0,sep="\t")
-        # spdata = np.float(spdata0.values[:,1])  
+        # spdata = np.float(spdata0.values[:,1])
         spdata = model.getInitialStates()
-    
-    # calculate 
-    genedata, GenePositionMatrix, AllGenesVec, kTCmaxs, kTCleak, kGin_1, kGac_1, kTCd, TARs0, tcnas, tcnrs, tck50as, tck50rs, spIDs = RunPrep(flagD,Vn,model, f_genereg, f_omics)  
-    
-    xoutS_all = np.zeros(shape=(NSteps+1,len(spdata)))
-    xoutS_all[0,:] = spdata # 24hr time point
-    xoutG_all = np.zeros(shape=(NSteps+1,len(genedata)))
-    xoutG_all[0,:] = genedata  
-    
-    solver = model.getSolver() # Create solver instance
-    solver.setMaxSteps = 1e10
-    
-    mRNAIndDs = [ind for ind, ele in enumerate(splist) if 'm_' in ele] # find the indeces for mRNA species
-    mRNAIndDs = mRNAIndDs[1:]
-    PARPind = [ind for ind,ele in enumerate(splist) if ele in {'PARP'}] # find the index for PARP
-    cPARPind = [ind for ind,ele in enumerate(splist) if ele in {'cPARP'}] # find the index for cleaved-PARP (used to decide for apoptosis) 
-    n_sp = len(splist)
+
+    # calculate
+    genedata, AllGenesVec = RunPrep(flagD, plan, rng)
+
+    xoutS = np.array(spdata, dtype=np.float64) # 24hr time point
+    xoutG = genedata
+    # full states, even with conservation laws eliminated
+    n_sp = count_full_states(model, xoutS)
+    if writer is None:
+        xoutS_all = np.zeros(shape=(len(tout_out),n_sp))
+        xoutG_all = np.zeros(shape=(len(tout_out),len(genedata)))
+        def emit(time, species, genes):
+            xoutS_all[sampler.next,:] = species
+            xoutG_all[sampler.next,:] = genes
+        def outputs(last, species, genes):
+            # Drop the time-points which were not simulated (cell death):
+            return (xoutS_all[:sampler.next], xoutG_all[:sampler.next],
+                    tout_out[:sampler.next])
+    else:
+        emit = writer.append
+        def outputs(last, species, genes):
+            return (species[np.newaxis,:], genes[np.newaxis,:],
+                    tout_all[last:last+1])
+    sampler = OutputSampler(tout_out, emit)
+    def record(qq, species, genes):
+        sampler.push(tout_all[qq], species, genes)
+
+    solver = create_solver(model)
+
+    # Gene expression embedded upon compilation: deterministic simulations
+    # run as one integration, stochastic ones switch it off in the model
+    if has_embedded_gene_expression(model):
+        if flagD:
+            xoutS_full = integrate_full_duration(model, solver, xoutS,
+                                                 tout_all)
+            # Truncated at cell death, as the exchange loop
+            last = find_apoptosis_step(xoutS_full, plan["PARPind"],
+                                       plan["cPARPind"])
+            if last < NSteps:
+                print('Apoptosis happened')
+            for qq in range(last+1):
+                record(qq, xoutS_full[qq,:], xoutG)
+            return outputs(last, xoutS_full[last,:], xoutG)
+        model.setParameterById(const.GENE_EXPRESSION_SWITCH, 0.0)
+
+    # Species indices from the compiled model's metadata (see plan.py)
+    mRNAIndDs = plan["mRNAInds"] # indeces for mRNA species
+    PARPind = plan["PARPind"] # index for PARP
+    # index for cleaved-PARP (used to decide for apoptosis)
+    cPARPind = plan["cPARPind"]
+    sge = prepare_sge(plan, ts, mRNAIndDs[0])
     # Run 30sec (ts) simulations until final th is reached:
-    for qq in range(NSteps): 
-        # Call the function (based on the current state of the model species) for gene in/activation and mRNA birth/death events.   
-        # Stochastic sampling if the flagD==0, deterministic calculations if flagD==1:
-        genedata,xmN,AllGenesVec = SGEmodule(flagD,ts,xoutG_all[qq,:],xoutS_all[qq,:],Vn,Vc,kTCmaxs,kTCleak,kTCd,AllGenesVec,GenePositionMatrix,kGin_1,kGac_1,tcnas,tck50as,tcnrs,tck50rs,spIDs,mRNAIndDs[0])
-        # mRNA species values are updated every 30sec, for the next 30sec simulation:
-        xoutS_all[qq,mRNAIndDs] = np.dot(xmN,mpc2nM_Vc) 
+    qq = 0
+    while qq < NSteps:
+        # Call the function (based on the current state of the model
+        # species) for gene in/activation and mRNA birth/death events.
+        # Stochastic sampling if the flagD==0, deterministic calculations
+        # if flagD==1:
+        genedata,xmN,AllGenesVec = SGEmodule(flagD,ts,xoutG,xoutS,
+                                             AllGenesVec,sge,rng)
+        # mRNA species values are updated every 30sec, for the next 30sec
+        # simulation:
+        xoutS[mRNAIndDs] = np.dot(xmN,mpc2nM_Vc)
+        # Store the 30sec time-point with its updated mRNAs and
+        # active/inactive gene states:
+        record(qq, xoutS, xoutG)
         # set the new ICs:
-        model.setInitialStates(xoutS_all[qq,:]) 
+        model.setInitialStates(xoutS)
         # Run the simulation:
-        rdata = amici.runAmiciSimulation(model, solver)  
-        # Store the end point as next 30sec time-point:
-        xoutS_all[qq+1,:] = rdata._swigptr.x[-n_sp:]
+        rdata = amici.runAmiciSimulation(model, solver)
+        # The end point is the next 30sec time-point:
+        xoutS = read_final_states(rdata, n_sp)
         rdata = None
-        # Store active/inactive gene states:
-        xoutG_all[qq+1,:] = genedata
+        xoutG = genedata
+        qq = qq+1
         # check for cell death:
-        if xoutS_all[-1,PARPind] < xoutS_all[-1,cPARPind]: 
+        if np.any(xoutS[PARPind] < xoutS[cPARPind]):
             print('Apoptosis happened')
             break
-    # Finalize the species concentration trajectories (output at every 30sec):
-    xoutS_all = xoutS_all[~np.all(xoutS_all == 0, axis=1)] 
-    # Finalize the gene state trajectories (output at every 30sec):
-    xoutG_all = xoutG_all[~np.all(xoutG_all == 0, axis=1)] 
-    # The time points (in seconds):
-    tout_all = tout_all[0:len(xoutS_all)]
-    
-    return xoutS_all, xoutG_all, tout_all
+    record(qq, xoutS, xoutG)
+
+    return outputs(qq, xoutS, xoutG)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+def build_gene_copies_offsets(gExp_mpc: np.ndarray) -> np.ndarray:
+    """Build the segment offsets of each gene's copies
+
+    Note:
+        All the gene copies are laid out contiguously, gene after gene:
+        the copies of gene g are stored between offsets[g] and
+        offsets[g+1].
+
+    Arguments:
+        gExp_mpc: The number of copies of each gene.
+
+    Returns:
+        The (genes + 1) segment offsets.
+    """
+
+    offsets = np.zeros(len(gExp_mpc) + 1, dtype=int)
+    np.cumsum(gExp_mpc.astype(int), out=offsets[1:])
+    return offsets
+
+
+def count_active_copies(AllGenesVec: np.ndarray,
+                        GeneCopiesOffsets: np.ndarray) -> np.ndarray:
+    """Count the active copies of each gene
+
+    Note:
+        AllGenesVec may hold one cell (1-D) or one cell per row (2-D).
+
+    Arguments:
+        AllGenesVec: The boolean activity of every gene copy, the last
+                     axis being gene copies.
+        GeneCopiesOffsets: The segment offsets of each gene's copies.
+
+    Returns:
+        The number of active copies, the last axis being genes.
+    """
+
+    cumulated = np.zeros(AllGenesVec.shape[:-1] + (AllGenesVec.shape[-1] + 1,))
+    np.cumsum(AllGenesVec, axis=-1, out=cumulated[..., 1:])
+    return (cumulated[..., GeneCopiesOffsets[1:]]
+            - cumulated[..., GeneCopiesOffsets[:-1]])
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import amici
+import numpy as np
+
+import constants as const
+
+
+class StateDimensionMismatch(ValueError):
+    def __init__(self, expected: int, given: int):
+        self.expected = expected
+        self.given = given
+
+    def __str__(self):
+        return("SPARCED ERROR: The state vector does not match the model.\n"
+             + f"Expected: {self.expected} states (full state vector)\n"
+             + f"Given: {self.given} states\n")
+
+
+def create_solver(model):
+    """Create a solver for a model, configured for SPARCED simulations
+
+    Note:
+        Every simulation path creates its solver here, so that serial
+        and lockstep cells integrate under the same settings.
+
+    Arguments:
+        model: The AMICI model.
+
+    Returns:
+        The AMICI solver.
+    """
+
+    solver = model.getSolver()
+    solver.setMaxSteps(const.SOLVER_MAX_STEPS)
+    return solver
+
+
+def count_full_states(model, states: np.ndarray = None) -> int:
+    """Count the entries of a model's full state vector
+
+    Note:
+        With conservation laws elimination, AMICI integrates only the
+        independent states (model.nx_solver) while initial states and
+        return data hold the full state vector (model.nx_rdata).
+
+    Arguments:
+        model: The AMICI model.
+        states: A state vector to check against the model, if any.
+
+    Returns:
+        The number of states in the full state vector.
+    """
+
+    nb_states = model.nx_rdata
+    if states is not None and np.shape(states)[-1] != nb_states:
+        raise StateDimensionMismatch(nb_states, np.shape(states)[-1])
+    return(nb_states)
+
+
+def read_final_states(rdata, nb_states: int) -> np.ndarray:
+    """Read the full state vector at the last timepoint of a simulation
+
+    Note:
+        AMICI expands the reduced states of models compiled with
+        conservation laws elimination back to the full state vector in
+        its return data, using the conserved totals computed from the
+        simulation's initial states. Only the last row of the flattened
+        (timepoints x states) array is copied.
+
+    Arguments:
+        rdata: The AMICI return data.
+        nb_states: The number of states in the full state vector.
+
+    Returns:
+        The full state vector at the last timepoint.
+    """
+
+    return(np.array(rdata._swigptr.x[-nb_states:]))
+
+
+def has_embedded_gene_expression(model) -> bool:
+    """Check whether gene expression was embedded upon compilation
+
+    Arguments:
+        model: The AMICI model.
+
+    Returns:
+        True if the model holds the gene expression switch parameter.
+    """
+
+    return const.GENE_EXPRESSION_SWITCH in model.getParameterIds()
+
+
+def integrate_full_duration(model, solver, initial_states: np.ndarray,
+                            timepoints: np.ndarray) -> np.ndarray:
+    """Integrate a model with embedded gene expression in a single call
+
+    Note:
+        The model's timepoints are restored after the integration.
+
+    Arguments:
+        model: The AMICI model, compiled with embedded gene expression.
+        solver: The AMICI solver.
+        initial_states: The initial state vector.
+        timepoints: The output timepoints (in seconds).
+
+    Returns:
+        The state trajectories, one row per timepoint.
+    """
+
+    model.setParameterById(const.GENE_EXPRESSION_SWITCH, 1.0)
+    previous_timepoints = model.getTimepoints()
+    model.setTimepoints(timepoints)
+    model.setInitialStates(initial_states)
+    rdata = amici.runAmiciSimulation(model, solver)
+    model.setTimepoints(previous_timepoints)
+    return np.array(rdata.x)
+
+
+def find_apoptosis_step(trajectory: np.ndarray, PARPind: np.ndarray,
+                        cPARPind: np.ndarray) -> int:
+    """Find the time point at which a cell's trajectory stops
+
+    Note:
+        As in the exchange loop, apoptosis happens at the first time
+        point after the initial one where cleaved PARP exceeds PARP.
+
+    Arguments:
+        trajectory: The state trajectory, one row per timepoint.
+        PARPind: The index of PARP.
+        cPARPind: The index of cleaved PARP.
+
+    Returns:
+        The index of the apoptosis time point, the last one if the
+        cell survives.
+    """
+
+    dead = np.any(trajectory[1:, PARPind] < trajectory[1:, cPARPind], axis=1)
+    if np.any(dead):
+        return int(np.argmax(dead)) + 1
+    return len(trajectory) - 1
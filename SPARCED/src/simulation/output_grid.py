@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections.abc import Callable
+
+import numpy as np
+
+
+def select_output_times(exchange_times: np.ndarray, stride: int = 1,
+                        times: list[float] | None = None) -> np.ndarray:
+    """Select the time points to output among a simulation's time span
+
+    Arguments:
+        exchange_times: The exchange time points of the simulation (in
+                        seconds).
+        stride: Output every stride-th exchange time point.
+        times: Explicit output times (in seconds), overriding stride.
+               Times out of the simulation's time span are ignored.
+
+    Returns:
+        The sorted output times.
+    """
+
+    if times is None:
+        return exchange_times[::max(int(stride), 1)]
+    times = np.unique(np.asarray(times, dtype=np.float64))
+    return times[(times >= exchange_times[0]) & (times <= exchange_times[-1])]
+
+
+class OutputSampler:
+    """Record a trajectory at the output times only
+
+    Note:
+        Exchange time points are pushed one after the other. Output
+        times falling between two exchange time points are linearly
+        interpolated, species and genes alike.
+
+    Attributes:
+        output_times: The sorted output times.
+        emit: The function recording an output time point, called as
+              emit(time, species, genes).
+        next: The index of the next output time to record.
+        previous: The last pushed time point, as (time, species, genes).
+    """
+
+    def __init__(self, output_times: np.ndarray,
+                 emit: Callable[[float, np.ndarray, np.ndarray], None]):
+        self.output_times = output_times
+        self.emit = emit
+        self.next = 0
+        self.previous = None
+
+    def push(self, time: float, species: np.ndarray,
+             genes: np.ndarray) -> None:
+        """Add one exchange time point of the trajectory
+
+        Arguments:
+            time: The exchange time point.
+            species: The species concentrations.
+            genes: The active and inactive genes.
+
+        Returns:
+            Nothing.
+        """
+
+        while (self.next < len(self.output_times)
+               and self.output_times[self.next] <= time):
+            output_time = self.output_times[self.next]
+            if output_time == time or self.previous is None:
+                self.emit(output_time, species, genes)
+            else:
+                previous_time, previous_species, previous_genes = self.previous
+                weight = (output_time - previous_time)/(time - previous_time)
+                self.emit(output_time,
+                          previous_species + weight*(species - previous_species),
+                          previous_genes + weight*(genes - previous_genes))
+            self.next += 1
+        if self.next < len(self.output_times):
+            self.previous = (time, np.array(species), np.array(genes))
+
+    def push_rows(self, time: np.ndarray, species: np.ndarray,
+                  genes: np.ndarray) -> None:
+        """Add several exchange time points of the trajectory
+
+        Arguments:
+            time: The exchange time points.
+            species: The species concentrations, one row per time point.
+            genes: The active and inactive genes, one row per time point.
+
+        Returns:
+            Nothing.
+        """
+
+        for row in range(len(time)):
+            self.push(time[row], species[row], genes[row])
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+from types import ModuleType
+
+import numpy as np
+
+from compilation.sbml_scripts.metadata import read_model_metadata
+
+
+def apply_parameters(model, parameters: dict[str, float]) -> None:
+    """Set the values of an AMICI model's parameters at runtime
+
+    Note:
+        Parameters the model does not expose are ignored. Fixed
+        parameters (AMICI's constant parameters) are set as well.
+
+    Arguments:
+        model: The AMICI model.
+        parameters: A dictionnary structured as key: parameter ID /
+                    value: value.
+
+    Returns:
+        Nothing.
+    """
+
+    for parameter_id in model.getParameterIds():
+        if parameter_id in parameters:
+            model.setParameterById(parameter_id,
+                                   float(parameters[parameter_id]))
+    for parameter_id in model.getFixedParameterIds():
+        if parameter_id in parameters:
+            model.setFixedParameterById(parameter_id,
+                                        float(parameters[parameter_id]))
+
+def load_compiled_parameters(metadata: dict[str, np.ndarray]
+                             ) -> dict[str, float]:
+    """Get the parameters values a model was last compiled with
+
+    Note:
+        A model whose parameters values changed since its AMICI build
+        is not rebuilt (see compilation.cache). Its new values are
+        only known from its metadata.
+
+    Arguments:
+        metadata: The model's metadata.
+
+    Returns:
+        A dictionnary structured as key: parameter ID / value: value,
+        empty for metadata written before parameters were recorded.
+    """
+
+    if "parameter_ids" not in metadata:
+        return({})
+    return(dict(zip(metadata["parameter_ids"].tolist(),
+                    metadata["parameter_values"].tolist())))
+
+def load_amici_model(model_module: ModuleType,
+                     model_path: str | os.PathLike,
+                     metadata: dict[str, np.ndarray] | None = None):
+    """Load an AMICI model with the parameters values of its metadata
+
+    Note:
+        The AMICI build is reused when only parameters values change
+        (see compilation.cache), so the values compiled into it may be
+        stale. Models should always be loaded through this function,
+        which sets the values recorded at the last compilation.
+
+    Arguments:
+        model_module: The imported AMICI model module.
+        model_path: The path towards the model's directory.
+        metadata: The model's metadata, read from the model's directory
+                  if not given.
+
+    Returns:
+        The AMICI model.
+    """
+
+    model = model_module.getModel()
+    if metadata is None:
+        metadata = read_model_metadata(model_module.__name__, model_path)
+    apply_parameters(model, load_compiled_parameters(metadata))
+    return(model)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import constants as const
+from compilation.sbml_scripts.metadata import build_model_metadata_path
+from simulation.gene_copies import build_gene_copies_offsets
+from simulation.regulation import compress_regulation, find_cooperative_edges
+from utils.files_handling import append_subfolder, hash_files, save_arrays
+
+
+def build_sge_plan_path(model_name: str, model_path: str | os.PathLike
+                        ) -> str | os.PathLike:
+    """Build the path of a model's SGE plan file
+
+    Note:
+        The plan file sits next to the AMICI folder, in the model's
+        directory.
+
+    Arguments:
+        model_name: The name of the model.
+        model_path: The path towards the model's directory.
+
+    Returns:
+        The path of the SGE plan file.
+    """
+
+    plan_file_name = (const.SGE_PLAN_FILE_PREFIX + model_name
+                      + const.SGE_PLAN_FILE_SUFFIX)
+    return append_subfolder(model_path, plan_file_name)
+
+
+def compile_sge_plan(f_genereg: str | os.PathLike,
+                     f_omics: str | os.PathLike,
+                     metadata: dict[str, np.ndarray]
+                     ) -> dict[str, np.ndarray]:
+    """Parse the gene expression input data into numerical arrays
+
+    Note:
+        Genes regulations are written under the format "nH; kH", where
+        a positive Hill coefficient nH stands for an activator and a
+        negative one for a repressor. Half-maximal concentrations kH
+        are converted from nM to molecules per cell. Volumes, regulators
+        and species indices are taken from the model's metadata.
+
+    Arguments:
+        f_genereg: The genes regulation input file.
+        f_omics: The omics data input file.
+        metadata: The model's metadata (see
+                  compilation.sbml_scripts.metadata).
+
+    Returns:
+        A dictionnary structured as key: array name / value: array.
+    """
+
+    genereg = pd.read_csv(f_genereg, header=0, index_col=0, sep='\t')
+    omics = pd.read_csv(f_omics, header=0, index_col=0, sep='\t')
+    spIDs = metadata["spIDs"]
+    if list(metadata["state_ids"][spIDs]) != list(genereg.columns):
+        raise ValueError("Genes regulators do not match the compiled model, "
+                         + "please compile it again.")
+    # Compartmental volumes (used to convert nM to mpc and vice versa)
+    Vc = metadata["Vc"]
+    Vn = metadata["Vn"]
+
+    gExp_mpc = np.float64(omics.values[:, 0])
+
+    # Split "nH; kH" strings in a single vectorized pass
+    regulations = genereg.values.astype(str)
+    is_edge = np.char.find(regulations, ';') > 0
+    edges = np.char.partition(np.where(is_edge, regulations, '0;0'), ';')
+    nH = edges[:, :, 0].astype(np.float64)
+    kH = edges[:, :, 2].astype(np.float64)
+    activators = is_edge & (nH > 0)
+    repressors = is_edge & ~(nH > 0)
+    mpc2nmcf_Vn = 1.0E9/(Vn*const.AVOGADRO)
+
+    plan = {
+        "Vc": np.float64(Vc),
+        "Vn": np.float64(Vn),
+        "gExp_mpc": gExp_mpc,
+        "kGin": np.float64(omics.values[:, 2]),
+        "kGac": np.float64(omics.values[:, 3]),
+        "kTCleak": np.float64(omics.values[:, 4]),
+        "kTCmaxs": np.float64(omics.values[:, 5]),
+        "kTCd": np.float64(omics.values[:, 6]),
+        "GeneCopiesOffsets": build_gene_copies_offsets(gExp_mpc),
+        "spIDs": spIDs,
+        "mRNAInds": metadata["mRNAInds"],
+        "PARPind": metadata["PARPind"],
+        "cPARPind": metadata["cPARPind"],
+    }
+    # Sparse regulation topology, K50s converted to molecules per cell
+    kH = kH*(1/mpc2nmcf_Vn)
+    plan.update(compress_regulation(nH, kH, activators, "activators"))
+    plan.update(compress_regulation(np.abs(nH), kH, repressors, "repressors"))
+    plan["cooperative_edges"] = find_cooperative_edges(plan)
+    return plan
+
+
+def load_sge_plan(model_name: str, model_path: str | os.PathLike,
+                  simulation_files: dict[str, str],
+                  metadata: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Load a model's SGE plan, compiling it first if necessary
+
+    Note:
+        The plan is keyed on a hash of the genes regulation, omics and
+        metadata files and of the plan format version. It is compiled
+        again whenever one of them changed.
+
+    Arguments:
+        model_name: The name of the model.
+        model_path: The path towards the model's directory.
+        simulation_files: The simulation input files.
+        metadata: The model's metadata.
+
+    Returns:
+        A dictionnary structured as key: array name / value: array.
+    """
+
+    f_genereg = simulation_files[const.YAML_GENES_REGULATION]
+    f_omics = simulation_files[const.YAML_OMICS_DATA]
+    key = hash_files([f_genereg, f_omics,
+                      build_model_metadata_path(model_name, model_path)],
+                     extra=const.SGE_PLAN_VERSION)
+    plan_path = build_sge_plan_path(model_name, model_path)
+    if plan_path.exists():
+        with np.load(plan_path) as plan_file:
+            if str(plan_file["key"]) == key:
+                return {name: plan_file[name] for name in plan_file.files
+                        if name != "key"}
+    plan = compile_sge_plan(f_genereg, f_omics, metadata)
+    save_arrays(plan_path, key=np.array(key), **plan)
+    return plan
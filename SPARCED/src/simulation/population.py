@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import amici
+import numpy as np
+
+import constants as const
+from simulation.RunPrep import RunPrep, prepare_sge
+from simulation.SGEmodule import SGEmodule
+from simulation.gene_copies import count_active_copies
+from simulation.integration import (count_full_states, create_solver,
+                                    find_apoptosis_step,
+                                    has_embedded_gene_expression,
+                                    integrate_full_duration,
+                                    read_final_states)
+from simulation.output_grid import OutputSampler, select_output_times
+from utils.results_writer import ResultsWriter
+
+
+def initialize_population_genes(GeneCopiesOffsets: np.ndarray,
+                                kGin_1: float, kGac_1: float,
+                                nb_cells: int,
+                                rng: np.random.Generator) -> np.ndarray:
+    """Draw the initial activity of every gene copy for each cell
+
+    Note:
+        Follows RunPrep: for each cell, a random subset of all the gene
+        copies, of size proportional to kGac / kGin, is switched on.
+
+    Arguments:
+        GeneCopiesOffsets: The segment offsets of each gene's copies.
+        kGin_1: The gene inactivation rate.
+        kGac_1: The gene activation rate.
+        nb_cells: The number of cells.
+        rng: The random number generator.
+
+    Returns:
+        A (cells x gene copies) boolean array, True for active gene
+        copies.
+    """
+
+    ss = GeneCopiesOffsets[-1]
+    nb_active = int(round(ss*kGac_1/kGin_1))
+    AllGenesVec = np.zeros((nb_cells, ss), dtype=bool)
+    for cell in range(nb_cells):
+        AllGenesVec[cell, rng.choice(ss, size=nb_active, replace=False)] = True
+    return AllGenesVec
+
+
+def integrate_population(model, solver, states: np.ndarray, edatas: list,
+                         num_threads: int = 1) -> np.ndarray:
+    """Integrate each cell of a population over one exchange step
+
+    Note:
+        All the cells are submitted to AMICI as one batch, integrated
+        in parallel over num_threads OpenMP threads. Without OpenMP
+        support in the AMICI build, they are integrated sequentially.
+
+    Arguments:
+        model: The AMICI model.
+        solver: The AMICI solver.
+        states: The (cells x species) initial states.
+        edatas: One AMICI experimental data per cell, holding the
+                exchange step timepoints.
+        num_threads: The number of threads.
+
+    Returns:
+        The (cells x species) states at the end of the exchange step.
+    """
+
+    n_sp = count_full_states(model, states)
+    for edata, initial_states in zip(edatas, states):
+        edata.x0 = initial_states
+    rdatas = amici.runAmiciSimulations(model, solver, edatas,
+                                       num_threads=num_threads)
+    new_states = np.empty_like(states)
+    for cell, rdata in enumerate(rdatas):
+        new_states[cell] = read_final_states(rdata, n_sp)
+    return new_states
+
+
+def RunPopulation(flagD, th, spdata, model, plan: dict[str, np.ndarray],
+                  rng: np.random.Generator, num_threads: int = 1,
+                  writers: list[ResultsWriter] = None,
+                  output_stride: int = 1, output_times: list[float] = None):
+    """Simulate a population of cells in lockstep
+
+    Note:
+        All the living cells are stepped together: at each exchange
+        step, gene expression is computed once for the whole population
+        before integrating every living cell as one multi-threaded
+        batch. Each cell's output time points are streamed to its
+        writer as soon as they are computed, as in RunSPARCED: only the
+        current states of the population are kept, so memory does not
+        grow with th. A cell stops being simulated once apoptosis
+        happened (cleaved PARP exceeds PARP).
+
+    Arguments:
+        flagD: Deterministic (1) or stochastic (0) simulation.
+        th: The duration of the simulation (in hours).
+        spdata: The (cells x species) initial concentrations.
+        model: The AMICI model.
+        plan: The SGE plan (see simulation.plan).
+        rng: The random number generator.
+        num_threads: The number of threads integrating the cells.
+        writers: One results writer per cell, None to output nothing.
+        output_stride: Output every n-th exchange time point.
+        output_times: Explicit output times (in seconds), overriding
+                      output_stride.
+
+    Returns:
+        A tuple with the species, the genes and the time point of each
+        cell at the end of its simulation, one row per cell.
+    """
+
+    ts = 30 # time-step to update mRNA numbers
+    NSteps = int(th*3600/ts)
+    tout_all = np.arange(0, th*3600+1, ts)
+    tout_out = select_output_times(tout_all, output_stride, output_times)
+    xoutS = np.array(spdata, dtype=np.float64, ndmin=2)
+    nb_cells = len(xoutS)
+    samplers = [OutputSampler(tout_out, writer.append)
+                for writer in writers or []]
+    def record(cells, qq, species, genes):
+        if not samplers:
+            return
+        for cell, cell_species, cell_genes in zip(cells, species, genes):
+            samplers[cell].push(tout_all[qq], cell_species, cell_genes)
+
+    # Compartmental volume (used to convert mpc to nM)
+    mpc2nM_Vc = (1E9/(plan["Vc"]*const.AVOGADRO))
+
+    GeneCopiesOffsets = plan["GeneCopiesOffsets"]
+    if flagD:
+        xoutG, _ = RunPrep(flagD, plan, rng)
+        xoutG = np.tile(xoutG, (nb_cells, 1))
+        AllGenesVec = np.zeros((nb_cells, 0), dtype=bool)
+    else:
+        AllGenesVec = initialize_population_genes(GeneCopiesOffsets,
+                                                  plan["kGin"][0],
+                                                  plan["kGac"][0],
+                                                  nb_cells, rng)
+        xgac = count_active_copies(AllGenesVec, GeneCopiesOffsets)
+        xoutG = np.concatenate(
+            (xgac, np.diff(GeneCopiesOffsets) - xgac), axis=1)
+
+    # Species indices from the compiled model's metadata
+    mRNAIndDs = plan["mRNAInds"]
+    PARPind = plan["PARPind"]
+    cPARPind = plan["cPARPind"]
+
+    solver = create_solver(model)
+    last_step = np.full(nb_cells, NSteps)
+    if has_embedded_gene_expression(model):
+        if flagD:
+            # One cell's trajectory at a time, truncated at cell death
+            for cell in range(nb_cells):
+                trajectory = integrate_full_duration(model, solver,
+                                                     xoutS[cell], tout_all)
+                last_step[cell] = find_apoptosis_step(trajectory, PARPind,
+                                                      cPARPind)
+                if last_step[cell] < NSteps:
+                    print(f"Apoptosis happened in cell {cell + 1}")
+                for qq in range(last_step[cell]+1):
+                    record([cell], qq, trajectory[qq:qq+1],
+                           xoutG[cell:cell+1])
+                xoutS[cell] = trajectory[last_step[cell]]
+            return xoutS, xoutG, tout_all[last_step]
+        model.setParameterById(const.GENE_EXPRESSION_SWITCH, 0.0)
+
+    sge = prepare_sge(plan, ts, mRNAIndDs[0])
+
+    edatas = [amici.ExpData(model) for _ in range(nb_cells)]
+    alive = np.ones(nb_cells, dtype=bool)
+    for qq in range(NSteps):
+        cells = np.flatnonzero(alive)
+        if len(cells) == 0:
+            break
+        # Gene expression of all the living cells at once
+        genedata, xmN, AllGenesVec[cells] = SGEmodule(
+            flagD, ts, xoutG[cells], xoutS[cells], AllGenesVec[cells], sge,
+            rng)
+        states = xoutS[cells]
+        # mRNA species values are updated for the next exchange step
+        states[:, mRNAIndDs] = xmN*mpc2nM_Vc
+        record(cells, qq, states, xoutG[cells])
+        xoutS[cells] = integrate_population(
+            model, solver, states, [edatas[cell] for cell in cells],
+            num_threads)
+        xoutG[cells] = genedata
+        # check for cell death:
+        new_states = xoutS[cells]
+        dead = cells[np.any(new_states[:, PARPind]
+                            < new_states[:, cPARPind], axis=1)]
+        for cell in dead:
+            print(f"Apoptosis happened in cell {cell + 1}")
+        record(dead, qq+1, xoutS[dead], xoutG[dead])
+        alive[dead] = False
+        last_step[dead] = qq+1
+
+    cells = np.flatnonzero(alive)
+    record(cells, NSteps, xoutS[cells], xoutG[cells])
+    return xoutS, xoutG, tout_all[last_step]
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# Genes whose transcription requires both of the first two activators
+# (AP1*cMYC exception)
+COOPERATIVE_GENES = slice(9, 12)
+
+
+def compress_regulation(nH: np.ndarray, kH: np.ndarray, edges: np.ndarray,
+                        prefix: str) -> dict[str, np.ndarray]:
+    """Store a (genes x regulators) regulation topology as CSR arrays
+
+    Note:
+        Only the actual regulation edges are kept. For each gene g, its
+        edges are stored between indptr[g] and indptr[g+1].
+
+    Arguments:
+        nH: The (genes x regulators) Hill coefficients.
+        kH: The (genes x regulators) half-maximal concentrations.
+        edges: The (genes x regulators) mask of the edges to keep.
+        prefix: The prefix of the returned arrays names, e.g.
+                "activators".
+
+    Returns:
+        A dictionnary with the CSR row pointers, the regulators indices,
+        the half-maximal concentrations and the Hill coefficients of
+        the edges.
+    """
+
+    genes, regulators = np.nonzero(edges)
+    indptr = np.zeros(len(edges) + 1, dtype=int)
+    np.cumsum(np.sum(edges, axis=1), out=indptr[1:])
+    return {
+        f"{prefix}_indptr": indptr,
+        f"{prefix}_regulators": regulators,
+        f"{prefix}_k50": kH[genes, regulators],
+        f"{prefix}_n": nH[genes, regulators],
+    }
+
+
+def find_cooperative_edges(regulation: dict[str, np.ndarray]
+                           ) -> np.ndarray:
+    """Locate the edges of the first two activators of cooperative genes
+
+    Arguments:
+        regulation: The "activators" CSR arrays.
+
+    Returns:
+        A (cooperative genes x 2) array of activators edges indices,
+        -1 standing for a missing edge.
+    """
+
+    indptr = regulation["activators_indptr"]
+    regulators = regulation["activators_regulators"]
+    genes = range(len(indptr) - 1)[COOPERATIVE_GENES]
+    edges = np.full((len(genes), 2), -1, dtype=int)
+    for i, gene in enumerate(genes):
+        for edge in range(indptr[gene], indptr[gene+1]):
+            if regulators[edge] < 2:
+                edges[i, regulators[edge]] = edge
+    return edges
+
+
+def _edges_sum(TARarr: np.ndarray, regulation: dict[str, np.ndarray],
+               prefix: str) -> (np.ndarray, np.ndarray):
+    """Evaluate Hill terms over the edges and sum them for each gene
+
+    Note:
+        Each gene's terms are summed over its own segment of edges,
+        so that a gene's sum is not affected by the magnitude of the
+        other genes' terms. Genes without edges sum to zero.
+
+    Arguments:
+        TARarr: The regulators levels, the last axis being regulators.
+        regulation: The regulation CSR arrays.
+        prefix: The prefix of the CSR arrays to use.
+
+    Returns:
+        A tuple with the Hill terms of each edge and their sum for each
+        gene.
+    """
+
+    indptr = regulation[f"{prefix}_indptr"]
+    terms = np.power(
+        TARarr[..., regulation[f"{prefix}_regulators"]]
+        / regulation[f"{prefix}_k50"],
+        regulation[f"{prefix}_n"])
+    sums = np.zeros(terms.shape[:-1] + (len(indptr) - 1,))
+    # reduceat sums from each start to the next one, skip empty segments
+    nonempty = indptr[1:] > indptr[:-1]
+    if np.any(nonempty):
+        sums[..., nonempty] = np.add.reduceat(terms, indptr[:-1][nonempty],
+                                              axis=-1)
+    return (terms, sums)
+
+
+def hill_functions(TARarr: np.ndarray, regulation: dict[str, np.ndarray]
+                   ) -> np.ndarray:
+    """Compute the transcription induction of every gene
+
+    Note:
+        Hill terms are only evaluated over the actual regulation edges.
+        TARarr may hold one cell (1-D) or one cell per row (2-D).
+
+    Arguments:
+        TARarr: The regulators levels, in the same unit as the
+                half-maximal concentrations.
+        regulation: The "activators" and "repressors" CSR arrays (see
+                    compress_regulation()) and the cooperative edges
+                    (see find_cooperative_edges()).
+
+    Returns:
+        The Hill functions, the last axis being genes.
+    """
+
+    TFa, sumTFa = _edges_sum(TARarr, regulation, "activators")
+    _, sumTFr = _edges_sum(TARarr, regulation, "repressors")
+    hills = sumTFa/(1 + sumTFa + sumTFr)
+    # With AP1*cMYC exception (missing edges point to a padded zero term):
+    TFa = np.concatenate((TFa, np.zeros(TFa.shape[:-1] + (1,))), axis=-1)
+    TFc = TFa[..., regulation["cooperative_edges"]]
+    hills[..., COOPERATIVE_GENES] = np.prod(TFc/(1 + TFc), axis=-1)
+    return hills
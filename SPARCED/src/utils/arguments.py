@@ -17,6 +17,8 @@ def parse_args():
     parser = argparse.ArgumentParser()
     
     # Compilation
+    parser.add_argument('-f', '--force', action='store_true',
+                        help="recompile every stage, even the unchanged ones")
     parser.add_argument('-o', '--output_parameters',
                         help="desired name for the output parameters file")
     
@@ -72,6 +72,19 @@ def load_petab_conditions_file(file: str | os.PathLike, condition_id: str) -> di
             data[k] = raw_data[k][condition_id]
     return(data)
 
+def load_petab_observables_file(file: str | os.PathLike) -> dict[str, str]:
+    """Load the observables formulas of a PEtab observables file
+
+    Arguments:
+        file: The path to the PEtab observables file.
+
+    Returns:
+        A dictionnary structured as key: observableId / value: formula.
+    """
+
+    raw_data = petab.v1.get_observable_df(file)
+    return(dict(zip(raw_data.index, raw_data["observableFormula"])))
+
 def load_species_from_sbml(sbml_path: str | os.PathLike
                            ) -> dict[str, float]:
     """Load species initial concentrations from an SBML file
@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import hashlib
 import os
 import sys
+import tempfile
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -52,3 +55,49 @@ def convert_excel_to_tsv(f_excel: str) -> None:
     data = pd.read_excel(f_excel, header=0, index_col=0)
     data.to_csv((f_excel.split("."))[0] + ".txt", sep="\t")
 
+
+def hash_files(paths: list[str | os.PathLike], extra: str = "") -> str:
+    """Compute a hash of the content of the given files
+
+    Arguments:
+        paths: The paths of the files to hash, in order.
+        extra: Additional text to include in the hash.
+
+    Returns:
+        The hexadecimal SHA-256 digest.
+    """
+
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+    digest.update(extra.encode())
+    return(digest.hexdigest())
+
+def save_arrays(file_path: str | os.PathLike, **arrays) -> None:
+    """Save arrays into a NumPy archive, replacing it atomically
+
+    Note:
+        The archive is written to a temporary file of the same folder,
+        then renamed: processes loading it concurrently either find the
+        previous archive or the complete new one, never a partly
+        written one.
+
+    Arguments:
+        file_path: The path of the archive.
+        arrays: The arrays to save, by name.
+
+    Returns:
+        Nothing.
+    """
+
+    folder = os.path.dirname(os.path.abspath(file_path))
+    descriptor, temporary_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as archive:
+            np.savez(archive, **arrays)
+        os.replace(temporary_path, file_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
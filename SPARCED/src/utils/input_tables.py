@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import csv
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+# Columns types
+TEXT = "text"
+NUMBER = "number"
+
+
+# CUSTOM ERRORS
+
+class InvalidInputTable(ValueError):
+    def __init__(self, message: str, file: str | os.PathLike):
+        self.message = message
+        self.file = file
+
+    def __str__(self):
+        return("SPARCED ERROR: Invalid input file.\n"
+             + f"File: {self.file}\n"
+             + f"Error: {self.message}\n")
+
+# SCHEMAS
+
+@dataclass(frozen=True)
+class TableSchema:
+    """Columns of a tab separated input file, after its header row
+
+    Attributes:
+        name: The name of the input type.
+        columns: The leading columns, as (name, type) pairs.
+        required: The number of leading columns every row must fill.
+        extra: The (name, type) of the variable number of trailing
+               columns, if any.
+    """
+
+    name: str
+    columns: tuple[tuple[str, str], ...]
+    required: int
+    extra: tuple[str, str] | None = None
+
+COMPARTMENTS_SCHEMA = TableSchema(
+    "compartments",
+    (("name", TEXT), ("volume", NUMBER), ("annotation", TEXT)),
+    required=2)
+SPECIES_SCHEMA = TableSchema(
+    "species",
+    (("name", TEXT), ("compartment", TEXT),
+     ("initial_concentration", NUMBER), ("identifier", TEXT)),
+    required=3,
+    extra=("annotations", TEXT))
+RATELAWS_SCHEMA = TableSchema(
+    "ratelaws",
+    (("name", TEXT), ("compartment", TEXT), ("reaction", TEXT),
+     ("ratelaw", TEXT)),
+    required=4,
+    extra=("parameters", NUMBER))
+
+# TABLES
+
+@dataclass
+class InputTable:
+    """A typed input file
+
+    Note:
+        Text columns are object arrays of stripped strings and numeric
+        columns float64 arrays, where empty cells are empty strings
+        and NaN. The trailing columns are gathered in one (rows x
+        columns) array.
+
+    Attributes:
+        schema: The name of the input type.
+        columns: A dictionnary structured as key: column name / value:
+                 array, one entry per row.
+        extra: The trailing columns, None if the schema has none.
+    """
+
+    schema: str
+    columns: dict[str, np.ndarray]
+    extra: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return(len(next(iter(self.columns.values()))))
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return(self.columns[column])
+
+def load_input_table(f_input: str | os.PathLike,
+                      schema: TableSchema) -> InputTable:
+    """Load and validate a tab separated input file as a typed table
+
+    Note:
+        Cells are split and numbers converted by pandas' C reader,
+        with the same rounding as float().
+
+    Arguments:
+        f_input: The input file, whose first row is a header.
+        schema: The expected columns of the file.
+
+    Returns:
+        The typed table.
+    """
+
+    with open(f_input) as file:
+        header = file.readline()
+    if not header.strip():
+        raise InvalidInputTable("Missing header.", f_input)
+    width = len(header.rstrip("\r\n").split("\t"))
+    types = [column_type for _, column_type in schema.columns][:width]
+    if schema.extra is not None:
+        types += [schema.extra[1]]*(width - len(schema.columns))
+    numeric = [position for position, column_type in enumerate(types)
+               if column_type == NUMBER]
+    try:
+        raw = pd.read_csv(f_input, sep="\t", header=0, names=range(width),
+                          index_col=False, engine="c",
+                          dtype={position: (np.float64 if column_type == NUMBER
+                                            else str)
+                                 for position, column_type in enumerate(types)},
+                          keep_default_na=False,
+                          na_values={position: [""] for position in numeric},
+                          quoting=csv.QUOTE_NONE, skipinitialspace=True,
+                          float_precision="round_trip")
+    except pd.errors.ParserError as error:
+        raise InvalidInputTable(str(error).strip(), f_input)
+    except ValueError as error:
+        _raise_invalid_number(f_input, width, numeric, error)
+    cells = [_convert_column(raw[position], types[position])
+             for position in range(width)]
+    # Columns left empty after the required ones are ignored
+    while width > schema.required and not np.any(
+            cells[width-1] != "" if types[width-1] == TEXT
+            else ~np.isnan(cells[width-1])):
+        width -= 1
+    if width < schema.required:
+        raise InvalidInputTable(f"Expected at least {schema.required} "
+                                + f"columns, found {width}.", f_input)
+    if schema.extra is None and width > len(schema.columns):
+        raise InvalidInputTable(f"Expected at most {len(schema.columns)} "
+                                + f"columns, found {width}.", f_input)
+    columns = {}
+    for position, (column, column_type) in enumerate(schema.columns):
+        if position < width:
+            columns[column] = cells[position]
+        elif column_type == TEXT:
+            columns[column] = np.full(len(raw), "", dtype=object)
+        else:
+            columns[column] = np.full(len(raw), np.nan)
+        if position < schema.required:
+            missing = np.flatnonzero(np.isnan(columns[column])
+                                     if column_type == NUMBER
+                                     else columns[column] == "")
+            if len(missing):
+                raise InvalidInputTable(f"Missing {column} on row "
+                                        + f"{missing[0] + 2}.", f_input)
+    extra = None
+    if schema.extra is not None:
+        extra = cells[len(schema.columns):width]
+        extra = (np.column_stack(extra) if extra
+                 else np.empty((len(raw), 0),
+                               dtype=(np.float64 if schema.extra[1] == NUMBER
+                                      else object)))
+    names = pd.Series(columns[schema.columns[0][0]])
+    duplicated = names.duplicated()
+    if duplicated.any():
+        raise InvalidInputTable(f"Duplicated name {names[duplicated].iloc[0]}.",
+                                f_input)
+    return(InputTable(schema.name, columns, extra))
+
+def _convert_column(values: pd.Series, column_type: str) -> np.ndarray:
+    """Convert a parsed column to a NumPy array"""
+
+    if column_type == NUMBER:
+        return(values.to_numpy(dtype=np.float64))
+    # Leading spaces are skipped by the reader
+    return(np.array([cell.rstrip() for cell in values.fillna("").to_numpy()],
+                    dtype=object))
+
+def _raise_invalid_number(f_input: str | os.PathLike, width: int,
+                          numeric: list[int], error: ValueError) -> None:
+    """Locate the first cell which is not a number in numeric columns
+
+    Note:
+        The reader's error is raised again if every cell is a number.
+    """
+
+    raw = pd.read_csv(f_input, sep="\t", header=0, names=range(width),
+                      index_col=False, engine="c", dtype=str,
+                      na_filter=False, quoting=csv.QUOTE_NONE)
+    for row, cells in enumerate(raw[numeric].fillna("").to_numpy()):
+        for position, cell in zip(numeric, cells):
+            try:
+                float(cell.strip() or "nan")
+            except ValueError:
+                raise InvalidInputTable(f"Invalid number '{cell}' in column "
+                                        + f"{position + 1}, row {row + 2}.",
+                                        f_input)
+    raise error
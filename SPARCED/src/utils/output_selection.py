@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+
+import numpy as np
+
+
+# CUSTOM ERRORS
+
+class InvalidOutputSelection(ValueError):
+    def __init__(self, message: str, name: str):
+        self.message = message
+        self.name = name
+
+    def __str__(self):
+        return("SPARCED ERROR: Invalid output selection.\n"
+             + f"Output: {self.name}\n"
+             + f"Error: {self.message}\n")
+
+# OUTPUT SELECTION
+
+# Functions allowed within observables formulas
+OBSERVABLES_FUNCTIONS = {
+    "abs": np.abs,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "pow": np.power,
+    "sqrt": np.sqrt,
+}
+
+IDENTIFIER = re.compile(r'\b[A-Za-z_][A-Za-z0-9_]*\b')
+
+class OutputSelection:
+    """Subset of the results columns to output
+
+    Note:
+        The time column is always output first. It is followed by the
+        selected columns, in the results order, and then by the
+        observables. Observables formulas may combine any results
+        column and the functions of OBSERVABLES_FUNCTIONS, and are
+        evaluated for a whole chunk of rows at once. Without any
+        species, pattern nor observable, every column is output.
+
+    Attributes:
+        indices: The indices of the results columns to gather, the
+                 selected ones being first.
+        nb_selected: The number of selected results columns, time
+                     included.
+        observables: The compiled observables formulas by observable
+                     ID.
+        positions: The position of each gathered column by name.
+        output_columns: The names of the output columns.
+    """
+
+    def __init__(self, columns: list[str], species: list[str] = None,
+                 patterns: list[str] = None,
+                 observables: dict[str, str] = None):
+        species = set(species or [])
+        patterns = [re.compile(pattern) for pattern in patterns or []]
+        observables = observables or {}
+        unknown = species.difference(columns)
+        if unknown:
+            raise InvalidOutputSelection("Not a species nor a gene.",
+                                         ", ".join(sorted(unknown)))
+        if not (species or patterns or observables):
+            selected = list(range(1, len(columns)))
+        else:
+            selected = [index for index, name in enumerate(columns)
+                        if index > 0 and (name in species or any(
+                            pattern.search(name) for pattern in patterns))]
+        # Columns observables depend on, beyond the selected ones
+        gathered = [0] + selected
+        positions = {columns[index]: position
+                     for position, index in enumerate(gathered)}
+        self.observables = {}
+        for observable_id, formula in observables.items():
+            formula = str(formula).replace('^', '**')
+            for name in IDENTIFIER.findall(formula):
+                if name in OBSERVABLES_FUNCTIONS or name in positions:
+                    continue
+                if name not in columns:
+                    raise InvalidOutputSelection(
+                            f"Unknown identifier {name} in formula {formula}.",
+                            observable_id)
+                positions[name] = len(gathered)
+                gathered.append(columns.index(name))
+            self.observables[observable_id] = compile(formula, observable_id,
+                                                      'eval')
+        self.positions = positions
+        self.indices = np.array(gathered, dtype=int)
+        self.nb_selected = len(selected) + 1
+        self.output_columns = ([columns[index] for index in self.indices[
+                                                        :self.nb_selected]]
+                               + list(self.observables))
+
+    def apply(self, rows: np.ndarray) -> np.ndarray:
+        """Compute the output columns of gathered rows
+
+        Arguments:
+            rows: The rows, restricted to the gathered columns.
+
+        Returns:
+            The output rows.
+        """
+
+        if not self.observables:
+            return rows[:, :self.nb_selected]
+        namespace = {name: rows[:, position]
+                     for name, position in self.positions.items()}
+        namespace.update(OBSERVABLES_FUNCTIONS)
+        outputs = np.empty((len(rows), len(self.output_columns)),
+                           dtype=rows.dtype)
+        outputs[:, :self.nb_selected] = rows[:, :self.nb_selected]
+        for column, formula in enumerate(self.observables.values(),
+                                         start=self.nb_selected):
+            outputs[:, column] = eval(formula, {"__builtins__": {}}, namespace)
+        return outputs
@@ -0,0 +1,436 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import pandas as pd
+
+import constants as const
+from utils.output_selection import OutputSelection
+from utils.results_writer import (OutputOptions, ResultsWriter,
+                                  get_results_writer)
+
+
+# CUSTOM ERRORS
+
+class IncompatibleStatistics(ValueError):
+    def __init__(self, message: str, columns: list[str]):
+        self.message = message
+        self.columns = columns
+
+    def __str__(self):
+        return("SPARCED ERROR: Incompatible population statistics.\n"
+             + f"Columns: {', '.join(self.columns)}\n"
+             + f"Error: {self.message}\n")
+
+# DIGESTS
+
+def compress_digest(values: np.ndarray, weights: np.ndarray,
+                    compression: int) -> tuple[np.ndarray, np.ndarray]:
+    """Compress weighted values into at most compression centroids
+
+    Note:
+        Follows the merging t-digest: values are sorted and grouped
+        according to the arcsine scale function, so that centroids
+        are small near the tails and quantiles there stay accurate.
+        Every leading dimension is an independent digest. Values with
+        a null weight are ignored.
+
+    Arguments:
+        values: The values, digests along the last axis.
+        weights: The weights of the values.
+        compression: The maximum number of centroids per digest.
+
+    Returns:
+        The centroids means and weights, sorted by mean. Unused
+        centroids have a null weight and an infinite mean, and come
+        last.
+    """
+
+    values = np.where(weights > 0, values, np.inf)
+    order = np.argsort(values, axis=-1)
+    values = np.take_along_axis(values, order, axis=-1)
+    weights = np.take_along_axis(weights, order, axis=-1)
+    total = weights.sum(axis=-1, keepdims=True)
+    quantiles = np.divide(np.cumsum(weights, axis=-1) - weights/2, total,
+                          out=np.ones_like(weights), where=total > 0)
+    bins = np.floor(compression*(np.arcsin(2*quantiles - 1)/np.pi + 0.5))
+    bins = np.clip(bins.astype(int), 0, compression - 1)
+    shape = values.shape[:-1] + (compression,)
+    digests = np.arange(int(np.prod(values.shape[:-1])))
+    bins += digests.reshape(values.shape[:-1] + (1,))*compression
+    nb_bins = len(digests)*compression
+    new_weights = np.bincount(bins.ravel(), weights.ravel(), nb_bins)
+    sums = np.bincount(bins.ravel(),
+                       (weights*np.where(weights > 0, values, 0.0)).ravel(),
+                       nb_bins)
+    new_weights = new_weights.reshape(shape)
+    means = np.divide(sums.reshape(shape), new_weights,
+                      out=np.full(shape, np.inf), where=new_weights > 0)
+    order = np.argsort(means, axis=-1, kind='stable')
+    return(np.take_along_axis(means, order, axis=-1),
+           np.take_along_axis(new_weights, order, axis=-1))
+
+def digest_quantiles(means: np.ndarray, weights: np.ndarray,
+                     minimum: np.ndarray, maximum: np.ndarray,
+                     quantiles: list[float]) -> np.ndarray:
+    """Estimate quantiles from compressed digests
+
+    Note:
+        Quantiles are linearly interpolated between the centers of
+        the centroids, and towards the exact extrema in the tails.
+        While every value keeps its own centroid, this matches numpy's
+        'hazen' quantiles.
+
+    Arguments:
+        means: The centroids means, as given by compress_digest.
+        weights: The centroids weights.
+        minimum: The minimum of each digest.
+        maximum: The maximum of each digest.
+        quantiles: The quantiles to estimate, between 0 and 1.
+
+    Returns:
+        The estimated quantiles along an additional last axis, NaN for
+        empty digests.
+    """
+
+    total = weights.sum(axis=-1)
+    padding = np.zeros(total.shape + (1,))
+    # Extrema are centroids of null weight, at both ends of the digest
+    centers = np.concatenate((padding,
+                              np.cumsum(weights, axis=-1) - weights/2,
+                              padding + total[..., None]), axis=-1)
+    means = np.concatenate((minimum[..., None], means, padding), axis=-1)
+    last = (weights > 0).sum(axis=-1, keepdims=True) + 1
+    np.put_along_axis(means, last, maximum[..., None], axis=-1)
+    estimates = np.empty(total.shape + (len(quantiles),))
+    for position, quantile in enumerate(quantiles):
+        target = (quantile*total)[..., None]
+        upper = np.minimum((centers < target).sum(axis=-1, keepdims=True),
+                           last)
+        lower = np.maximum(upper - 1, 0)
+        center_low = np.take_along_axis(centers, lower, axis=-1)
+        center_high = np.take_along_axis(centers, upper, axis=-1)
+        mean_low = np.take_along_axis(means, lower, axis=-1)
+        mean_high = np.take_along_axis(means, upper, axis=-1)
+        fraction = np.divide(target - center_low, center_high - center_low,
+                             out=np.zeros_like(target),
+                             where=center_high > center_low)
+        fraction = np.clip(fraction, 0.0, 1.0)
+        estimate = np.where(fraction > 0,
+                            mean_low + fraction*(mean_high - mean_low),
+                            mean_low)
+        estimates[..., position] = np.where(total > 0, estimate[..., 0],
+                                            np.nan)
+    return(estimates)
+
+# POPULATION STATISTICS
+
+class PopulationStatistics:
+    """Streaming statistics of a population's trajectories
+
+    Note:
+        Each cell adds its trajectory, one row per output time point,
+        without being stored. Means and variances are updated with
+        Welford's algorithm and quantiles are estimated from one
+        t-digest per time point and column. Statistics computed
+        separately (by other workers or MPI ranks) are merged with
+        merge(). Columns are bound upon the first trajectory, or merge,
+        unless given.
+
+        Memory does not depend on the number of cells: each time point
+        and column holds 32 bytes of moments and extrema (float64),
+        8 x compression bytes of centroids (float32 means and weights)
+        and 4 x STATISTICS_BUFFER_SIZE bytes of buffered values, i.e.
+        208 bytes with the defaults. The standard model's 1182 columns
+        over 24 hours, output every 30 seconds, take about 0.7 GB per
+        protocol step; selecting outputs or a larger output stride
+        reduces it proportionally. Float32 weights count cells exactly
+        up to 2**24.
+
+    Attributes:
+        columns: The names of the columns, time excluded.
+        quantiles: The quantiles to estimate, between 0 and 1.
+        compression: The maximum number of centroids per digest.
+        nb_points: The number of time points reached so far.
+        time: The time points.
+        count: The number of cells reaching each time point.
+        mean: The mean of each column at each time point.
+        m2: The sum of squared deviations from the mean.
+        minimum: The minimum of each column at each time point.
+        maximum: The maximum of each column at each time point.
+        centroids: The means of the digests' centroids.
+        weights: The weights of the digests' centroids.
+        buffer: The values waiting to be compressed into the digests.
+        nb_buffered: The number of buffered values per time point.
+    """
+
+    def __init__(self, columns: list[str] = None,
+                 quantiles: list[float] = const.DEFAULT_STATISTICS_QUANTILES,
+                 compression: int = const.DEFAULT_STATISTICS_COMPRESSION):
+        self.columns = None
+        self.quantiles = list(quantiles)
+        self.compression = max(int(compression), 2)
+        self.nb_points = 0
+        if columns is not None:
+            self.bind(columns)
+
+    def bind(self, columns: list[str]) -> None:
+        """Set the columns of the statistics, or check them if already set
+
+        Arguments:
+            columns: The names of the columns, time excluded.
+
+        Returns:
+            Nothing.
+        """
+
+        columns = list(columns)
+        if self.columns is not None:
+            if columns != self.columns:
+                raise IncompatibleStatistics("Columns differ.", columns)
+            return
+        self.columns = columns
+        nb_columns = len(columns)
+        self.time = np.full(0, np.nan)
+        self.count = np.zeros(0, dtype=int)
+        self.mean = np.zeros((0, nb_columns))
+        self.m2 = np.zeros((0, nb_columns))
+        self.minimum = np.full((0, nb_columns), np.inf)
+        self.maximum = np.full((0, nb_columns), -np.inf)
+        self.centroids = np.full((0, nb_columns, self.compression), np.inf,
+                                 dtype=np.float32)
+        self.weights = np.zeros((0, nb_columns, self.compression),
+                                dtype=np.float32)
+        self.buffer = np.zeros((0, nb_columns, const.STATISTICS_BUFFER_SIZE),
+                               dtype=np.float32)
+        self.nb_buffered = np.zeros(0, dtype=int)
+
+    def reserve(self, nb_points: int) -> None:
+        """Make room for the given number of time points
+
+        Arguments:
+            nb_points: The number of time points.
+
+        Returns:
+            Nothing.
+        """
+
+        self.nb_points = max(self.nb_points, nb_points)
+        capacity = len(self.time)
+        if nb_points <= capacity:
+            return
+        extra = max(nb_points, 2*capacity) - capacity
+        def grow(array, fill):
+            padding = np.full((extra,) + array.shape[1:], fill,
+                              dtype=array.dtype)
+            return(np.concatenate((array, padding)))
+        self.time = grow(self.time, np.nan)
+        self.count = grow(self.count, 0)
+        self.mean = grow(self.mean, 0.0)
+        self.m2 = grow(self.m2, 0.0)
+        self.minimum = grow(self.minimum, np.inf)
+        self.maximum = grow(self.maximum, -np.inf)
+        self.centroids = grow(self.centroids, np.inf)
+        self.weights = grow(self.weights, 0.0)
+        self.buffer = grow(self.buffer, 0.0)
+        self.nb_buffered = grow(self.nb_buffered, 0)
+
+    def add_rows(self, offset: int, rows: np.ndarray) -> None:
+        """Add part of one cell's trajectory
+
+        Arguments:
+            offset: The index of the first row's time point.
+            rows: The rows of the trajectory, time first.
+
+        Returns:
+            Nothing.
+        """
+
+        rows = np.asarray(rows, dtype=np.float64)
+        if len(rows) == 0:
+            return
+        if rows.shape[1] != len(self.columns) + 1:
+            raise IncompatibleStatistics("Unexpected number of columns.",
+                                         self.columns)
+        points = slice(offset, offset + len(rows))
+        self.reserve(points.stop)
+        values = rows[:, 1:]
+        self.time[points] = rows[:, 0]
+        self.count[points] += 1
+        delta = values - self.mean[points]
+        self.mean[points] += delta/self.count[points, None]
+        self.m2[points] += delta*(values - self.mean[points])
+        np.minimum(self.minimum[points], values, out=self.minimum[points])
+        np.maximum(self.maximum[points], values, out=self.maximum[points])
+        indices = np.arange(points.start, points.stop)
+        self.buffer[indices, :, self.nb_buffered[indices]] = values
+        self.nb_buffered[indices] += 1
+        full = indices[self.nb_buffered[indices]
+                       == const.STATISTICS_BUFFER_SIZE]
+        if len(full):
+            self.compress(full)
+
+    def digest(self, indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Gather the centroids and buffered values of some time points
+
+        Arguments:
+            indices: The indices of the time points.
+
+        Returns:
+            The values and their weights, digests along the last axis.
+        """
+
+        buffered = (np.arange(const.STATISTICS_BUFFER_SIZE)
+                    < self.nb_buffered[indices, None])
+        buffered = np.broadcast_to(buffered[:, None, :],
+                                   self.buffer[indices].shape)
+        values = np.concatenate((self.centroids[indices],
+                                 self.buffer[indices]), axis=-1)
+        weights = np.concatenate((self.weights[indices],
+                                  buffered.astype(np.float32)), axis=-1)
+        return(values, weights)
+
+    def compress(self, indices: np.ndarray) -> None:
+        """Compress the buffered values of some time points
+
+        Arguments:
+            indices: The indices of the time points.
+
+        Returns:
+            Nothing.
+        """
+
+        values, weights = self.digest(indices)
+        self.centroids[indices], self.weights[indices] = compress_digest(
+                                            values, weights, self.compression)
+        self.nb_buffered[indices] = 0
+
+    def flush(self) -> None:
+        """Compress every buffered value
+
+        Returns:
+            Nothing.
+        """
+
+        if self.columns is None:
+            return
+        indices = np.flatnonzero(self.nb_buffered[:self.nb_points])
+        if len(indices):
+            self.compress(indices)
+
+    def merge(self, other: "PopulationStatistics") -> None:
+        """Add the cells of other statistics
+
+        Arguments:
+            other: The statistics to merge, left unchanged.
+
+        Returns:
+            Nothing.
+        """
+
+        if other.columns is None:
+            return
+        if self.compression != other.compression:
+            raise IncompatibleStatistics("Compressions differ.",
+                                         other.columns)
+        self.bind(other.columns)
+        self.reserve(other.nb_points)
+        points = slice(0, other.nb_points)
+        count = self.count[points] + other.count[points]
+        ratio = np.divide(other.count[points], count,
+                          out=np.zeros(len(count)), where=count > 0)[:, None]
+        delta = other.mean[points] - self.mean[points]
+        self.m2[points] += (other.m2[points]
+                            + delta**2*self.count[points, None]*ratio)
+        self.mean[points] += delta*ratio
+        self.time[points] = np.where(other.count[points] > 0,
+                                     other.time[points], self.time[points])
+        self.count[points] = count
+        np.minimum(self.minimum[points], other.minimum[points],
+                   out=self.minimum[points])
+        np.maximum(self.maximum[points], other.maximum[points],
+                   out=self.maximum[points])
+        indices = np.arange(other.nb_points)
+        values, weights = self.digest(indices)
+        other_values, other_weights = other.digest(indices)
+        self.centroids[points], self.weights[points] = compress_digest(
+                        np.concatenate((values, other_values), axis=-1),
+                        np.concatenate((weights, other_weights), axis=-1),
+                        self.compression)
+        self.nb_buffered[points] = 0
+
+    def summary(self) -> pd.DataFrame:
+        """Summarize the population at each time point
+
+        Note:
+            Variances are unbiased sample variances, null below two
+            cells.
+
+        Returns:
+            A dataframe with one row per time point, holding the time,
+            the number of cells and, for each column, its mean,
+            variance and quantiles.
+        """
+
+        if self.columns is None:
+            return(pd.DataFrame(columns=['time', 'count']))
+        self.flush()
+        points = slice(0, self.nb_points)
+        count = self.count[points]
+        variance = np.divide(self.m2[points], (count - 1)[:, None],
+                             out=np.zeros_like(self.m2[points]),
+                             where=(count > 1)[:, None])
+        quantiles = digest_quantiles(self.centroids[points],
+                                     self.weights[points],
+                                     self.minimum[points],
+                                     self.maximum[points], self.quantiles)
+        table = np.concatenate((self.mean[points, :, None],
+                                variance[:, :, None], quantiles), axis=-1)
+        statistics = (['mean', 'variance']
+                      + [f'q{quantile:g}' for quantile in self.quantiles])
+        columns = ([f'{column}_{statistic}' for column in self.columns
+                    for statistic in statistics])
+        summary = pd.DataFrame(table.reshape(self.nb_points, -1),
+                               columns=columns)
+        summary.insert(0, 'count', count)
+        summary.insert(0, 'time', self.time[points])
+        return(summary)
+
+    def write(self, file_path: str | os.PathLike,
+              options: OutputOptions = OutputOptions()) -> None:
+        """Write the summary of the statistics to a results file
+
+        Arguments:
+            file_path: The path of the output file.
+            options: The output options, giving the format and precision.
+
+        Returns:
+            Nothing.
+        """
+
+        summary = self.summary()
+        writer = get_results_writer(options.format)
+        rows = summary.to_numpy(dtype=np.float64)
+        with writer(file_path, list(summary.columns), options) as output:
+            output.append_rows(rows[:, 0], rows[:, 1:],
+                               np.empty((len(rows), 0)))
+
+class StatisticsWriter(ResultsWriter):
+    """Add one cell's results to population statistics, instead of a file
+
+    Note:
+        The output selection applies as for files, so that statistics
+        only cover the selected columns and observables.
+    """
+
+    def __init__(self, statistics: PopulationStatistics, columns: list[str],
+                 options: OutputOptions = OutputOptions(),
+                 selection: OutputSelection = None):
+        super().__init__(None, columns, options, selection)
+        statistics.bind(self.columns[1:])
+        self.statistics = statistics
+
+    def write_chunk(self, rows: np.ndarray) -> None:
+        self.statistics.add_rows(self.nb_written, rows)
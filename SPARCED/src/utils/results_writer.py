@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import zipfile
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import constants as const
+from utils.output_selection import OutputSelection
+
+
+# CUSTOM ERRORS
+
+class UnknownOutputFormat(ValueError):
+    def __init__(self, message: str, output_format: str):
+        self.message = message
+        self.output_format = output_format
+
+    def __str__(self):
+        return("SPARCED ERROR: Unknown output format.\n"
+             + f"Output format: {self.output_format}\n"
+             + f"Error: {self.message}\n")
+
+class MissingOutputPackage(ValueError):
+    def __init__(self, message: str, output_format: str, package: str):
+        self.message = message
+        self.output_format = output_format
+        self.package = package
+
+    def __str__(self):
+        return("SPARCED ERROR: Missing package for the output format.\n"
+             + f"Output format: {self.output_format}\n"
+             + f"Package: {self.package}\n"
+             + f"Error: {self.message}\n")
+
+def import_h5py():
+    """Import the h5py package, needed by the HDF5 output format
+
+    Returns:
+        The h5py module.
+    """
+
+    try:
+        import h5py
+    except ImportError:
+        raise MissingOutputPackage("Install it (pip install h5py) or "
+                                   + "choose another output format.",
+                                   const.OUTPUT_FORMAT_HDF5, "h5py")
+    return(h5py)
+
+# OUTPUT OPTIONS
+
+@dataclass
+class OutputOptions:
+    format: str = const.OUTPUT_FORMAT_TSV
+    precision: str = const.OUTPUT_PRECISION_DOUBLE
+    compression: bool = False
+    chunk_size: int = const.DEFAULT_OUTPUT_CHUNK_SIZE
+    stride: int = 1
+    times: list[float] | None = None
+    species: list[str] | None = None
+    patterns: list[str] | None = None
+    observables: dict[str, str] | None = None
+
+    def build_selection(self, columns: list[str]) -> OutputSelection | None:
+        """Build the output selection among the given results columns
+
+        Arguments:
+            columns: The results columns names.
+
+        Returns:
+            The output selection, None if every column is output.
+        """
+
+        if not (self.species or self.patterns or self.observables):
+            return(None)
+        return(OutputSelection(columns, self.species, self.patterns,
+                               self.observables))
+
+def build_results_columns(species_names: list[str]) -> list[str]:
+    """Build the columns names of simulation results
+
+    Note:
+        Results hold the time, every species and then the active (ag_)
+        and inactive (ig_) genes of each mRNA. The first species
+        matching the mRNA prefix (Baxm_Bcl2) is not an mRNA and is
+        skipped.
+
+    Arguments:
+        species_names: The model's species names.
+
+    Returns:
+        The results columns names.
+    """
+
+    genes = [name for name in species_names if const.MRNA_PREFIX in name][1:]
+    active = [name.replace(const.MRNA_PREFIX, 'ag_') for name in genes]
+    inactive = [name.replace(const.MRNA_PREFIX, 'ig_') for name in genes]
+    return ['time'] + list(species_names) + active + inactive
+
+# WRITERS
+
+class ResultsWriter:
+    """Stream simulation results to a file, chunk by chunk
+
+    Note:
+        Rows are buffered into a fixed-size chunk which is written to
+        the file whenever it is full, so that memory usage does not
+        depend on the simulation's duration. With an output selection,
+        only the columns it needs are buffered and the output columns
+        are computed chunk by chunk. Subclasses implement the file
+        format.
+
+    Attributes:
+        file_path: The path of the output file.
+        columns: The output columns names.
+        selection: The output selection, None to output every column.
+        precision: The floating point precision of the output.
+        row: The full results row being gathered, with a selection.
+        chunk: The buffer of rows waiting to be written.
+        nb_buffered: The number of rows in the buffer.
+        nb_written: The number of rows already written.
+    """
+
+    extension = None
+
+    def __init__(self, file_path: str | os.PathLike, columns: list[str],
+                 options: OutputOptions = OutputOptions(),
+                 selection: OutputSelection = None):
+        self.file_path = file_path
+        self.selection = selection
+        self.precision = options.precision
+        self.row = np.empty(len(columns))
+        if selection is not None:
+            self.columns = selection.output_columns
+            nb_buffered_columns = len(selection.indices)
+        else:
+            self.columns = columns
+            nb_buffered_columns = len(columns)
+        self.chunk = np.empty((max(int(options.chunk_size), 1),
+                               nb_buffered_columns))
+        self.nb_buffered = 0
+        self.nb_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+    def append(self, time: float, species: np.ndarray,
+               genes: np.ndarray) -> None:
+        """Add one time point to the results
+
+        Arguments:
+            time: The time point.
+            species: The species concentrations.
+            genes: The active and inactive genes.
+
+        Returns:
+            Nothing.
+        """
+
+        row = self.row if self.selection else self.chunk[self.nb_buffered]
+        row[0] = time
+        row[1:1+len(species)] = species
+        row[1+len(species):] = genes
+        if self.selection is not None:
+            self.chunk[self.nb_buffered] = row[self.selection.indices]
+        self.nb_buffered += 1
+        if self.nb_buffered == len(self.chunk):
+            self.flush()
+
+    def append_rows(self, time: np.ndarray, species: np.ndarray,
+                    genes: np.ndarray) -> None:
+        """Add several time points to the results
+
+        Arguments:
+            time: The time points.
+            species: The species concentrations, one row per time point.
+            genes: The active and inactive genes, one row per time point.
+
+        Returns:
+            Nothing.
+        """
+
+        for row in range(len(time)):
+            self.append(time[row], species[row], genes[row])
+
+    def flush(self) -> None:
+        """Write the buffered rows to the file
+
+        Returns:
+            Nothing.
+        """
+
+        if self.nb_buffered == 0:
+            return
+        rows = self.chunk[:self.nb_buffered]
+        if self.selection is not None:
+            rows = self.selection.apply(rows)
+        self.write_chunk(rows.astype(self.precision, copy=False))
+        self.nb_written += self.nb_buffered
+        self.nb_buffered = 0
+
+    def write_chunk(self, rows: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Write the remaining buffered rows and close the file
+
+        Returns:
+            Nothing.
+        """
+
+        self.flush()
+
+class TsvResultsWriter(ResultsWriter):
+    """Tab separated text results, identical to a pandas export"""
+
+    extension = const.DEFAULT_OUTPUT_FILE_EXTENSION
+
+    def __init__(self, file_path: str | os.PathLike, columns: list[str],
+                 options: OutputOptions = OutputOptions(),
+                 selection: OutputSelection = None):
+        super().__init__(file_path, columns, options, selection)
+        # Header
+        pd.DataFrame(columns=self.columns).to_csv(self.file_path, sep='\t')
+
+    def write_chunk(self, rows: np.ndarray) -> None:
+        index = range(self.nb_written, self.nb_written + len(rows))
+        frame = pd.DataFrame(rows, columns=self.columns, index=index)
+        frame.to_csv(self.file_path, sep='\t', mode='a', header=False)
+
+class NpzResultsWriter(ResultsWriter):
+    """NumPy archive results, holding one array per chunk
+
+    Note:
+        Columns names are stored once, in the 'columns' array. Chunks
+        are stored in order as 'chunk_0', 'chunk_1', etc. The archive
+        is only open while a chunk is written, so that populations of
+        writers do not hold file descriptors.
+    """
+
+    extension = const.OUTPUT_FILE_EXTENSION_NPZ
+
+    def __init__(self, file_path: str | os.PathLike, columns: list[str],
+                 options: OutputOptions = OutputOptions(),
+                 selection: OutputSelection = None):
+        super().__init__(file_path, columns, options, selection)
+        self.compression = zipfile.ZIP_STORED
+        if options.compression:
+            self.compression = zipfile.ZIP_DEFLATED
+        self.write_array('columns', np.array(self.columns), mode='w')
+        self.nb_chunks = 0
+
+    def write_array(self, name: str, array: np.ndarray,
+                    mode: str = 'a') -> None:
+        with zipfile.ZipFile(self.file_path, mode=mode,
+                             compression=self.compression) as archive:
+            with archive.open(name + '.npy', mode='w',
+                              force_zip64=True) as array_file:
+                np.lib.format.write_array(array_file,
+                                          np.ascontiguousarray(array),
+                                          allow_pickle=False)
+
+    def write_chunk(self, rows: np.ndarray) -> None:
+        self.write_array(f'chunk_{self.nb_chunks}', rows)
+        self.nb_chunks += 1
+
+class Hdf5ResultsWriter(ResultsWriter):
+    """HDF5 results, held in one resizable 'results' dataset
+
+    Note:
+        Columns names are stored once, in the 'columns' string
+        dataset: unlike attributes, datasets are not limited to 64 kB,
+        so that models with thousands of species can be saved. The
+        file is only open while a chunk is written, so that
+        populations of writers do not hold file descriptors. Requires
+        the h5py package.
+    """
+
+    extension = const.OUTPUT_FILE_EXTENSION_HDF5
+
+    def __init__(self, file_path: str | os.PathLike, columns: list[str],
+                 options: OutputOptions = OutputOptions(),
+                 selection: OutputSelection = None):
+        self.h5py = import_h5py()
+        super().__init__(file_path, columns, options, selection)
+        with self.h5py.File(self.file_path, mode='w') as results:
+            results.create_dataset(
+                            'results', shape=(0, len(self.columns)),
+                            maxshape=(None, len(self.columns)),
+                            chunks=(len(self.chunk), len(self.columns)),
+                            dtype=self.precision,
+                            compression='gzip' if options.compression else None)
+            results.create_dataset('columns', data=self.columns,
+                                   dtype=self.h5py.string_dtype())
+
+    def write_chunk(self, rows: np.ndarray) -> None:
+        with self.h5py.File(self.file_path, mode='a') as results:
+            dataset = results['results']
+            dataset.resize(self.nb_written + len(rows), axis=0)
+            dataset[self.nb_written:] = rows
+
+RESULTS_WRITERS = {
+    const.OUTPUT_FORMAT_TSV: TsvResultsWriter,
+    const.OUTPUT_FORMAT_NPZ: NpzResultsWriter,
+    const.OUTPUT_FORMAT_HDF5: Hdf5ResultsWriter,
+}
+
+def get_results_writer(output_format: str) -> type[ResultsWriter]:
+    """Get the results writer of an output format
+
+    Arguments:
+        output_format: The output format.
+
+    Returns:
+        The results writer class.
+    """
+
+    if output_format not in RESULTS_WRITERS:
+        raise UnknownOutputFormat(
+                    f"Expected one of {', '.join(RESULTS_WRITERS)}.",
+                    output_format)
+    if output_format == const.OUTPUT_FORMAT_HDF5:
+        import_h5py() # Fail early without h5py
+    return(RESULTS_WRITERS[output_format])
+
+def load_results(file_path: str | os.PathLike) -> pd.DataFrame:
+    """Load simulation results, whatever their output format
+
+    Arguments:
+        file_path: The path of the results file.
+
+    Returns:
+        A dataframe with one row per time point.
+    """
+
+    file_path = str(file_path)
+    if file_path.endswith(const.OUTPUT_FILE_EXTENSION_NPZ):
+        with np.load(file_path) as results:
+            chunks = sorted((name for name in results.files
+                             if name.startswith('chunk_')),
+                            key=lambda name: int(name[len('chunk_'):]))
+            columns = list(results['columns'])
+            rows = np.concatenate([results[name] for name in chunks]
+                                  or [np.empty((0, len(columns)))])
+        return(pd.DataFrame(rows, columns=columns))
+    if file_path.endswith(const.OUTPUT_FILE_EXTENSION_HDF5):
+        h5py = import_h5py()
+        with h5py.File(file_path, mode='r') as results:
+            columns = [name.decode() if isinstance(name, bytes) else name
+                       for name in results['columns'][:]]
+            return(pd.DataFrame(results['results'][:], columns=columns))
+    return(pd.read_csv(file_path, sep='\t', index_col=0))
@@ -3,7 +3,7 @@ import sys
 import pickle
 import importlib
 from benchmark_utils.job_organization import Organizer as org
-from benchmark_utils.arguements import parse_args
+from benchmark_utils.arguements import parse_args, sparced_root
 from benchmark_utils.utils import Utils
 from benchmark_utils.sparced_simulation import Simulation
 from benchmark_utils.observable_calc import ObservableCalculator
@@ -12,6 +12,8 @@ args = parse_args()
 
 # Append utilities and model directories to the path
 sys.path.append(args.model)
+sys.path.append(os.path.join(sparced_root, 'SPARCED', 'src'))
+parameters = importlib.import_module('simulation.parameters')
 
 Utils._add_amici_path(args.model) 
 
@@ -101,7 +103,8 @@ class RunBenchmark:
         self.communicator.Barrier()
 
         # Create an instance of the AMICI model. 
-        self.model = SPARCED.getModel()
+        # Parameters may have changed since the AMICI build was compiled
+        self.model = parameters.load_amici_model(SPARCED, args.model)
         solver = self.model.getSolver()
         solver.setMaxSteps = 1e10
 
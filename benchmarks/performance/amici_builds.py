@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare AMICI builds of a model under different compilation options
+
+The SBML model is compiled once per variant: the default build (AMICI's
+own defaults), one with every rate parameter compiled as a constant, and
+one with moiety conservation laws kept (full) or eliminated (reduced).
+Each build records its compilation time, the size of its compiled
+extension, its number of integrated states and the mean duration of one
+exchange step (30 s of simulated time, deterministic). Every build's
+final states are compared with the first variant's to check the full
+state vector is recovered.
+
+Status: this comparison has NOT been done. The script needs the AMICI
+version pinned in requirements.txt (0.11.12), which was not available
+when it was written, so it has never been run and no results are
+committed. Whether constant parameters or conservation laws elimination
+speed up SPARCED models is therefore unknown: neither option makes a
+performance claim. By default, no parameter is compiled as a constant
+and conservation laws follow AMICI's own default.
+
+Usage:
+    python benchmarks/performance/amici_builds.py \
+        --model SPARCED/models/SPARCED_standard --steps 120 \
+        --variants default constant full reduced \
+        --output amici_builds.json
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import amici
+import numpy as np
+
+SRC = Path(__file__).resolve().parents[2] / "SPARCED" / "src"
+sys.path.insert(0, str(SRC))
+
+import constants as const  # noqa: E402
+from compilation.conversion_scripts import (  # noqa: E402
+    convert_sbml_to_amici,
+    select_constant_parameters,
+)
+from compilation.sbml_scripts.creation import build_sbml_model_path  # noqa: E402
+from simulation.integration import (  # noqa: E402
+    count_full_states,
+    create_solver,
+    read_final_states,
+)
+
+# Compilation options of each variant (see config.yaml)
+VARIANTS = {
+    "default": {},
+    "constant": {const.YAML_COMPILATION_CONSTANT_PARAMETERS:
+                 const.CONSTANT_PARAMETERS_ALL},
+    "full": {const.YAML_COMPILATION_CONSERVATION_LAWS: False},
+    "reduced": {const.YAML_COMPILATION_CONSERVATION_LAWS: True},
+}
+
+
+def extension_size(amici_folder: Path) -> int:
+    """Total size (in bytes) of the compiled extension of an AMICI model"""
+
+    return(sum(library.stat().st_size
+               for library in amici_folder.rglob("*.so")))
+
+def exchange_step(model, solver, states: np.ndarray,
+                  nb_states: int) -> np.ndarray:
+    """Integrate one exchange step from the given states, as RunSPARCED"""
+
+    model.setInitialStates(states)
+    rdata = amici.runAmiciSimulation(model, solver)
+    return(read_final_states(rdata, nb_states))
+
+def benchmark_variant(sbml_file: Path, model_name: str, build_path: Path,
+                      options: dict, nb_steps: int,
+                      exchange: float) -> tuple[dict[str, float], np.ndarray]:
+    """Compile one variant of the model and time its exchange steps
+
+    Arguments:
+        sbml_file: The path towards the SBML file.
+        model_name: The name of the variant's AMICI module.
+        build_path: The directory to compile the variant in.
+        options: The variant's compilation options.
+        nb_steps: The number of exchange steps to time.
+        exchange: The duration of an exchange step (in seconds).
+
+    Returns:
+        The variant's measures and its final (full) state vector.
+    """
+
+    constant_parameters = select_constant_parameters(
+        sbml_file, options.get(const.YAML_COMPILATION_CONSTANT_PARAMETERS))
+    conservation_laws = options.get(const.YAML_COMPILATION_CONSERVATION_LAWS)
+    start = time.perf_counter()
+    amici_folder = convert_sbml_to_amici(sbml_file, model_name, build_path,
+                                         False, constant_parameters,
+                                         conservation_laws)
+    compile_time = time.perf_counter() - start
+    sys.path.insert(0, str(amici_folder))
+    model = importlib.import_module(model_name).getModel()
+    model.setTimepoints(np.linspace(0, exchange, 2))
+    solver = create_solver(model)
+    states = np.array(model.getInitialStates())
+    nb_states = count_full_states(model, states)
+    states = exchange_step(model, solver, states, nb_states)  # Warm-up
+    start = time.perf_counter()
+    for _ in range(nb_steps):
+        states = exchange_step(model, solver, states, nb_states)
+    step_time = (time.perf_counter() - start)/nb_steps
+    return({"constant_parameters": len(constant_parameters),
+            "full_states": model.nx_rdata,
+            "integrated_states": model.nx_solver,
+            "compile_time_s": compile_time,
+            "extension_size_mb": extension_size(amici_folder)/2**20,
+            "step_time_ms": 1e3*step_time}, states)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", required=True,
+                        help="path to the model's directory, holding its "
+                             "compiled SBML file")
+    parser.add_argument("--steps", type=int, default=120,
+                        help="number of exchange steps to time")
+    parser.add_argument("--exchange", type=float, default=30.0,
+                        help="duration of an exchange step (s)")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS),
+                        default=list(VARIANTS),
+                        help="compilation variants to compare")
+    parser.add_argument("--output", help="JSON file to record the results")
+    args = parser.parse_args()
+    model_path = Path(args.model)
+    sbml_file = build_sbml_model_path(model_path.name, model_path)
+    results = {}
+    final_states = {}
+    with tempfile.TemporaryDirectory() as build_directory:
+        for variant in args.variants:
+            results[variant], final_states[variant] = benchmark_variant(
+                                    sbml_file,
+                                    f"{model_path.name}_{variant}",
+                                    Path(build_directory), VARIANTS[variant],
+                                    args.steps, args.exchange)
+            if variant != args.variants[0]:
+                # Relative deviation from the first variant's trajectory
+                reference = final_states[args.variants[0]]
+                results[variant]["max_relative_deviation"] = float(np.max(
+                    np.abs(final_states[variant] - reference)
+                    / np.maximum(np.abs(reference), 1e-12)))
+            print(f"{variant}: " + ", ".join(
+                f"{name}={value:.4g}" for name, value
+                in results[variant].items()))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
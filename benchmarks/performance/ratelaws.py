@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Time the rewriting of ratelaws formulas into Antimony reactions
+
+The ratelaws are rewritten twice: with the former per-parameter regular
+expressions (one compiled pattern and one str.replace per match and per
+parameter) and with the single-pass tokenizer of read_reactions. Both
+must produce the same formulas. The whole read_reactions (parameters
+file included, input table cached) is timed as well. The benchmark runs
+on the model's ratelaws file, on a synthetic file repeating its rows up
+to the requested number of reactions, and on a single formula with many
+parameters, where the former rewriting grows quadratically.
+
+Usage:
+    python benchmarks/performance/ratelaws.py \
+        --model SPARCED/models/SPARCED_standard --reactions 100000 \
+        --parameters 500 --output ratelaws.json
+"""
+
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC = Path(__file__).resolve().parents[2] / "SPARCED" / "src"
+sys.path.insert(0, str(SRC))
+
+import constants as const  # noqa: E402
+from compilation.antimony_scripts.reactions import (  # noqa: E402
+    read_reactions,
+    rewrite_ratelaw,
+)
+from Model import Model as SparcedModel  # noqa: E402
+from utils.input_tables import RATELAWS_SCHEMA, load_input_table  # noqa: E402
+
+
+def legacy_rewrite(formula: str, reaction_nb: int, params: np.ndarray) -> str:
+    """Rewrite a ratelaw as read_reactions formerly did"""
+
+    if len(params) == 1:
+        name = f"k{reaction_nb}_1"
+        for match in re.compile(r"k\D*\d*").finditer(formula):
+            formula = formula.replace(match.group(), name)
+    else:
+        for j in range(1, len(params) + 1):
+            name = f"k{reaction_nb}_{j}"
+            for match in re.compile(f"k(\\D*)\\d*_{j}").finditer(formula):
+                formula = formula.replace(match.group(), name)
+    return(formula)
+
+def write_synthetic_ratelaws(f_ratelaws: Path, f_output: Path,
+                             nb_reactions: int) -> None:
+    """Repeat the rows of a ratelaws file up to a number of reactions"""
+
+    with open(f_ratelaws) as file:
+        header, *rows = file.read().splitlines()
+    with open(f_output, "w") as output:
+        output.write(header + "\n")
+        for row_nb in range(nb_reactions):
+            name, rest = rows[row_nb % len(rows)].split("\t", 1)
+            output.write(f"{name}_{row_nb // len(rows)}\t{rest}\n")
+
+def time_best(function, repeats: int) -> float:
+    """Best duration (in seconds) of a function over several calls"""
+
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return(min(durations))
+
+def benchmark_ratelaws(f_ratelaws: Path, repeats: int) -> dict[str, float]:
+    """Time both rewritings and read_reactions on a ratelaws file
+
+    Arguments:
+        f_ratelaws: The ratelaws input file.
+        repeats: The number of calls, the best one being kept.
+
+    Returns:
+        The measures.
+    """
+
+    ratelaws = load_input_table(f_ratelaws, RATELAWS_SCHEMA)
+    formulas = [(formula, row_nb + 1, values[~np.isnan(values)])
+                for row_nb, (formula, values)
+                in enumerate(zip(ratelaws["ratelaw"], ratelaws.extra))
+                if "k" in formula]
+    legacy = [legacy_rewrite(*formula) for formula in formulas]
+    single_pass = [rewrite_ratelaw(formula, reaction_nb, len(params))
+                   for formula, reaction_nb, params in formulas]
+    with tempfile.TemporaryDirectory() as directory:
+        f_parameters = Path(directory) / "parameters.txt"
+        return({"reactions": len(ratelaws),
+                "formulas": len(formulas),
+                "mismatches": sum(old != new for old, new
+                                  in zip(legacy, single_pass)),
+                "legacy_rewrite_ms": 1e3*time_best(
+                    lambda: [legacy_rewrite(*formula)
+                             for formula in formulas], repeats),
+                "single_pass_rewrite_ms": 1e3*time_best(
+                    lambda: [rewrite_ratelaw(formula, reaction_nb,
+                                             len(params))
+                             for formula, reaction_nb, params in formulas],
+                    repeats),
+                "read_reactions_ms": 1e3*time_best(
+                    lambda: read_reactions(f_ratelaws, f_parameters),
+                    repeats)})
+
+def benchmark_wide_formula(nb_params: int, repeats: int) -> dict[str, float]:
+    """Time both rewritings of one formula with many parameters
+
+    Arguments:
+        nb_params: The number of parameters of the formula.
+        repeats: The number of calls, the best one being kept.
+
+    Returns:
+        The measures.
+    """
+
+    formula = "+".join(f"kX_{j}*A{j}" for j in range(1, nb_params + 1))
+    params = np.ones(nb_params)
+    return({"parameters": nb_params,
+            "mismatches": int(legacy_rewrite(formula, 1, params)
+                              != rewrite_ratelaw(formula, 1, nb_params)),
+            "legacy_rewrite_ms": 1e3*time_best(
+                lambda: legacy_rewrite(formula, 1, params), repeats),
+            "single_pass_rewrite_ms": 1e3*time_best(
+                lambda: rewrite_ratelaw(formula, 1, nb_params), repeats)})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", required=True,
+                        help="path to the model's directory")
+    parser.add_argument("--config", default=const.DEFAULT_CONFIG_FILE,
+                        help="name of the model's configuration file")
+    parser.add_argument("--reactions", type=int, default=100000,
+                        help="number of reactions of the synthetic file")
+    parser.add_argument("--parameters", type=int, default=500,
+                        help="number of parameters of the wide formula")
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="number of timed calls, the best one is kept")
+    parser.add_argument("--output", help="JSON file to record the results")
+    args = parser.parse_args()
+    model_path = Path(args.model)
+    model = SparcedModel(model_path.name, model_path.parent, args.config)
+    f_ratelaws = Path(model.compilation_files[const.YAML_RATELAWS])
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        f_synthetic = Path(directory) / "ratelaws.txt"
+        write_synthetic_ratelaws(f_ratelaws, f_synthetic, args.reactions)
+        for name, path in [(model_path.name, f_ratelaws),
+                           ("synthetic", f_synthetic)]:
+            results[name] = benchmark_ratelaws(path, args.repeats)
+    results["wide_formula"] = benchmark_wide_formula(args.parameters,
+                                                     args.repeats)
+    for name, measures in results.items():
+        print(f"{name}: " + ", ".join(f"{measure}={value:.4g}"
+                                      for measure, value in measures.items()))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
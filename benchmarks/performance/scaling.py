@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure how compilation and simulation scale with the model's size
+
+Synthetic models (see synthetic_model.py) of increasing sizes go through
+each stage of compile_model: Antimony file and SBML conversion (or the
+libSBML backend's SBML file), AMICI build, metadata and SGE plan. A
+short deterministic RunSPARCED simulation follows. Each stage runs in
+its own process, so that its peak resident memory is its own: the wall
+time, the CPU time (the process' and its children's, e.g. the C++
+compiler's) and the peak RSS (the process' and its largest child's, a
+forked child counting at least the memory it was forked with) are
+recorded. A stage failing or running past the timeout skips the stages
+reading its artifacts.
+
+Between two consecutive sizes, each stage's scaling exponent
+log(t2/t1)/log(n2/n1) is reported: about 1 for a stage scaling
+linearly with the number of species, and the first size where it
+exceeds --superlinear tells where the stage stops scaling. Stages
+shorter than --min-time are too noisy to be flagged.
+
+Usage:
+    python benchmarks/performance/scaling.py \
+        --species 250 500 1000 2000 4000 --hours 0.5 \
+        --output scaling.json
+"""
+
+import argparse
+import importlib
+import json
+import math
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+SRC = Path(__file__).resolve().parents[2] / "SPARCED" / "src"
+sys.path.insert(0, str(SRC))
+
+import constants as const  # noqa: E402
+from synthetic_model import CONFIG_FILE, generate_model  # noqa: E402
+
+# Standard model's proportions: 914 species (141 mRNAs), 2,438 ratelaws
+REACTIONS_PER_SPECIES = 2.7
+GENES_PER_SPECIES = 0.15
+# Stages of each backend, in compilation order
+STAGES = {
+    const.COMPILATION_BACKEND_ANTIMONY: ["antimony", "sbml"],
+    const.COMPILATION_BACKEND_LIBSBML: ["libsbml"],
+}
+RUNTIME_STAGES = ["amici", "metadata", "simulation"]
+# Stages whose artifacts each stage reads ("sbml" standing for the last
+# stage of the backend)
+REQUIREMENTS = {
+    "sbml": ["antimony"],
+    "amici": ["sbml"],
+    "metadata": ["sbml"],
+    "simulation": ["amici", "metadata"],
+}
+
+
+def prepare_stage(stage: str, model_path: Path,
+                  hours: float) -> Callable[[], None]:
+    """Prepare one stage of a model's compilation or simulation
+
+    Note:
+        SPARCED modules are imported and the model is loaded here, so
+        that only the stage itself is measured. The stage reads the
+        artifacts of the previous ones from the model's folder, as
+        compile_model does.
+
+    Arguments:
+        stage: The name of the stage.
+        model_path: The path towards the model's folder.
+        hours: The duration of the simulation stage (in hours).
+
+    Returns:
+        The stage, to be called without arguments.
+    """
+
+    from compilation.amici_scripts.creation import amici_create_folder
+    from compilation.antimony_scripts.creation import (
+        antimony_create_file,
+        build_antimony_file_path,
+    )
+    from compilation.conversion_scripts import (
+        convert_antimony_to_sbml,
+        convert_sbml_to_amici,
+        select_constant_parameters,
+    )
+    from compilation.sbml_scripts.annotations import sbml_annotate_model
+    from compilation.sbml_scripts.construction import sbml_create_file
+    from compilation.sbml_scripts.creation import build_sbml_model_path
+    from compilation.sbml_scripts.metadata import (
+        load_model_metadata,
+        write_model_metadata,
+    )
+    from Model import Model as SparcedModel
+    from simulation.parameters import load_amici_model
+    from simulation.plan import load_sge_plan
+    from simulation.RunSPARCED import RunSPARCED
+    from utils.input_tables import SPECIES_SCHEMA, load_input_table
+
+    model = SparcedModel(model_path.name, model_path.parent, CONFIG_FILE)
+    sbml_file_path = build_sbml_model_path(model.name, model.path)
+    f_genereg = model.simulation_files[const.YAML_GENES_REGULATION]
+
+    def sbml():
+        convert_antimony_to_sbml(
+            build_antimony_file_path(model.name, model.path), model.name,
+            model.path, False)
+        species = load_input_table(model.compilation_files[const.YAML_SPECIES],
+                                   SPECIES_SCHEMA)
+        sbml_annotate_model(str(sbml_file_path), model.compartments, species)
+
+    def amici():
+        convert_sbml_to_amici(
+            sbml_file_path, model.name, model.path, False,
+            select_constant_parameters(sbml_file_path, None))
+
+    def metadata():
+        load_sge_plan(model.name, model.path, model.simulation_files,
+                      write_model_metadata(sbml_file_path, model.name,
+                                           model.path, f_genereg))
+
+    def simulation():
+        sys.path.insert(0, str(amici_create_folder(model.name, model.path)))
+        metadata = load_model_metadata(model.name, model.path,
+                                       sbml_file_path, f_genereg)
+        amici_model = load_amici_model(importlib.import_module(model.name),
+                                       model.path, metadata)
+        amici_model.setTimepoints(np.linspace(0, 30, 2))
+        plan = load_sge_plan(model.name, model.path, model.simulation_files,
+                             metadata)
+        RunSPARCED(1, hours, [], [], amici_model, plan,
+                   np.random.default_rng(0))
+
+    stages = {"antimony": lambda: antimony_create_file(model),
+              "sbml": sbml,
+              "libsbml": lambda: sbml_create_file(model),
+              "amici": amici,
+              "metadata": metadata,
+              "simulation": simulation}
+    if stage not in stages:
+        raise ValueError(f"Unknown stage {stage}.")
+    return(stages[stage])
+
+def measure_stage(stage: str, model_path: Path, hours: float,
+                  timeout: float) -> dict[str, float | str]:
+    """Run a stage in its own process and measure it
+
+    Arguments:
+        stage: The name of the stage.
+        model_path: The path towards the model's folder.
+        hours: The duration of the simulation stage (in hours).
+        timeout: The time (in seconds) after which the stage is stopped.
+
+    Returns:
+        The stage's measures and status ("ok", "failed" or "timeout").
+    """
+
+    command = [sys.executable, __file__, "--stage", stage,
+               "--model", str(model_path), "--hours", str(hours)]
+    try:
+        process = subprocess.run(command, capture_output=True, text=True,
+                                 timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return({"status": "timeout", "wall_s": timeout})
+    lines = process.stdout.strip().splitlines()
+    if process.returncode != 0 or not lines:
+        error = (process.stderr or process.stdout).strip().splitlines()
+        return({"status": "failed", "error": error[-1] if error else ""})
+    return({"status": "ok"} | json.loads(lines[-1]))
+
+def scaling_exponents(sizes: list[int], results: list[dict],
+                      stage: str) -> list[float | None]:
+    """Scaling exponents of a stage's wall time between consecutive sizes"""
+
+    exponents = []
+    for (size_1, result_1), (size_2, result_2) in zip(
+            zip(sizes, results), zip(sizes[1:], results[1:])):
+        stage_1 = result_1["stages"].get(stage, {})
+        stage_2 = result_2["stages"].get(stage, {})
+        if (stage_1.get("status") != "ok" or stage_2.get("status") != "ok"
+                or min(stage_1["wall_s"], stage_2["wall_s"]) <= 0):
+            exponents.append(None)
+            continue
+        exponents.append(math.log(stage_2["wall_s"]/stage_1["wall_s"])
+                         / math.log(size_2/size_1))
+    return(exponents)
+
+def main_stage(args: argparse.Namespace) -> None:
+    """Run a single stage and print its measures as JSON"""
+
+    stage = prepare_stage(args.stage, Path(args.model), args.hours)
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    stage()
+    wall = time.perf_counter() - start
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux
+    print(json.dumps({
+        "wall_s": wall,
+        "cpu_s": (time.process_time() - start_cpu
+                  + children.ru_utime + children.ru_stime),
+        "peak_rss_mb": own.ru_maxrss/1024,
+        "stage_rss_mb": (own.ru_maxrss - start_rss)/1024,
+        "children_peak_rss_mb": children.ru_maxrss/1024}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--species", type=int, nargs="+",
+                        default=[250, 500, 1000, 2000, 4000],
+                        help="numbers of species of the synthetic models")
+    parser.add_argument("--reactions-per-species", type=float,
+                        default=REACTIONS_PER_SPECIES,
+                        help="number of ratelaws per species")
+    parser.add_argument("--genes-per-species", type=float,
+                        default=GENES_PER_SPECIES,
+                        help="number of genes per species")
+    parser.add_argument("--regulators", type=int, default=7,
+                        help="number of transcription regulators")
+    parser.add_argument("--backend", choices=list(STAGES),
+                        default=const.COMPILATION_BACKEND_ANTIMONY,
+                        help="compilation backend")
+    parser.add_argument("--hours", type=float, default=0.5,
+                        help="duration of the simulation (in hours)")
+    parser.add_argument("--timeout", type=float, default=3600,
+                        help="time (in seconds) after which a stage is "
+                             "stopped")
+    parser.add_argument("--superlinear", type=float, default=1.5,
+                        help="scaling exponent above which a stage is "
+                             "reported as no longer scaling")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="wall time (in seconds) below which a stage "
+                             "is not flagged")
+    parser.add_argument("--directory",
+                        help="directory to keep the models in, a temporary "
+                             "one otherwise")
+    parser.add_argument("--output", help="JSON file to record the results")
+    # Internal: run one stage of one model, in a child process
+    parser.add_argument("--stage", help=argparse.SUPPRESS)
+    parser.add_argument("--model", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.stage:
+        main_stage(args)
+        return
+    sizes = sorted(args.species)
+    stages = STAGES[args.backend] + RUNTIME_STAGES
+    results = []
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        directory = Path(args.directory or temporary_directory)
+        for nb_species in sizes:
+            nb_genes = max(2, round(nb_species*args.genes_per_species))
+            model_path = generate_model(
+                directory, f"synthetic_{nb_species}", nb_species,
+                round(nb_species*args.reactions_per_species), nb_genes,
+                args.regulators, backend=args.backend)
+            result = {"species": nb_species,
+                      "reactions": round(nb_species
+                                         * args.reactions_per_species),
+                      "genes": nb_genes, "stages": {}}
+            for stage in stages:
+                requirements = [STAGES[args.backend][-1]
+                                if requirement == "sbml" else requirement
+                                for requirement
+                                in REQUIREMENTS.get(stage, [])]
+                if any(result["stages"][requirement]["status"] != "ok"
+                       for requirement in requirements):
+                    result["stages"][stage] = {"status": "skipped"}
+                    continue
+                measures = measure_stage(stage, model_path, args.hours,
+                                         args.timeout)
+                result["stages"][stage] = measures
+                print(f"{nb_species} species, {stage}: " + ", ".join(
+                    f"{name}={value:.4g}" if isinstance(value, float)
+                    else f"{name}={value}"
+                    for name, value in measures.items()))
+            results.append(result)
+    report = {"backend": args.backend, "hours": args.hours,
+              "models": results, "scaling": {}, "stops_scaling_at": {}}
+    for stage in stages:
+        exponents = scaling_exponents(sizes, results, stage)
+        report["scaling"][stage] = exponents
+        superlinear = [
+            result["species"] for result, exponent
+            in zip(results[1:], exponents)
+            if exponent is not None and exponent > args.superlinear
+            and result["stages"][stage]["wall_s"] >= args.min_time]
+        report["stops_scaling_at"][stage] = (superlinear[0] if superlinear
+                                             else None)
+        print(f"{stage}: exponents " + ", ".join(
+            "-" if exponent is None else f"{exponent:.2f}"
+            for exponent in exponents)
+            + f", stops scaling at {report['stops_scaling_at'][stage]}")
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Generate a synthetic SPARCED model of a given size
+
+The model is written in the SPARCED input format (compartments, species,
+ratelaws, genes regulation and omics data files, plus a configuration
+file) so that it goes through the same compilation and simulation as
+the standard model. Its network is random but reproducible from a seed:
+- every gene G<g> is transcribed into an mRNA m_G<g>, the last species,
+  translated into a protein P<g>, which is degraded;
+- the transcription of every gene is regulated by a few nuclear
+  regulators R<r>;
+- the remaining reactions bind, dissociate, convert (mass-action or
+  Michaelis-Menten), produce or degrade the other species S<i>, each
+  of them taking part in at least one reaction when possible.
+The first complex, P0m_P1, stands for the standard model's Baxm_Bcl2,
+which holds the mRNA prefix but is not an mRNA.
+
+Usage:
+    python benchmarks/performance/synthetic_model.py \
+        --directory /tmp/models --name synthetic_1000 --species 1000 \
+        --reactions 2700 --genes 150 --regulators 7
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Compartments in the standard model's order: the simulation reads the
+# cytoplasm and nucleus volumes from the first and third ones
+COMPARTMENTS = [("Cytoplasm", 5.25e-12, "GO:0005737"),
+                ("Extracellular", 5.0e-5, "GO:0005576"),
+                ("Nucleus", 1.75e-12, "GO:0005634")]
+CONFIG_FILE = "config.yaml"
+COMPARTMENTS_FILE = "Compartments.txt"
+SPECIES_FILE = "Species.txt"
+RATELAWS_FILE = "Ratelaws.txt"
+GENES_REGULATION_FILE = "GeneReg.txt"
+OMICS_FILE = "OmicsData.txt"
+OMICS_COLUMNS = ["gene", "Exp GCN", "Exp RNA", "kGin", "kGac", "kTCleak",
+                 "kTCmaxs", "kTCd", "Exp Protein",
+                 "Protein_half_life_Schwan_h", "Protein_half_life_lit_h",
+                 "kTLnatSchwan_s", "kTLnatLit_s"]
+# Kinds of the other reactions, with their probabilities
+REACTION_KINDS = {"binding": 0.25, "dissociation": 0.2, "conversion": 0.2,
+                  "michaelis_menten": 0.15, "synthesis": 0.1,
+                  "degradation": 0.1}
+CONFIG = """# Synthetic SPARCED model (see {script})
+name: "{name}"
+header: "{nb_species} species, {nb_reactions} reactions, {nb_genes} genes, \
+{nb_regulators} regulators, seed {seed}"
+location: "data"
+
+compilation:
+    directory: "model"
+    embed_gene_expression: False
+    backend: "{backend}"
+    constant_parameters: "none"
+    files:
+      compartments: "{compartments}"
+      output_parameters: "output_parameters.txt"
+      ratelaws: "{ratelaws}"
+      species: "{species}"
+
+simulation:
+    directory: "simulation"
+    files:
+      genes_regulation: "{genes_regulation}"
+      omics: "{omics}"
+"""
+
+
+def generate_model(models_directory: str | Path, name: str, nb_species: int,
+                   nb_reactions: int, nb_genes: int, nb_regulators: int,
+                   regulators_per_gene: int = 3, seed: int = 0,
+                   backend: str = "antimony") -> Path:
+    """Write the input and configuration files of a synthetic model
+
+    Arguments:
+        models_directory: The directory to write the model's folder in.
+        name: The name of the model.
+        nb_species: The number of species, mRNAs included.
+        nb_reactions: The number of ratelaws, translation and protein
+                      degradation included.
+        nb_genes: The number of genes.
+        nb_regulators: The number of transcription regulators.
+        regulators_per_gene: The number of regulators of each gene.
+        seed: The seed of the random network.
+        backend: The compilation backend of the configuration file.
+
+    Returns:
+        The path towards the model's folder.
+    """
+
+    nb_others = nb_species - 2*nb_genes - nb_regulators - 1
+    if nb_genes < 2 or nb_others < 0:
+        raise ValueError(f"{nb_species} species cannot hold {nb_genes} "
+                         + "genes (at least 2), their proteins, "
+                         + f"{nb_regulators} regulators and a complex.")
+    if nb_reactions < 2*nb_genes + 1:
+        raise ValueError(f"{nb_reactions} reactions cannot hold the "
+                         + f"translation and degradation of {nb_genes} "
+                         + "proteins and the complex binding.")
+    rng = np.random.default_rng(seed)
+    model_path = Path(models_directory) / name
+    model_data = model_path / "data" / "model"
+    simulation_data = model_path / "data" / "simulation"
+    model_data.mkdir(parents=True, exist_ok=True)
+    simulation_data.mkdir(parents=True, exist_ok=True)
+    genes = [f"G{gene_nb}" for gene_nb in range(nb_genes)]
+    species = ([(f"P{gene_nb}", "Cytoplasm") for gene_nb in range(nb_genes)]
+               + [("P0m_P1", "Cytoplasm")]
+               + [(f"R{regulator_nb}", "Nucleus")
+                  for regulator_nb in range(nb_regulators)]
+               + [(f"S{species_nb}", COMPARTMENTS[2*(species_nb % 2)][0])
+                  for species_nb in range(nb_others)])
+    mrnas = [(f"m_{gene}", "Cytoplasm") for gene in genes]
+    write_compartments(model_data / COMPARTMENTS_FILE)
+    write_species(model_data / SPECIES_FILE, species, mrnas, genes, rng)
+    write_ratelaws(model_data / RATELAWS_FILE, species, mrnas,
+                   nb_reactions, rng)
+    regulators = [name for name, _ in species if name.startswith("R")]
+    write_genes_regulation(simulation_data / GENES_REGULATION_FILE, genes,
+                           regulators, regulators_per_gene, rng)
+    write_omics(simulation_data / OMICS_FILE, genes, rng)
+    with open(model_path / CONFIG_FILE, "w") as config:
+        config.write(CONFIG.format(
+            script=Path(__file__).name, name=name, nb_species=nb_species,
+            nb_reactions=nb_reactions, nb_genes=nb_genes,
+            nb_regulators=nb_regulators, seed=seed, backend=backend,
+            compartments=COMPARTMENTS_FILE, ratelaws=RATELAWS_FILE,
+            species=SPECIES_FILE, genes_regulation=GENES_REGULATION_FILE,
+            omics=OMICS_FILE))
+    return(model_path)
+
+def write_compartments(f_compartments: Path) -> None:
+    """Write the compartments file"""
+
+    with open(f_compartments, "w") as file:
+        file.write("compartments\tvolume\tGOterms\n")
+        for name, volume, annotation in COMPARTMENTS:
+            file.write(f"{name}\t{volume:.4E}\t{annotation}\n")
+
+def write_species(f_species: Path, species: list[tuple[str, str]],
+                  mrnas: list[tuple[str, str]], genes: list[str],
+                  rng: np.random.Generator) -> None:
+    """Write the species file, mRNAs last, in the genes order"""
+
+    concentrations = np.concatenate((
+        10**rng.uniform(-1.0, 3.0, len(species)),
+        10**rng.uniform(-3.0, -1.0, len(mrnas))))
+    with open(f_species, "w") as file:
+        file.write("species\tcompartment\tIC_Xinitialized\t"
+                   + "Annotation_ENSEMBL\tAnnotation_HGNC\n")
+        for (name, compartment), concentration in zip(species + mrnas,
+                                                      concentrations):
+            gene = ""
+            if name[0] == "P" and name[1:].isdigit():
+                gene = genes[int(name[1:])]
+            elif name.startswith("m_"):
+                gene = name[2:]
+            file.write(f"{name}\t{compartment}\t{concentration:.2E}\t"
+                       + f"synthetic:{name}\t{gene}\n")
+
+def write_ratelaws(f_ratelaws: Path, species: list[tuple[str, str]],
+                   mrnas: list[tuple[str, str]], nb_reactions: int,
+                   rng: np.random.Generator) -> None:
+    """Write the ratelaws file
+
+    Note:
+        Mass-action ratelaws are written as their rate constant, other
+        ones as formulas whose parameters values follow, as in the
+        standard model.
+    """
+
+    compartments = dict(species + mrnas)
+    rows = []
+    for gene_nb, (mrna, _) in enumerate(mrnas):
+        rows.append([f"vTL{gene_nb}", "Cytoplasm", f" ; P{gene_nb}",
+                     f"kTL{gene_nb}*{mrna}", _format(10**rng.uniform(-2, 0))])
+        rows.append([f"vdP{gene_nb}", "Cytoplasm", f"P{gene_nb} ; ",
+                     _format(10**rng.uniform(-5, -4))])
+    rows.append(["vbP0P1", "Cytoplasm", "P0 + P1 ; P0m_P1",
+                 _format(10**rng.uniform(-5, -3))])
+    names = [name for name, _ in species]
+    # Every species leads one reaction before any is picked at random
+    leaders = np.concatenate((rng.permutation(len(names)),
+                              rng.integers(0, len(names), nb_reactions)))
+    kinds = rng.choice(list(REACTION_KINDS), nb_reactions,
+                       p=list(REACTION_KINDS.values()))
+    for reaction_nb in range(nb_reactions - len(rows)):
+        leader = names[leaders[reaction_nb]]
+        partner, other = [name for name in rng.choice(names, 3, replace=False)
+                          if name != leader][:2]
+        kind = kinds[reaction_nb]
+        name = f"v{reaction_nb}"
+        constant = _format(10**rng.uniform(-4, -2))
+        if kind == "binding":
+            row = [f"{leader} + {partner} ; {other}", constant]
+        elif kind == "dissociation":
+            row = [f"{leader} ; {partner} + {other}", constant]
+        elif kind == "conversion":
+            row = [f"{leader} ; {partner}", constant]
+        elif kind == "michaelis_menten":
+            # The enzyme is a modifier, neither consumed nor produced
+            row = [f"{leader} ; {partner}",
+                   f"kMM{reaction_nb}_1*{other}*{leader}"
+                   + f"/(kMM{reaction_nb}_2+{leader})",
+                   constant, _format(10**rng.uniform(0, 3))]
+        elif kind == "synthesis":
+            row = [f" ; {leader}", constant]
+        else:
+            row = [f"{leader} ; ", constant]
+        rows.append([name, compartments[leader]] + row)
+    with open(f_ratelaws, "w") as file:
+        file.write("Rxn_name\tComp_correction\tSpecies\tRatelaw\t\t\n")
+        for row in rows:
+            file.write("\t".join(row) + "\n")
+
+def write_genes_regulation(f_genes_regulation: Path, genes: list[str],
+                           regulators: list[str], regulators_per_gene: int,
+                           rng: np.random.Generator) -> None:
+    """Write the genes regulation file, as "nH; kH" edges"""
+
+    nb_edges = min(regulators_per_gene, len(regulators))
+    with open(f_genes_regulation, "w") as file:
+        file.write("\t" + "\t".join(regulators) + "\n")
+        for gene in genes:
+            edges = ["0"]*len(regulators)
+            for regulator_nb in rng.choice(len(regulators), nb_edges,
+                                           replace=False):
+                n_hill = rng.choice([-1.0, 1.0])*rng.integers(1, 4)
+                k_hill = 10**rng.uniform(0, 3)
+                edges[regulator_nb] = f"{n_hill:.1f}; {k_hill:.2f}"
+            file.write(gene + "\t" + "\t".join(edges) + "\n")
+
+def write_omics(f_omics: Path, genes: list[str],
+                rng: np.random.Generator) -> None:
+    """Write the omics data file, with the standard model's rates ranges"""
+
+    with open(f_omics, "w") as file:
+        file.write("\t".join(OMICS_COLUMNS) + "\n")
+        for gene in genes:
+            values = [2, rng.integers(0, 50), 0.005, 0.0005,
+                      10**rng.uniform(-4, -2), 0.1, 10**rng.uniform(-5, -3),
+                      rng.integers(0, 10000), 0, 0, 0, 0]
+            file.write(gene + "\t" + "\t".join(str(value) for value in values)
+                       + "\n")
+
+def _format(value: float) -> str:
+    """Write a parameter value as the standard ratelaws file does"""
+
+    return(f"{value:.6E}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--directory", required=True,
+                        help="directory to write the model's folder in")
+    parser.add_argument("--name", required=True, help="name of the model")
+    parser.add_argument("--species", type=int, required=True,
+                        help="number of species, mRNAs included")
+    parser.add_argument("--reactions", type=int, required=True,
+                        help="number of ratelaws")
+    parser.add_argument("--genes", type=int, required=True,
+                        help="number of genes")
+    parser.add_argument("--regulators", type=int, default=7,
+                        help="number of transcription regulators")
+    parser.add_argument("--regulators-per-gene", type=int, default=3,
+                        help="number of regulators of each gene")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the random network")
+    parser.add_argument("--backend", default="antimony",
+                        choices=["antimony", "libsbml"],
+                        help="compilation backend of the configuration")
+    args = parser.parse_args()
+    model_path = generate_model(args.directory, args.name, args.species,
+                                args.reactions, args.genes, args.regulators,
+                                args.regulators_per_gene, args.seed,
+                                args.backend)
+    print(f"Wrote {model_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the compilation cache module"""
+
+from pathlib import Path
+
+import libsbml
+
+import constants as const
+from compilation.cache import (build_compilation_cache_path,
+                               compute_stage_key, hash_sbml_structure,
+                               is_stage_cached, load_compilation_cache,
+                               save_compilation_cache)
+
+MODEL = Path(__file__).resolve().parents[2] / "SPARCED/models/SPARCED_standard"
+
+
+def test_stage_key_follows_inputs_content(tmp_path):
+    ratelaws = tmp_path / "ratelaws.txt"
+    ratelaws.write_text("k1*A\n")
+    stage = const.COMPILATION_STAGE_ANTIMONY
+    key = compute_stage_key(stage, [ratelaws], "model")
+    assert compute_stage_key(stage, [ratelaws], "model") == key
+    assert compute_stage_key(stage, [ratelaws], "other_model") != key
+    assert compute_stage_key(const.COMPILATION_STAGE_SBML,
+                             [ratelaws], "model") != key
+    ratelaws.write_text("k1*A*B\n")
+    assert compute_stage_key(stage, [ratelaws], "model") != key
+
+
+def test_cached_stage_requires_same_key_and_artifacts(tmp_path):
+    stage = const.COMPILATION_STAGE_SBML
+    artifact = tmp_path / "sbml_model.xml"
+    assert load_compilation_cache("model", tmp_path) == {}
+    save_compilation_cache({stage: "abc"}, "model", tmp_path)
+    assert build_compilation_cache_path("model", tmp_path).exists()
+    cache = load_compilation_cache("model", tmp_path)
+    assert not is_stage_cached(cache, stage, "abc", [artifact])
+    artifact.write_text("<sbml/>")
+    assert is_stage_cached(cache, stage, "abc", [artifact])
+    assert not is_stage_cached(cache, stage, "def", [artifact])
+    assert not is_stage_cached(cache, const.COMPILATION_STAGE_AMICI, "abc",
+                               [artifact])
+
+
+def test_sbml_structure_ignores_parameters_values(tmp_path):
+    sbml_file = MODEL / "sbml_SPARCED_standard.xml"
+    key = hash_sbml_structure(sbml_file)
+    document = libsbml.SBMLReader().readSBML(str(sbml_file))
+    document.getModel().getParameter("k1_1").setValue(1.0)
+    libsbml.writeSBMLToFile(document, str(tmp_path / "parameters.xml"))
+    assert hash_sbml_structure(tmp_path / "parameters.xml") == key
+    document.getModel().getSpecies(0).setInitialConcentration(1.0)
+    libsbml.writeSBMLToFile(document, str(tmp_path / "species.xml"))
+    assert hash_sbml_structure(tmp_path / "species.xml") != key
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the SBML construction module"""
+
+from pathlib import Path
+
+import libsbml
+import pytest
+
+import constants as const
+from compilation.cache import hash_sbml_structure
+from compilation.sbml_scripts.construction import (add_reactions,
+                                                   build_sbml_document)
+from Model import Model as SparcedModel
+from utils.input_tables import SPECIES_SCHEMA, load_input_table
+
+MODELS = Path(__file__).resolve().parents[2] / "SPARCED/models"
+MODEL = MODELS / "SPARCED_standard"
+
+
+def test_direct_sbml_matches_antimony_sbml(tmp_path):
+    model = SparcedModel("SPARCED_standard", MODELS, const.DEFAULT_CONFIG_FILE)
+    model.compilation_files[const.YAML_OUTPUT_PARAMETERS] = (
+        tmp_path / "output_parameters.txt")
+    species = load_input_table(model.compilation_files[const.YAML_SPECIES],
+                               SPECIES_SCHEMA)
+    document = build_sbml_document(model, species)
+    assert document.getNumErrors() == 0
+    libsbml.writeSBMLToFile(document, str(tmp_path / "direct.xml"))
+    antimony_sbml = MODEL / "sbml_SPARCED_standard.xml"
+    # Same structure and annotations, hence the same AMICI build
+    assert (hash_sbml_structure(tmp_path / "direct.xml")
+            == hash_sbml_structure(antimony_sbml))
+    expected = libsbml.SBMLReader().readSBML(str(antimony_sbml)).getModel()
+    assert ([(parameter.getId(), parameter.getValue())
+             for parameter in document.getModel().getListOfParameters()]
+            == [(parameter.getId(), parameter.getValue())
+                for parameter in expected.getListOfParameters()])
+    assert (tmp_path / "output_parameters.txt").exists()
+
+
+def test_reactions_modifiers_and_invalid_rates():
+    document = libsbml.SBMLDocument(3, 1)
+    sbml_model = document.createModel("test")
+    for species_id in ["A", "B", "C"]:
+        sbml_model.createSpecies().setId(species_id)
+    add_reactions(sbml_model, [("r1", ["A", "A"], ["B"], "(k1*A*C*B)*V")])
+    reaction = sbml_model.getReaction("r1")
+    assert [reference.getSpecies() for reference
+            in reaction.getListOfReactants()] == ["A", "A"]
+    assert [modifier.getSpecies() for modifier
+            in reaction.getListOfModifiers()] == ["C"]
+    # Nested products are merged, as Antimony writes them
+    assert reaction.getKineticLaw().getMath().getNumChildren() == 5
+    with pytest.raises(RuntimeError):
+        add_reactions(sbml_model, [("r2", ["A"], [], "k2*A*)")])
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the Antimony gene expression module"""
+
+from pathlib import Path
+
+import numpy as np
+
+import constants as const
+from compilation.antimony_scripts.gene_expression import read_gene_expression
+from compilation.sbml_scripts.metadata import load_model_metadata
+from simulation.RunPrep import RunPrep, prepare_sge
+from simulation.SGEmodule import SGEmodule
+from simulation.plan import compile_sge_plan
+from utils.input_tables import (COMPARTMENTS_SCHEMA, SPECIES_SCHEMA,
+                                load_input_table)
+
+MODEL = Path(__file__).resolve().parents[2] / "SPARCED/models/SPARCED_standard"
+
+
+def test_embedded_rates_match_deterministic_sge_step(tmp_path):
+    f_genereg = MODEL / "data/simulation/legacy_GeneReg.txt"
+    f_omics = MODEL / "data/simulation/legacy_OmicsData.txt"
+    species = load_input_table(MODEL / "data/model/legacy_Species.txt",
+                               SPECIES_SCHEMA)
+    compartments = load_input_table(
+        MODEL / "data/model/legacy_Compartments.txt", COMPARTMENTS_SCHEMA)
+    reactions, names, values = read_gene_expression(f_genereg, f_omics,
+                                                    species, compartments)
+    metadata = load_model_metadata("test", tmp_path,
+                                   MODEL / "sbml_SPARCED_standard.xml",
+                                   f_genereg)
+    plan = compile_sge_plan(f_genereg, f_omics, metadata)
+    # Random state around the default one, regulators spanning their K50s
+    rng = np.random.default_rng(0)
+    states = metadata["initial_states"] * rng.uniform(0.1, 10.0,
+                                                      len(metadata["state_ids"]))
+    states[plan["spIDs"]] = rng.uniform(0.0, 1e3, len(plan["spIDs"]))
+    # Embedded reactions, evaluated as concentration rates (nM/s)
+    namespace = dict(zip(metadata["state_ids"].tolist(), states))
+    namespace.update(zip(names, values))
+    namespace.update(zip(compartments["name"], compartments["volume"]))
+    mrnas = metadata["state_ids"][plan["mRNAInds"]].tolist()
+    rates = dict.fromkeys(mrnas, 0.0)
+    for _, reactants, products, formula in reactions:
+        (mrna,) = reactants + products
+        compartment = species["compartment"][
+            species["name"].tolist().index(mrna)]
+        rate = (eval(formula.replace("^", "**"), {"__builtins__": {}},
+                     namespace) / namespace[compartment])
+        rates[mrna] += rate if products else -rate
+    # Deterministic SGE step over the same state
+    ts = 30
+    genedata, AllGenesVec = RunPrep(1, plan, rng)
+    _, xmN, _ = SGEmodule(1, ts, genedata, states, AllGenesVec,
+                          prepare_sge(plan, ts, plan["mRNAInds"][0]), rng)
+    mpc2nM_Vc = 1e9 / (plan["Vc"] * const.AVOGADRO)
+    expected = (xmN * mpc2nM_Vc - states[plan["mRNAInds"]]) / ts
+    assert np.allclose([rates[mrna] for mrna in mrnas], expected,
+                       rtol=1e-5, atol=1e-12)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the metadata module"""
+
+from pathlib import Path
+
+import numpy as np
+
+from compilation.sbml_scripts.metadata import (build_model_metadata_path,
+                                               load_model_metadata)
+from utils.data_handling import load_species_from_sbml
+
+MODEL = Path(__file__).resolve().parents[2] / "SPARCED/models/SPARCED_standard"
+
+
+def test_metadata_match_sbml_model(tmp_path):
+    sbml_file = MODEL / "sbml_SPARCED_standard.xml"
+    f_genereg = MODEL / "data/simulation/legacy_GeneReg.txt"
+    metadata = load_model_metadata("test", tmp_path, sbml_file, f_genereg)
+    assert build_model_metadata_path("test", tmp_path).exists()
+    species = load_species_from_sbml(str(sbml_file))
+    assert list(metadata["state_ids"]) == list(species.keys())
+    assert np.array_equal(metadata["initial_states"], list(species.values()))
+    state_ids = list(metadata["state_ids"])
+    assert len(metadata["mRNAInds"]) == 141
+    assert state_ids[metadata["mRNAInds"][0]].startswith("m_")
+    assert state_ids[metadata["PARPind"][0]] == "PARP"
+    assert state_ids[metadata["spIDs"][1]] == "cMyc"
+    assert metadata["Vn"] < metadata["Vc"]
+    parameters = dict(zip(metadata["parameter_ids"],
+                          metadata["parameter_values"]))
+    assert parameters["k1_1"] == 0.0042005
+    # Metadata are loaded back from their file afterwards
+    reloaded = load_model_metadata("test", tmp_path, None)
+    assert list(reloaded["state_ids"]) == state_ids
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the compilation profiling module"""
+
+import json
+
+from compilation.conversion_scripts import convert_antimony_to_sbml
+from compilation.profiling import CompilationProfiler, measure_step
+
+
+def test_steps_are_measured_and_reported(tmp_path):
+    profiler = CompilationProfiler("toy", {"backend": "antimony"})
+    profiler.skip("antimony")
+    with profiler.measure("sbml", "sbml_write"):
+        buffer = bytearray(64 * 2**20)
+        buffer[::4096] = b"\x01" * len(buffer[::4096])
+    with measure_step(None, "sbml", "ignored"):
+        pass
+    assert [step["step"] for step in profiler.steps] == ["antimony",
+                                                         "sbml_write"]
+    step = profiler.steps[1]
+    assert not step["cached"]
+    assert step["wall_s"] >= 0 and step["cpu_s"] >= 0
+    assert step["peak_rss_mb"] >= 64
+    report_path = profiler.write_report(tmp_path)
+    assert report_path == tmp_path / "compilation_report_toy.json"
+    report = json.loads(report_path.read_text())
+    assert report["model"] == "toy"
+    assert report["settings"] == {"backend": "antimony"}
+    assert set(report["versions"]) == {"sparced", "antimony",
+                                       "python-libsbml", "amici"}
+    assert report["steps"][0] == {"stage": "antimony", "step": "antimony",
+                                  "cached": True}
+    assert report["total"]["wall_s"] == step["wall_s"]
+    assert "cached" in profiler.format_report().splitlines()[1]
+
+
+def test_antimony_conversion_steps(tmp_path):
+    antimony_file = tmp_path / "ant_toy.txt"
+    antimony_file.write_text("model toy\n"
+                             "  compartment C = 1;\n"
+                             "  species A in C = 1;\n"
+                             "  r1: A -> ; k1*A;\n"
+                             "  k1 = 0.1;\n"
+                             "end\n")
+    profiler = CompilationProfiler("toy")
+    sbml_file = convert_antimony_to_sbml(antimony_file, "toy", tmp_path,
+                                         False, profiler)
+    assert sbml_file.exists()
+    assert [(step["stage"], step["step"]) for step in profiler.steps] == [
+        ("sbml", "antimony_load"), ("sbml", "sbml_write")]
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the Antimony reactions module"""
+
+import pandas as pd
+
+from compilation.antimony_scripts.reactions import (read_reactions,
+                                                    rewrite_ratelaw)
+
+
+def test_ratelaw_parameters_are_renamed_in_one_pass():
+    assert (rewrite_ratelaw("kTL1_1*m_TP53*(EIF4E/(kTL1_2+EIF4E))", 5, 2)
+            == "k5_1*m_TP53*(EIF4E/(k5_2+EIF4E))")
+    assert rewrite_ratelaw("kTL6*m_RB1", 7, 1) == "k7_1*m_RB1"
+    # Species holding a 'k' are not parameters
+    assert (rewrite_ratelaw("kA_1*pAkt + kA_2*Bak", 3, 2)
+            == "k3_1*pAkt + k3_2*Bak")
+    # Nor are positions beyond the reaction's parameters
+    assert rewrite_ratelaw("kA_1*kA_3", 3, 2) == "k3_1*kA_3"
+
+
+def test_reactions_and_parameters_file(tmp_path):
+    f_ratelaws = tmp_path / "ratelaws.txt"
+    f_ratelaws.write_text(
+        "name\tcompartment\treaction\tratelaw\tk1\tk2\n"
+        "r1\tCytoplasm\tA + B ; C\t0.5\t\t\n"
+        "r2\tCytoplasm\t;\t0.1\t\t\n"
+        "r3\tNucleus\tC ; A\tkX_1*C/(kX_2+C)\t2\t3e-2\n"
+        "r4\tNucleus\tA ; \tkY*A\t7\t\n")
+    f_parameters = tmp_path / "parameters.txt"
+    reactions, names, values = read_reactions(f_ratelaws, f_parameters)
+    assert reactions == [
+        ("r1", ["A", "B"], ["C"], "(k1*A*B)*Cytoplasm"),
+        ("r3", ["C"], ["A"], "(k3_1*C/(k3_2+C))*Nucleus"),
+        ("r4", ["A"], [], "(k4_1*A)*Nucleus"),
+    ]
+    assert names == ["k1", "k3_1", "k3_2", "k4_1"]
+    assert values == [0.5, 2.0, 0.03, 7.0]
+    parameters = pd.read_csv(f_parameters, sep="\t", index_col=0)
+    assert parameters["rxn"].tolist() == ["r1", "r3", "r3", "r4"]
+    assert parameters["idx"].tolist() == [0, 0, 1, 0]
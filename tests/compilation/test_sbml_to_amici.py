@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the sbml_to_amici module"""
+
+from pathlib import Path
+
+import pytest
+
+from compilation.conversion_scripts import (sbml_to_amici,
+                                            select_constant_parameters)
+
+SBML = (Path(__file__).resolve().parents[2]
+        / "SPARCED/models/SPARCED_standard/sbml_SPARCED_standard.xml")
+
+
+def test_constant_parameters_selection():
+    assert select_constant_parameters(SBML, None) == []
+    assert select_constant_parameters(SBML, "none") == []
+    every_parameter = select_constant_parameters(SBML, "all")
+    assert len(every_parameter) == 2711
+    assert select_constant_parameters(SBML, True) == every_parameter
+    assert select_constant_parameters(SBML, ["k1_1", "k2"]) == ["k1_1", "k2"]
+    assert select_constant_parameters(SBML, "k1_.*") == ["k1_1", "k1_2",
+                                                         "k1_3", "k1_4"]
+
+
+@pytest.mark.parametrize("conservation_laws, expected",
+                         [(None, {}),
+                          (False, {"compute_conservation_laws": False}),
+                          (True, {"compute_conservation_laws": True})])
+def test_conservation_laws_default_to_amici(tmp_path, monkeypatch,
+                                            conservation_laws, expected):
+    options = {}
+
+    class SbmlImporter:
+        def __init__(self, sbml_file_path):
+            pass
+
+        def sbml2amici(self, model_name, output_dir, constant_parameters,
+                       verbose, compile, **kwargs):
+            options.update(kwargs)
+
+    monkeypatch.setattr(sbml_to_amici.amici, "SbmlImporter", SbmlImporter)
+    monkeypatch.setattr(sbml_to_amici, "build_amici_extension",
+                        lambda amici_folder_path, verbose: None)
+    sbml_to_amici.convert_sbml_to_amici(SBML, "SPARCED_standard", tmp_path,
+                                        False, None, conservation_laws)
+    assert options == expected
@@ -0,0 +1,10 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Make SPARCED's sources importable the way they expect to be run"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "SPARCED"))
+sys.path.insert(0, str(ROOT / "SPARCED" / "src"))
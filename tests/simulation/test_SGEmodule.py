@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the SGEmodule module"""
+
+import numpy as np
+
+from simulation.RunPrep import prepare_sge
+from simulation.SGEmodule import SGEmodule
+from simulation.gene_copies import (build_gene_copies_offsets,
+                                    count_active_copies)
+from simulation.regulation import compress_regulation, find_cooperative_edges
+
+NB_GENES = 30
+NB_REGULATORS = 3
+NB_SPECIES = 40
+
+
+def sge_plan(rng, nb_genes=NB_GENES):
+    nH = np.zeros((nb_genes, NB_REGULATORS))
+    kH = rng.uniform(1e3, 1e5, (nb_genes, NB_REGULATORS))
+    nH[::2, :2] = 3.0
+    nH[1::3, 2] = -2.0
+    plan = compress_regulation(nH, kH, nH > 0, "activators")
+    plan.update(compress_regulation(-nH, kH, nH < 0, "repressors"))
+    plan["cooperative_edges"] = find_cooperative_edges(plan)
+    gExp = rng.integers(1, 4, nb_genes).astype(float)
+    plan.update(Vn=1.75e-12, Vc=5.25e-12, gExp_mpc=gExp,
+                kGin=np.full(nb_genes, 0.005),
+                kGac=np.full(nb_genes, 0.0005),
+                kTCmaxs=rng.uniform(0.01, 0.1, nb_genes),
+                kTCleak=rng.uniform(1e-4, 1e-3, nb_genes),
+                kTCd=rng.uniform(1e-5, 1e-4, nb_genes),
+                GeneCopiesOffsets=build_gene_copies_offsets(gExp),
+                spIDs=np.array([0, 1, 2]))
+    return plan
+
+
+def stochastic_inputs(rng, sge, nb_cells):
+    offsets = sge["GeneCopiesOffsets"]
+    AllGenesVec = rng.uniform(0, 1, (nb_cells, offsets[-1])) < 0.1
+    xgac = count_active_copies(AllGenesVec, offsets)
+    genedata = np.concatenate((xgac, np.diff(offsets) - xgac), axis=1)
+    spdata = rng.uniform(0.0, 10.0, (nb_cells, NB_SPECIES))
+    return genedata, spdata, AllGenesVec
+
+
+def test_population_step_matches_single_cells():
+    rng = np.random.default_rng(0)
+    sge = prepare_sge(sge_plan(rng), 30, NB_SPECIES - NB_GENES)
+    spdata = rng.uniform(0.0, 10.0, (4, NB_SPECIES))
+    genedata = rng.uniform(0.0, 2.0, (4, 2 * NB_GENES))
+    genes, mrnas, _ = SGEmodule(1, 30, genedata, spdata,
+                                np.zeros((4, 0), dtype=bool), sge, rng)
+    for cell in range(4):
+        expected_genes, expected_mrnas, _ = SGEmodule(
+            1, 30, genedata[cell], spdata[cell], np.zeros(0, dtype=bool),
+            sge, rng)
+        assert np.allclose(genes[cell], expected_genes)
+        assert np.allclose(mrnas[cell], expected_mrnas)
+
+
+def test_stochastic_step_conserves_gene_copies():
+    rng = np.random.default_rng(1)
+    sge = prepare_sge(sge_plan(rng), 30, NB_SPECIES - NB_GENES)
+    genedata, spdata, AllGenesVec = stochastic_inputs(rng, sge, 5)
+    genes, mrnas, AllGenesVec = SGEmodule(0, 30, genedata, spdata,
+                                          AllGenesVec, sge, rng)
+    total = np.diff(sge["GeneCopiesOffsets"])
+    assert genes.shape == (5, 2 * NB_GENES)
+    assert np.allclose(genes[:, :NB_GENES] + genes[:, NB_GENES:], total)
+    assert np.all(mrnas >= 0.0)
+    # Fixed genes keep their activity
+    assert np.array_equal(genes[:, sge["indsD"]], genedata[:, sge["indsD"]])
+
+
+def test_stochastic_step_is_reproducible_with_generator():
+    rng = np.random.default_rng(2)
+    sge = prepare_sge(sge_plan(rng), 30, NB_SPECIES - NB_GENES)
+    genedata, spdata, AllGenesVec = stochastic_inputs(rng, sge, 1)
+    results = [SGEmodule(0, 30, genedata[0], spdata[0], AllGenesVec[0].copy(),
+                         sge, np.random.default_rng(7)) for _ in range(2)]
+    for first, second in zip(*results):
+        assert np.array_equal(first, second)
+
+
+def test_stochastic_step_of_a_model_with_few_genes():
+    rng = np.random.default_rng(3)
+    nb_genes = 8
+    sge = prepare_sge(sge_plan(rng, nb_genes), 30, NB_SPECIES - nb_genes)
+    assert list(sge["indsD"]) == [5, 6, 7]
+    assert np.isclose(sge["poff"], np.exp(-0.005 * 30))
+    genedata, spdata, AllGenesVec = stochastic_inputs(rng, sge, 2)
+    genes, mrnas, _ = SGEmodule(0, 30, genedata, spdata, AllGenesVec, sge,
+                                rng)
+    assert genes.shape == (2, 2 * nb_genes)
+    assert mrnas.shape == (2, nb_genes)
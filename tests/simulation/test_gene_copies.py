@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the gene_copies module"""
+
+import numpy as np
+
+from simulation.gene_copies import (build_gene_copies_offsets,
+                                    count_active_copies)
+
+
+def test_active_copies_are_counted_per_gene():
+    gExp = np.array([2.0, 0.0, 3.0, 1.0])
+    offsets = build_gene_copies_offsets(gExp)
+    AllGenesVec = np.array([[True, False, True, True, False, True],
+                            [False, False, False, True, True, False]])
+    assert list(offsets) == [0, 2, 2, 5, 6]
+    assert np.array_equal(count_active_copies(AllGenesVec, offsets),
+                          [[1, 0, 2, 1], [0, 0, 2, 0]])
+    assert np.array_equal(count_active_copies(AllGenesVec[0], offsets),
+                          [1, 0, 2, 1])
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the integration module"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import constants as const
+from simulation.integration import (StateDimensionMismatch,
+                                    count_full_states, create_solver,
+                                    find_apoptosis_step,
+                                    read_final_states)
+
+
+def reduced_model():
+    # 5 species, 2 of which are eliminated by conservation laws
+    return SimpleNamespace(nx_rdata=5, nx_solver=3)
+
+
+def test_full_states_are_counted_from_the_return_data_dimension():
+    model = reduced_model()
+    assert count_full_states(model) == 5
+    assert count_full_states(model, np.zeros((4, 5))) == 5
+    with pytest.raises(StateDimensionMismatch):
+        count_full_states(model, np.zeros(model.nx_solver))
+
+
+def test_final_states_are_the_last_row_of_the_full_trajectory():
+    trajectory = np.arange(15.0).reshape(3, 5)
+    rdata = SimpleNamespace(_swigptr=SimpleNamespace(x=trajectory.ravel()))
+    final_states = read_final_states(rdata, count_full_states(reduced_model()))
+    assert np.array_equal(final_states, trajectory[-1])
+    # The return data is not aliased
+    final_states[0] = -1.0
+    assert trajectory[-1, 0] == 10.0
+
+
+def test_apoptosis_stops_trajectories_as_the_exchange_loop():
+    # PARP, cleaved PARP: the initial time point is never checked
+    trajectory = np.array([[1.0, 2.0], [3.0, 1.0], [2.0, 2.5], [1.0, 3.0]])
+    assert find_apoptosis_step(trajectory, np.array([0]), np.array([1])) == 2
+    assert find_apoptosis_step(trajectory[:2], np.array([0]),
+                               np.array([1])) == 1
+
+
+def test_solvers_allow_long_exchange_steps():
+    solver = SimpleNamespace(max_steps=500)
+    solver.setMaxSteps = lambda max_steps: setattr(solver, "max_steps",
+                                                   max_steps)
+    model = SimpleNamespace(getSolver=lambda: solver)
+    assert create_solver(model) is solver
+    assert solver.max_steps == const.SOLVER_MAX_STEPS
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the output_grid module"""
+
+import numpy as np
+
+from simulation.output_grid import OutputSampler, select_output_times
+
+EXCHANGE_TIMES = np.arange(0.0, 3601.0, 30.0)
+
+
+def sample(output_times):
+    species = np.column_stack((EXCHANGE_TIMES, 2.0 * EXCHANGE_TIMES))
+    genes = np.ones((len(EXCHANGE_TIMES), 2))
+    outputs = []
+    sampler = OutputSampler(output_times, lambda time, sp, g: outputs.append(
+                                            (time, np.array(sp), np.array(g))))
+    sampler.push_rows(EXCHANGE_TIMES, species, genes)
+    return outputs
+
+
+def test_stride_keeps_every_nth_exchange_time():
+    output_times = select_output_times(EXCHANGE_TIMES, 40)
+    assert list(output_times) == [0.0, 1200.0, 2400.0, 3600.0]
+    outputs = sample(output_times)
+    assert [time for time, _, _ in outputs] == list(output_times)
+    assert np.array_equal(outputs[1][1], [1200.0, 2400.0])
+
+
+def test_explicit_times_are_interpolated():
+    output_times = select_output_times(EXCHANGE_TIMES, 40,
+                                       [7200.0, 45.0, 10.0, 600.0, -1.0])
+    assert list(output_times) == [10.0, 45.0, 600.0]
+    outputs = sample(output_times)
+    assert [time for time, _, _ in outputs] == [10.0, 45.0, 600.0]
+    for time, species, genes in outputs:
+        assert np.allclose(species, [time, 2.0 * time])
+        assert np.allclose(genes, 1.0)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the parameters module"""
+
+from types import ModuleType
+
+import numpy as np
+
+from compilation.sbml_scripts.metadata import build_model_metadata_path
+from simulation.parameters import (apply_parameters, load_amici_model,
+                                   load_compiled_parameters)
+from utils.files_handling import save_arrays
+
+
+class ParametersModel:
+    """The parameters interface of an AMICI model"""
+
+    def __init__(self):
+        self.parameters = {"k1_1": 1.0, "k2": 2.0}
+        self.fixed_parameters = {"k3": 3.0}
+
+    def getParameterIds(self):
+        return tuple(self.parameters)
+
+    def getFixedParameterIds(self):
+        return tuple(self.fixed_parameters)
+
+    def setParameterById(self, parameter_id, value):
+        self.parameters[parameter_id] = value
+
+    def setFixedParameterById(self, parameter_id, value):
+        self.fixed_parameters[parameter_id] = value
+
+
+def test_compiled_parameters_are_applied():
+    metadata = {"parameter_ids": np.array(["k1_1", "k3", "k_unknown"]),
+                "parameter_values": np.array([10.0, 30.0, 1.0])}
+    model = ParametersModel()
+    apply_parameters(model, load_compiled_parameters(metadata))
+    assert model.parameters == {"k1_1": 10.0, "k2": 2.0}
+    assert model.fixed_parameters == {"k3": 30.0}
+    assert load_compiled_parameters({}) == {}
+
+
+def test_models_load_with_the_metadata_parameters(tmp_path):
+    # A build reused after a rate constant changed still holds the old one
+    model_module = ModuleType("SPARCED")
+    model_module.getModel = ParametersModel
+    assert load_amici_model(model_module, tmp_path).parameters["k1_1"] == 1.0
+    save_arrays(build_model_metadata_path("SPARCED", tmp_path),
+                parameter_ids=np.array(["k1_1"]),
+                parameter_values=np.array([10.0]))
+    model = load_amici_model(model_module, tmp_path)
+    assert model.parameters == {"k1_1": 10.0, "k2": 2.0}
+    assert model.fixed_parameters == {"k3": 3.0}
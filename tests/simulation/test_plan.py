@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the plan module"""
+
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+import constants as const
+from compilation.sbml_scripts.metadata import load_model_metadata
+from simulation.plan import build_sge_plan_path, load_sge_plan
+
+MODEL = Path(__file__).resolve().parents[2] / "SPARCED/models/SPARCED_standard"
+
+
+def copy_model_files(tmp_path):
+    files = {
+        const.YAML_GENES_REGULATION: "legacy_GeneReg.txt",
+        const.YAML_OMICS_DATA: "legacy_OmicsData.txt",
+    }
+    for file_type, file_name in files.items():
+        files[file_type] = tmp_path / file_name
+        shutil.copy(MODEL / "data/simulation" / file_name, files[file_type])
+    sbml_file = tmp_path / "sbml_SPARCED_standard.xml"
+    shutil.copy(MODEL / sbml_file.name, sbml_file)
+    metadata = load_model_metadata("test", tmp_path, sbml_file,
+                                   files[const.YAML_GENES_REGULATION])
+    return files, metadata
+
+
+def test_plan_parses_genes_regulation(tmp_path):
+    files, metadata = copy_model_files(tmp_path)
+    plan = load_sge_plan("test", tmp_path, files, metadata)
+    ccnd1 = 9
+    mpc2nmcf_Vn = 1.0e9 / (plan["Vn"] * const.AVOGADRO)
+    edges = slice(*plan["activators_indptr"][ccnd1:ccnd1+2])
+    assert list(plan["activators_regulators"][edges][:2]) == [0, 1]
+    assert np.allclose(plan["activators_n"][edges][:2], 3.0)
+    assert np.allclose(plan["activators_k50"][edges][:2] * mpc2nmcf_Vn,
+                       [1.25, 450.0])
+    assert list(plan["cooperative_edges"][0]) == [edges.start, edges.start+1]
+    repressors = plan["repressors_indptr"]
+    assert repressors[ccnd1] == repressors[ccnd1+1]
+    assert list(metadata["state_ids"][plan["spIDs"][:2]]) == ["pcFos_cJun",
+                                                             "cMyc"]
+    assert plan["GeneCopiesOffsets"].shape == (142,)
+    assert plan["GeneCopiesOffsets"][-1] == int(np.sum(plan["gExp_mpc"]))
+
+
+def test_plan_is_cached_until_inputs_change(tmp_path):
+    files, metadata = copy_model_files(tmp_path)
+    load_sge_plan("test", tmp_path, files, metadata)
+    plan_path = build_sge_plan_path("test", tmp_path)
+    modified = plan_path.stat().st_mtime_ns
+    load_sge_plan("test", tmp_path, files, metadata)
+    assert plan_path.stat().st_mtime_ns == modified
+    omics = files[const.YAML_OMICS_DATA]
+    omics.write_text(omics.read_text().replace("\t0.1\t", "\t0.2\t", 1))
+    plan = load_sge_plan("test", tmp_path, files, metadata)
+    assert plan["kTCmaxs"][0] == 0.2
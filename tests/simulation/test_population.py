@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the population module"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+import constants as const
+import simulation.population as population
+from simulation.gene_copies import build_gene_copies_offsets
+from simulation.regulation import compress_regulation, find_cooperative_edges
+
+NB_GENES = 12
+NB_SPECIES = 20
+
+
+class Solver:
+    def setMaxSteps(self, max_steps):
+        self.max_steps = max_steps
+
+
+class ListWriter:
+    def __init__(self):
+        self.rows = []
+
+    def append(self, time, species, genes):
+        self.rows.append((time, np.array(species), np.array(genes)))
+
+
+def population_plan():
+    nH = np.zeros((NB_GENES, 2))
+    nH[:, 0] = 2.0
+    plan = compress_regulation(nH, np.full((NB_GENES, 2), 1e3), nH > 0,
+                               "activators")
+    plan.update(compress_regulation(nH, np.ones((NB_GENES, 2)),
+                                    np.zeros_like(nH, dtype=bool),
+                                    "repressors"))
+    plan["cooperative_edges"] = find_cooperative_edges(plan)
+    gExp = np.full(NB_GENES, 2.0)
+    plan.update(Vn=1.75e-12, Vc=5.25e-12, gExp_mpc=gExp,
+                kGin=np.full(NB_GENES, 0.005),
+                kGac=np.full(NB_GENES, 0.0005),
+                kTCmaxs=np.full(NB_GENES, 0.05),
+                kTCleak=np.full(NB_GENES, 1e-4),
+                kTCd=np.full(NB_GENES, 1e-4),
+                GeneCopiesOffsets=build_gene_copies_offsets(gExp),
+                spIDs=np.array([2, 3]),
+                mRNAInds=np.arange(NB_SPECIES - NB_GENES, NB_SPECIES),
+                PARPind=np.array([0]), cPARPind=np.array([1]))
+    return plan
+
+
+def test_population_streams_outputs_until_each_cell_dies(monkeypatch):
+    # Cleaved PARP grows by one at each exchange step
+    def integrate(model, solver, states, edatas, num_threads):
+        # Configured as in RunSPARCED
+        assert solver.max_steps == const.SOLVER_MAX_STEPS
+        new_states = states.copy()
+        new_states[:, 1] += 1.0
+        return new_states
+    monkeypatch.setattr(population, "integrate_population", integrate)
+    monkeypatch.setattr(population.amici, "ExpData", lambda model: None,
+                        raising=False)
+    model = SimpleNamespace(getSolver=Solver,
+                            getParameterIds=lambda: [])
+    spdata = np.ones((2, NB_SPECIES))
+    spdata[:, 1] = 0.0
+    spdata[0, 0] = 100.0
+    spdata[1, 0] = 2.5  # Dies after 3 exchange steps
+    writers = [ListWriter(), ListWriter()]
+    species, genes, time = population.RunPopulation(
+        1, 0.1, spdata, model, population_plan(),
+        np.random.default_rng(0), writers=writers, output_stride=2)
+    assert [row[0] for row in writers[0].rows] == list(range(0, 361, 60))
+    assert [row[0] for row in writers[1].rows] == [0, 60]
+    assert list(time) == [360, 90]
+    assert list(species[:, 1]) == [12.0, 3.0]
+    assert np.array_equal(writers[0].rows[-1][1], species[0])
+    assert np.array_equal(writers[0].rows[-1][2], genes[0])
+    # Outputs hold the mRNAs updated by gene expression
+    assert np.all(writers[0].rows[1][1][NB_SPECIES - NB_GENES:] != 1.0)
+
+
+def test_embedded_trajectories_stop_when_each_cell_dies(monkeypatch):
+    # Cleaved PARP grows by one every 30 seconds
+    def integrate(model, solver, initial_states, timepoints):
+        trajectory = np.tile(initial_states, (len(timepoints), 1))
+        trajectory[:, 1] += np.arange(len(timepoints))
+        return trajectory
+    monkeypatch.setattr(population, "integrate_full_duration", integrate)
+    model = SimpleNamespace(getSolver=Solver,
+                            getParameterIds=lambda: [
+                                const.GENE_EXPRESSION_SWITCH])
+    spdata = np.ones((2, NB_SPECIES))
+    spdata[:, 1] = 0.0
+    spdata[0, 0] = 100.0
+    spdata[1, 0] = 2.5  # Dies after 90 seconds
+    writers = [ListWriter(), ListWriter()]
+    species, genes, time = population.RunPopulation(
+        1, 0.1, spdata, model, population_plan(),
+        np.random.default_rng(0), writers=writers)
+    assert [row[0] for row in writers[0].rows] == list(range(0, 361, 30))
+    assert [row[0] for row in writers[1].rows] == [0, 30, 60, 90]
+    assert list(time) == [360, 90]
+    assert list(species[:, 1]) == [12.0, 3.0]
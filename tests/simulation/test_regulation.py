@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the regulation module"""
+
+import numpy as np
+
+from simulation.regulation import (compress_regulation,
+                                   find_cooperative_edges, hill_functions)
+
+
+def dense_hill_functions(TARarr, tcnas, tck50as, tcnrs, tck50rs):
+    # Dense formulation of the Hill functions, as formerly in SGEmodule
+    TAs = np.where(tck50as > 0, TARarr, 0.0)
+    TRs = np.where(tck50rs > 0, TARarr, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        TFa = np.power(TAs / tck50as, tcnas)
+        TFr = np.power(TRs / tck50rs, tcnrs)
+    TFa[np.isnan(TFa)] = 0.0
+    TFr[np.isnan(TFr)] = 0.0
+    hills = np.sum(TFa, axis=1) / (1 + np.sum(TFa, axis=1)
+                                   + np.sum(TFr, axis=1))
+    hills[9:12] = ((TFa[9:12, 0] / (1 + TFa[9:12, 0]))
+                   * (TFa[9:12, 1] / (1 + TFa[9:12, 1])))
+    return hills
+
+
+def test_sparse_hills_match_dense_formulation():
+    rng = np.random.default_rng(2)
+    nb_genes, nb_regulators = 20, 5
+    nH = rng.choice([0.0, 0.0, 2.0, 4.0, -1.0, -3.0],
+                    (nb_genes, nb_regulators))
+    nH[10, :2] = [0.0, 2.0]  # Cooperative gene missing its first activator
+    kH = rng.uniform(10.0, 100.0, (nb_genes, nb_regulators))
+    regulation = compress_regulation(nH, kH, nH > 0, "activators")
+    regulation.update(compress_regulation(-nH, kH, nH < 0, "repressors"))
+    regulation["cooperative_edges"] = find_cooperative_edges(regulation)
+    TARarr = rng.uniform(0.0, 200.0, (3, nb_regulators))
+    hills = hill_functions(TARarr, regulation)
+    assert hills.shape == (3, nb_genes)
+    assert hills[1, 10] == 0.0
+    for cell in range(3):
+        expected = dense_hill_functions(
+            TARarr[cell], np.where(nH > 0, nH, 1.0), np.where(nH > 0, kH, 0.0),
+            np.where(nH < 0, -nH, 1.0), np.where(nH < 0, kH, 0.0))
+        assert np.allclose(hills[cell], expected)
+        assert np.allclose(hill_functions(TARarr[cell], regulation), expected)
+
+
+def test_sums_are_exact_whatever_other_genes_terms():
+    # A huge term followed by tiny ones, an isolated gene in between
+    nH = np.array([[1.0, 0.0, 0.0],
+                   [0.0, 0.0, 0.0],
+                   [0.0, 1.0, 1.0],
+                   [0.0, -1.0, 0.0],
+                   [2.0, 0.0, 0.0]])
+    kH = np.array([[1e-8, 1.0, 1.0],
+                   [1.0, 1.0, 1.0],
+                   [1.0, 1e8, 3e8],
+                   [1.0, 1e8, 1.0],
+                   [1e-4, 1.0, 1.0]])
+    regulation = compress_regulation(nH, kH, nH > 0, "activators")
+    regulation.update(compress_regulation(-nH, kH, nH < 0, "repressors"))
+    regulation["cooperative_edges"] = find_cooperative_edges(regulation)
+    TARarr = np.array([1.0, 1.0, 1.0])
+    hills = hill_functions(TARarr, regulation)
+    expected = dense_hill_functions(
+        TARarr, np.where(nH > 0, nH, 1.0), np.where(nH > 0, kH, 0.0),
+        np.where(nH < 0, -nH, 1.0), np.where(nH < 0, kH, 0.0))
+    assert np.allclose(hills, expected, rtol=1e-14, atol=0.0)
+    assert hills[1] == 0.0
+    assert hills[2] > 0.0
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the Experiment module"""
+
+import multiprocessing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import constants as const
+import Experiment as experiment_module
+import Simulation as simulation_module
+from Experiment import Experiment, UnknownPerturbationTarget
+from utils.results_writer import load_results
+
+MODEL = Path(__file__).resolve().parents[1] / "SPARCED/models/SPARCED_standard"
+SPECIES = ["Baxm_Bcl2", "E", "INS", "m_A"]
+
+
+@pytest.fixture
+def experiment(tmp_path, monkeypatch):
+    # The configured output directory is relative to the working one
+    (tmp_path / "results").mkdir()
+    (tmp_path / "run").mkdir()
+    monkeypatch.chdir(tmp_path / "run")
+    return Experiment("experiment_1", MODEL / "data/experiments",
+                      "SPARCED_standard", MODEL, {})
+
+
+def test_perturbations_split_species_and_parameters(experiment):
+    species = {"E": 0.0, "INS": 0.0, "EGF": 0.0}
+    parameters = {"k1_1": 1.0, "k2": 2.0}
+    protocol = {const.YAML_PROTOCOL_PERTURBATIONS: "perturbations.tsv",
+                const.YAML_PROTOCOL_PERTURBATIONS_ID: "default",
+                const.YAML_PROTOCOL_PARAMETERS: {"k2": 0.5}}
+    species_values, parameters_values = experiment.load_perturbations(
+                                            protocol, species, parameters)
+    assert species_values == {"E": 3.308, "INS": 1721.76}
+    assert parameters_values == {"k2": 0.5}
+    # Conditions columns may target parameters too
+    species_values, parameters_values = experiment.load_perturbations(
+                                            protocol, {"E": 0.0},
+                                            parameters | {"INS": 1.0})
+    assert parameters_values == {"INS": 1721.76, "k2": 0.5}
+    with pytest.raises(UnknownPerturbationTarget):
+        experiment.load_perturbations(protocol, {"E": 0.0}, parameters)
+
+
+class PoolModel:
+    def setTimepoints(self, timepoints):
+        pass
+
+    def setInitialStates(self, states):
+        pass
+
+    def getStateIds(self):
+        return SPECIES
+
+
+def run_sparced(flagD, th, spdata, genedata, model, plan, rng, writer,
+                output_stride, output_times):
+    # A random walk drawn from the cell's own stream
+    time = np.arange(0.0, 300.0, 30.0)
+    species = (np.asarray(spdata)
+               + np.cumsum(rng.normal(size=(len(time), len(SPECIES))), axis=0))
+    genes = np.zeros((len(time), 2))
+    writer.append_rows(time, species, genes)
+    return species[-1:], genes[-1:], time[-1:]
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="Workers must inherit the stubbed simulation")
+@pytest.mark.parametrize("aggregate", [False, True])
+def test_pool_results_do_not_depend_on_the_workers(experiment, tmp_path,
+                                                   monkeypatch, aggregate):
+    for name in ["load_metadata", "load_parameters"]:
+        monkeypatch.setattr(Experiment, name, lambda self, *args: {})
+    monkeypatch.setattr(Experiment, "load_plan", lambda self, metadata: {})
+    monkeypatch.setattr(Experiment, "load_model_module",
+                        lambda self, *args: PoolModel())
+    monkeypatch.setattr(Experiment, "load_species",
+                        lambda self, metadata: dict.fromkeys(SPECIES, 1.0))
+    monkeypatch.setattr(experiment_module, "apply_parameters",
+                        lambda model, parameters: None)
+    monkeypatch.setattr(simulation_module, "RunSPARCED", run_sparced)
+    experiment.engine = const.ENGINE_POOL
+    experiment.nb_replicates = 10  # One full batch of cells, one partial
+    experiment.aggregate = aggregate
+    experiment.verbose = False
+    results = {}
+    for workers in [1, 2]:
+        experiment.workers = workers
+        experiment.output_directory = tmp_path / f"workers_{workers}"
+        experiment.run()
+        results[workers] = {path.name: load_results(path) for path
+                            in experiment.output_directory.iterdir()}
+    names = (["Simulation_statistics.txt"] if aggregate
+             else [f"Simulation_{cell}.txt" for cell in range(1, 11)])
+    assert sorted(results[1]) == sorted(names)
+    assert sorted(results[2]) == sorted(names)
+    for name in names:
+        pd.testing.assert_frame_equal(results[1][name], results[2][name],
+                                      check_exact=True)
+    if not aggregate:
+        # Every cell draws from its own stream
+        assert not results[1]["Simulation_1.txt"].equals(
+                                        results[1]["Simulation_2.txt"])
@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the files handling module"""
+
+import numpy as np
+
+from utils.files_handling import save_arrays
+
+
+def test_arrays_are_saved_by_replacing_the_archive(tmp_path):
+    archive = tmp_path / "plan.npz"
+    archive.write_bytes(b"previous")
+    save_arrays(archive, key=np.array("abc"), values=np.arange(3.0))
+    with np.load(archive) as arrays:
+        assert str(arrays["key"]) == "abc"
+        assert np.array_equal(arrays["values"], [0.0, 1.0, 2.0])
+    # No temporary file is left behind
+    assert [path.name for path in tmp_path.iterdir()] == ["plan.npz"]
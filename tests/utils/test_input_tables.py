@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the input_tables module"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import utils.input_tables as input_tables
+from utils.data_handling import load_input_data_file
+from utils.input_tables import (RATELAWS_SCHEMA, SPECIES_SCHEMA,
+                                InvalidInputTable, load_input_table)
+
+MODEL = (Path(__file__).resolve().parents[2]
+         / "SPARCED/models/SPARCED_standard/data/model")
+
+
+def write_ratelaws(path, rows):
+    path.write_text("\n".join(["name\tcompartment\treaction\tratelaw\tk1"]
+                              + ["\t".join(row) for row in rows]) + "\n")
+
+
+def test_standard_tables_match_the_legacy_loader():
+    species = load_input_table(MODEL / "legacy_Species.txt", SPECIES_SCHEMA)
+    legacy = load_input_data_file(MODEL / "legacy_Species.txt")
+    assert list(species["name"]) == [row[0] for row in legacy[1:]]
+    assert np.array_equal(species["initial_concentration"],
+                          [float(row[2]) for row in legacy[1:]])
+    ratelaws = load_input_table(MODEL / "ratelaws.txt", RATELAWS_SCHEMA)
+    legacy = load_input_data_file(MODEL / "ratelaws.txt")
+    # Unlike the legacy loader, every cell is stripped
+    assert list(ratelaws["ratelaw"]) == [row[3].strip() for row in legacy[1:]]
+    first_parameter = [float(row[4]) if len(row) > 4 and row[4] else np.nan
+                       for row in legacy[1:]]
+    assert np.array_equal(ratelaws.extra[:, 0], first_parameter,
+                          equal_nan=True)
+
+
+@pytest.mark.parametrize("rows", [
+    [["r1", "Cytoplasm", "A -> B", "k1*A", "fast"]],
+    [["r1", "Cytoplasm", "A -> B", "k1*A"], ["r1", "Cytoplasm", "B", "k1"]],
+    [["r1", "Cytoplasm", "A -> B"]],
+])
+def test_invalid_tables_are_reported(tmp_path, rows):
+    f_ratelaws = tmp_path / "ratelaws.txt"
+    write_ratelaws(f_ratelaws, rows)
+    with pytest.raises(InvalidInputTable):
+        load_input_table(f_ratelaws, RATELAWS_SCHEMA)
+
+
+def test_other_reader_errors_are_raised_again(tmp_path):
+    f_ratelaws = tmp_path / "ratelaws.txt"
+    write_ratelaws(f_ratelaws, [["r1", "Cytoplasm", "A -> B", "k1*A", "0.5"]])
+    error = ValueError("Not a number error")
+    with pytest.raises(ValueError, match="Not a number error"):
+        input_tables._raise_invalid_number(f_ratelaws, 5, [4], error)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the population_statistics module"""
+
+import numpy as np
+import pytest
+
+from utils.population_statistics import (IncompatibleStatistics,
+                                         PopulationStatistics,
+                                         StatisticsWriter)
+from utils.results_writer import (OutputOptions, build_results_columns,
+                                  load_results)
+
+SPECIES = ["Baxm_Bcl2", "A", "m_A", "m_B"]
+QUANTILES = [0.0, 0.05, 0.5, 0.95, 1.0]
+
+
+def add_cells(statistics, trajectories, time):
+    statistics.bind(["A", "B"])
+    for trajectory in trajectories:
+        rows = np.column_stack((time[:len(trajectory)], trajectory))
+        # Trajectories arrive in chunks, as from a results writer
+        statistics.add_rows(0, rows[:3])
+        statistics.add_rows(3, rows[3:])
+
+
+def test_merged_statistics_match_the_whole_population():
+    rng = np.random.default_rng(0)
+    time = np.arange(0.0, 300.0, 30.0)
+    trajectories = rng.lognormal(size=(1000, len(time), 2))
+    statistics = [PopulationStatistics(quantiles=QUANTILES)
+                  for _ in range(3)]
+    for worker, cells in enumerate(np.array_split(trajectories, 3)):
+        add_cells(statistics[worker], cells, time)
+    merged = PopulationStatistics(quantiles=QUANTILES)
+    for worker_statistics in statistics:
+        merged.merge(worker_statistics)
+    summary = merged.summary()
+    assert np.array_equal(summary["time"], time)
+    assert np.all(summary["count"] == 1000)
+    values = trajectories[:, :, 1]
+    assert np.allclose(summary["B_mean"], values.mean(axis=0))
+    assert np.allclose(summary["B_variance"], values.var(axis=0, ddof=1))
+    assert np.array_equal(summary["B_q0"], values.min(axis=0))
+    assert np.array_equal(summary["B_q1"], values.max(axis=0))
+    # Digests bound the rank error of quantiles
+    for quantile in [0.05, 0.5, 0.95]:
+        estimate = summary[f"B_q{quantile:g}"].to_numpy()
+        ranks = (values < estimate).mean(axis=0)
+        assert np.all(np.abs(ranks - quantile) < 0.02)
+
+
+def test_small_populations_have_exact_quantiles():
+    rng = np.random.default_rng(1)
+    time = np.arange(0.0, 150.0, 30.0)
+    trajectories = rng.normal(size=(7, len(time), 2))
+    # Dead cells stop early
+    trajectories = [trajectory[:length] for trajectory, length
+                    in zip(trajectories, [5, 5, 5, 5, 5, 4, 4])]
+    statistics = PopulationStatistics(quantiles=QUANTILES)
+    add_cells(statistics, trajectories, time)
+    summary = statistics.summary()
+    assert list(summary["count"]) == [7, 7, 7, 7, 5]
+    expected = np.quantile(np.array([trajectory[4, 0] for trajectory
+                                     in trajectories[:5]]),
+                           QUANTILES, method="hazen")
+    assert np.allclose([summary[f"A_q{quantile:g}"].iloc[4]
+                        for quantile in QUANTILES], expected)
+
+
+def test_statistics_writer_applies_the_selection(tmp_path):
+    rng = np.random.default_rng(2)
+    time = np.arange(0.0, 150.0, 30.0)
+    columns = build_results_columns(SPECIES)
+    options = OutputOptions(chunk_size=2, species=["A"],
+                            observables={"total_m": "m_A + m_B"})
+    statistics = PopulationStatistics()
+    species = rng.uniform(0.0, 10.0, (10, len(time), len(SPECIES)))
+    for cell in range(10):
+        with StatisticsWriter(statistics, columns, options,
+                              options.build_selection(columns)) as writer:
+            writer.append_rows(time, species[cell], np.zeros((len(time), 4)))
+    assert statistics.columns == ["A", "total_m"]
+    statistics.write(tmp_path / "statistics.txt", options)
+    summary = load_results(tmp_path / "statistics.txt")
+    assert np.allclose(summary["total_m_mean"],
+                       species[:, :, 2:].sum(axis=2).mean(axis=0))
+    with pytest.raises(IncompatibleStatistics):
+        statistics.bind(["A"])
+
+
+def test_memory_does_not_depend_on_the_number_of_cells():
+    rng = np.random.default_rng(3)
+    time = np.arange(0.0, 300.0, 30.0)
+    statistics = PopulationStatistics()
+    add_cells(statistics, rng.normal(size=(5, len(time), 2)), time)
+    def nbytes():
+        return sum(getattr(statistics, name).nbytes for name in
+                   ["mean", "m2", "minimum", "maximum", "centroids",
+                    "weights", "buffer"])
+    before = nbytes()
+    add_cells(statistics, rng.normal(size=(100, len(time), 2)), time)
+    assert nbytes() == before
+    # As documented: 208 bytes per time point and column
+    assert before == 208*len(statistics.time)*2
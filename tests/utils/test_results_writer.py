@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Tests of the results_writer module"""
+
+import os
+import sys
+from contextlib import ExitStack
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import constants as const
+from utils.output_selection import InvalidOutputSelection
+from utils.results_writer import (MissingOutputPackage, OutputOptions,
+                                  TsvResultsWriter, UnknownOutputFormat,
+                                  build_results_columns, get_results_writer,
+                                  load_results)
+
+SPECIES = ["Baxm_Bcl2", "A", "m_A", "m_B"]
+
+
+def test_columns_include_genes_states():
+    assert build_results_columns(SPECIES) == [
+        "time", "Baxm_Bcl2", "A", "m_A", "m_B",
+        "ag_A", "ag_B", "ig_A", "ig_B"]
+
+
+def test_chunked_output_matches_whole_table(tmp_path):
+    rng = np.random.default_rng(0)
+    time = np.arange(0.0, 330.0, 30.0)
+    species = rng.uniform(0.0, 10.0, (len(time), len(SPECIES)))
+    genes = rng.integers(0, 3, (len(time), 4)).astype(float)
+    columns = build_results_columns(SPECIES)
+    with TsvResultsWriter(tmp_path / "chunked.txt", columns,
+                          OutputOptions(chunk_size=4)) as writer:
+        writer.append_rows(time, species, genes)
+        assert writer.nb_written == 8
+    expected = pd.DataFrame(np.column_stack((time, species, genes)),
+                            columns=columns)
+    expected.to_csv(tmp_path / "whole.txt", sep="\t")
+    assert ((tmp_path / "chunked.txt").read_text()
+            == (tmp_path / "whole.txt").read_text())
+
+
+def test_empty_output_has_header(tmp_path):
+    columns = build_results_columns(SPECIES)
+    with TsvResultsWriter(tmp_path / "empty.txt", columns):
+        pass
+    assert list(load_results(tmp_path / "empty.txt").columns) == columns
+
+
+@pytest.mark.parametrize("output_format", [const.OUTPUT_FORMAT_NPZ,
+                                           const.OUTPUT_FORMAT_HDF5])
+def test_binary_output_round_trip(tmp_path, output_format):
+    if output_format == const.OUTPUT_FORMAT_HDF5:
+        pytest.importorskip("h5py")
+    rng = np.random.default_rng(1)
+    time = np.arange(0.0, 330.0, 30.0)
+    species = rng.uniform(0.0, 10.0, (len(time), len(SPECIES)))
+    genes = rng.integers(0, 3, (len(time), 4)).astype(float)
+    columns = build_results_columns(SPECIES)
+    writer = get_results_writer(output_format)
+    file_path = tmp_path / ("results" + writer.extension)
+    options = OutputOptions(output_format, const.OUTPUT_PRECISION_SINGLE,
+                            True, 4)
+    with writer(file_path, columns, options) as results:
+        results.append_rows(time, species, genes)
+    loaded = load_results(file_path)
+    assert list(loaded.columns) == columns
+    assert loaded.values.dtype == np.float32
+    assert np.allclose(loaded.values, np.column_stack((time, species, genes)))
+
+
+@pytest.mark.parametrize("output_format", [const.OUTPUT_FORMAT_TSV,
+                                           const.OUTPUT_FORMAT_NPZ,
+                                           const.OUTPUT_FORMAT_HDF5])
+def test_open_writers_hold_no_file_descriptors(tmp_path, output_format):
+    if output_format == const.OUTPUT_FORMAT_HDF5:
+        pytest.importorskip("h5py")
+    if not os.path.isdir("/proc/self/fd"):
+        pytest.skip("File descriptors are not listed on this platform")
+    columns = build_results_columns(SPECIES)
+    writer = get_results_writer(output_format)
+    options = OutputOptions(output_format, chunk_size=2)
+    nb_descriptors = len(os.listdir("/proc/self/fd"))
+    with ExitStack() as stack:
+        # As the lockstep engine, one writer per cell
+        writers = [stack.enter_context(writer(tmp_path / f"cell_{cell}"
+                                              f"{writer.extension}",
+                                              columns, options))
+                   for cell in range(50)]
+        for step in range(3):
+            for cell, results in enumerate(writers):
+                results.append(30.0*step, np.full(len(SPECIES), cell),
+                               np.zeros(4))
+        assert len(os.listdir("/proc/self/fd")) == nb_descriptors
+    loaded = load_results(tmp_path / f"cell_7{writer.extension}")
+    assert list(loaded["time"]) == [0.0, 30.0, 60.0]
+    assert np.all(loaded["A"] == 7)
+
+
+def test_hdf5_output_holds_thousands_of_columns(tmp_path):
+    pytest.importorskip("h5py")
+    # Column names well beyond HDF5's 64 kB attribute limit
+    species = [f"species_with_a_long_name_{index}" for index in range(5000)]
+    columns = ["time"] + species
+    writer = get_results_writer(const.OUTPUT_FORMAT_HDF5)
+    file_path = tmp_path / ("results" + writer.extension)
+    with writer(file_path, columns, OutputOptions(chunk_size=2)) as results:
+        for step in range(3):
+            results.append(30.0*step, np.arange(5000.0) + step,
+                           np.empty(0))
+    loaded = load_results(file_path)
+    assert list(loaded.columns) == columns
+    assert list(loaded["species_with_a_long_name_4999"]) == [4999.0, 5000.0,
+                                                             5001.0]
+
+
+def test_unknown_output_format_is_rejected():
+    with pytest.raises(UnknownOutputFormat):
+        get_results_writer("xlsx")
+
+
+def test_hdf5_output_without_h5py_is_rejected(monkeypatch):
+    monkeypatch.setitem(sys.modules, "h5py", None)
+    with pytest.raises(MissingOutputPackage):
+        get_results_writer(const.OUTPUT_FORMAT_HDF5)
+
+
+def test_selected_outputs_and_observables(tmp_path):
+    rng = np.random.default_rng(2)
+    time = np.arange(0.0, 150.0, 30.0)
+    species = rng.uniform(0.0, 10.0, (len(time), len(SPECIES)))
+    genes = rng.integers(0, 3, (len(time), 4)).astype(float)
+    columns = build_results_columns(SPECIES)
+    options = OutputOptions(chunk_size=2, species=["A"], patterns=["^ag_"],
+                            observables={"total_m": "m_A + 2*m_B",
+                                         "log_A": "log(A)"})
+    with TsvResultsWriter(tmp_path / "selected.txt", columns, options,
+                          options.build_selection(columns)) as writer:
+        writer.append_rows(time, species, genes)
+    loaded = load_results(tmp_path / "selected.txt")
+    assert list(loaded.columns) == ["time", "A", "ag_A", "ag_B",
+                                    "total_m", "log_A"]
+    assert np.allclose(loaded["A"], species[:, 1])
+    assert np.allclose(loaded["ag_B"], genes[:, 1])
+    assert np.allclose(loaded["total_m"], species[:, 2] + 2 * species[:, 3])
+    assert np.allclose(loaded["log_A"], np.log(species[:, 1]))
+
+
+def test_unknown_outputs_are_rejected():
+    columns = build_results_columns(SPECIES)
+    with pytest.raises(InvalidOutputSelection):
+        OutputOptions(species=["B"]).build_selection(columns)
+    with pytest.raises(InvalidOutputSelection):
+        OutputOptions(observables={"x": "B*2"}).build_selection(columns)
+    assert OutputOptions().build_selection(columns) is None